@@ -26,6 +26,36 @@ type Instance struct {
 	User    *string `json:"user,omitempty"`
 }
 
+// Operation defines model for Operation.
+type Operation struct {
+	Detail   *string   `json:"detail,omitempty"`
+	Done     *bool     `json:"done,omitempty"`
+	Error    *string   `json:"error,omitempty"`
+	Id       *string   `json:"id,omitempty"`
+	Instance *Instance `json:"instance,omitempty"`
+
+	// create or restart
+	Kind *string `json:"kind,omitempty"`
+	Name *string `json:"name,omitempty"`
+
+	// pending, pulling, creating, starting, ssh-ready, then done or failed
+	Stage   *string `json:"stage,omitempty"`
+	User    *string `json:"user,omitempty"`
+	Version *int    `json:"version,omitempty"`
+}
+
+// GetOperationsIdParams defines parameters for GetOperationsId.
+type GetOperationsIdParams struct {
+	// Seconds to wait for a change (default 30, max 300)
+	Wait *int `form:"wait,omitempty" json:"wait,omitempty"`
+}
+
+// GetSpacesUserParams defines parameters for GetSpacesUser.
+type GetSpacesUserParams struct {
+	// Only return name, status and ssh port, skipping the scan for open ports
+	Summary *bool `form:"summary,omitempty" json:"summary,omitempty"`
+}
+
 // PostSpacesUserJSONBody defines parameters for PostSpacesUser.
 type PostSpacesUserJSONBody struct {
 	// The docker image to use
@@ -38,6 +68,12 @@ type PostSpacesUserJSONBody struct {
 	User     *string `json:"user,omitempty"`
 }
 
+// GetSpacesUserNameWatchParams defines parameters for GetSpacesUserNameWatch.
+type GetSpacesUserNameWatchParams struct {
+	// Seconds to wait for a change (default 30, max 300)
+	Wait *int `form:"wait,omitempty" json:"wait,omitempty"`
+}
+
 // PostSpacesUserJSONRequestBody defines body for PostSpacesUser for application/json ContentType.
 type PostSpacesUserJSONRequestBody PostSpacesUserJSONBody
 
@@ -47,8 +83,11 @@ type ServerInterface interface {
 	// (GET /health)
 	GetHealth(w http.ResponseWriter, r *http.Request)
 
+	// (GET /operations/{id})
+	GetOperationsId(w http.ResponseWriter, r *http.Request, id string, params GetOperationsIdParams)
+
 	// (GET /spaces/{user})
-	GetSpacesUser(w http.ResponseWriter, r *http.Request, user string)
+	GetSpacesUser(w http.ResponseWriter, r *http.Request, user string, params GetSpacesUserParams)
 
 	// (POST /spaces/{user})
 	PostSpacesUser(w http.ResponseWriter, r *http.Request, user string)
@@ -67,6 +106,9 @@ type ServerInterface interface {
 
 	// (POST /spaces/{user}/{name}/stop)
 	PostSpacesUserNameStop(w http.ResponseWriter, r *http.Request, user string, name string)
+
+	// (GET /spaces/{user}/{name}/watch)
+	GetSpacesUserNameWatch(w http.ResponseWriter, r *http.Request, user string, name string, params GetSpacesUserNameWatchParams)
 }
 
 // ServerInterfaceWrapper converts contexts to parameters.
@@ -93,6 +135,46 @@ func (siw *ServerInterfaceWrapper) GetHealth(w http.ResponseWriter, r *http.Requ
 	handler(w, r.WithContext(ctx))
 }
 
+// GetOperationsId operation middleware
+func (siw *ServerInterfaceWrapper) GetOperationsId(w http.ResponseWriter, r *http.Request) {
+	ctx := r.Context()
+
+	var err error
+
+	// ------------- Path parameter "id" -------------
+	var id string
+
+	err = runtime.BindStyledParameter("simple", false, "id", chi.URLParam(r, "id"), &id)
+	if err != nil {
+		siw.ErrorHandlerFunc(w, r, &InvalidParamFormatError{ParamName: "id", Err: err})
+		return
+	}
+
+	// Parameter object where we will unmarshal all parameters from the context
+	var params GetOperationsIdParams
+
+	// ------------- Optional query parameter "wait" -------------
+	if paramValue := r.URL.Query().Get("wait"); paramValue != "" {
+
+	}
+
+	err = runtime.BindQueryParameter("form", true, false, "wait", r.URL.Query(), &params.Wait)
+	if err != nil {
+		siw.ErrorHandlerFunc(w, r, &InvalidParamFormatError{ParamName: "wait", Err: err})
+		return
+	}
+
+	var handler = func(w http.ResponseWriter, r *http.Request) {
+		siw.Handler.GetOperationsId(w, r, id, params)
+	}
+
+	for _, middleware := range siw.HandlerMiddlewares {
+		handler = middleware(handler)
+	}
+
+	handler(w, r.WithContext(ctx))
+}
+
 // GetSpacesUser operation middleware
 func (siw *ServerInterfaceWrapper) GetSpacesUser(w http.ResponseWriter, r *http.Request) {
 	ctx := r.Context()
@@ -108,8 +190,22 @@ func (siw *ServerInterfaceWrapper) GetSpacesUser(w http.ResponseWriter, r *http.
 		return
 	}
 
+	// Parameter object where we will unmarshal all parameters from the context
+	var params GetSpacesUserParams
+
+	// ------------- Optional query parameter "summary" -------------
+	if paramValue := r.URL.Query().Get("summary"); paramValue != "" {
+
+	}
+
+	err = runtime.BindQueryParameter("form", true, false, "summary", r.URL.Query(), &params.Summary)
+	if err != nil {
+		siw.ErrorHandlerFunc(w, r, &InvalidParamFormatError{ParamName: "summary", Err: err})
+		return
+	}
+
 	var handler = func(w http.ResponseWriter, r *http.Request) {
-		siw.Handler.GetSpacesUser(w, r, user)
+		siw.Handler.GetSpacesUser(w, r, user, params)
 	}
 
 	for _, middleware := range siw.HandlerMiddlewares {
@@ -320,6 +416,55 @@ func (siw *ServerInterfaceWrapper) PostSpacesUserNameStop(w http.ResponseWriter,
 	handler(w, r.WithContext(ctx))
 }
 
+// GetSpacesUserNameWatch operation middleware
+func (siw *ServerInterfaceWrapper) GetSpacesUserNameWatch(w http.ResponseWriter, r *http.Request) {
+	ctx := r.Context()
+
+	var err error
+
+	// ------------- Path parameter "user" -------------
+	var user string
+
+	err = runtime.BindStyledParameter("simple", false, "user", chi.URLParam(r, "user"), &user)
+	if err != nil {
+		siw.ErrorHandlerFunc(w, r, &InvalidParamFormatError{ParamName: "user", Err: err})
+		return
+	}
+
+	// ------------- Path parameter "name" -------------
+	var name string
+
+	err = runtime.BindStyledParameter("simple", false, "name", chi.URLParam(r, "name"), &name)
+	if err != nil {
+		siw.ErrorHandlerFunc(w, r, &InvalidParamFormatError{ParamName: "name", Err: err})
+		return
+	}
+
+	// Parameter object where we will unmarshal all parameters from the context
+	var params GetSpacesUserNameWatchParams
+
+	// ------------- Optional query parameter "wait" -------------
+	if paramValue := r.URL.Query().Get("wait"); paramValue != "" {
+
+	}
+
+	err = runtime.BindQueryParameter("form", true, false, "wait", r.URL.Query(), &params.Wait)
+	if err != nil {
+		siw.ErrorHandlerFunc(w, r, &InvalidParamFormatError{ParamName: "wait", Err: err})
+		return
+	}
+
+	var handler = func(w http.ResponseWriter, r *http.Request) {
+		siw.Handler.GetSpacesUserNameWatch(w, r, user, name, params)
+	}
+
+	for _, middleware := range siw.HandlerMiddlewares {
+		handler = middleware(handler)
+	}
+
+	handler(w, r.WithContext(ctx))
+}
+
 type UnescapedCookieParamError struct {
 	ParamName string
 	Err       error
@@ -436,6 +581,9 @@ func HandlerWithOptions(si ServerInterface, options ChiServerOptions) http.Handl
 	r.Group(func(r chi.Router) {
 		r.Get(options.BaseURL+"/health", wrapper.GetHealth)
 	})
+	r.Group(func(r chi.Router) {
+		r.Get(options.BaseURL+"/operations/{id}", wrapper.GetOperationsId)
+	})
 	r.Group(func(r chi.Router) {
 		r.Get(options.BaseURL+"/spaces/{user}", wrapper.GetSpacesUser)
 	})
@@ -457,6 +605,9 @@ func HandlerWithOptions(si ServerInterface, options ChiServerOptions) http.Handl
 	r.Group(func(r chi.Router) {
 		r.Post(options.BaseURL+"/spaces/{user}/{name}/stop", wrapper.PostSpacesUserNameStop)
 	})
+	r.Group(func(r chi.Router) {
+		r.Get(options.BaseURL+"/spaces/{user}/{name}/watch", wrapper.GetSpacesUserNameWatch)
+	})
 
 	return r
 }
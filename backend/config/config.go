@@ -11,6 +11,7 @@ import (
 )
 
 const DefaultImageName = "docker-env-base:local"
+const DefaultListConcurrency = 8
 const configFileName = "docker-env.yaml"
 
 type Config struct {
@@ -20,6 +21,11 @@ type Config struct {
 	DnsSearch       string   `yaml:"dns_search,omitempty"`
 	DnsCopyFromHost bool     `yaml:"dns_copy_from_host,omitempty"`
 	Dir             string   `yaml:"dir,omitempty"`
+	// how many instances List inspects at once
+	ListConcurrency int `yaml:"list_concurrency,omitempty"`
+	// stacks to keep provisioned and paused per image, ready to hand out
+	// on create
+	WarmPool map[string]int `yaml:"warm_pool,omitempty"`
 }
 
 func Load(configDir string) Config {
@@ -38,9 +44,10 @@ func Load(configDir string) Config {
 	}
 
 	c := Config{
-		Port:         3001,
-		Dir:          path.Join(userdir, ".docker-env"),
-		DefaultImage: DefaultImageName,
+		Port:            3001,
+		Dir:             path.Join(userdir, ".docker-env"),
+		DefaultImage:    DefaultImageName,
+		ListConcurrency: DefaultListConcurrency,
 	}
 
 	applyEnv := func(c Config) Config {
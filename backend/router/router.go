@@ -1,6 +1,7 @@
 package router
 
 import (
+	"context"
 	"encoding/json"
 	"fmt"
 	"io/ioutil"
@@ -8,6 +9,7 @@ import (
 	"net/http"
 	"os"
 	"strings"
+	"time"
 
 	docker "github.com/docker/docker/client"
 	chi "github.com/go-chi/chi/v5"
@@ -19,16 +21,33 @@ var manager spaces.Manager
 
 type router struct {
 	*chi.Mux
-	manager spaces.Manager
+	manager    spaces.Manager
+	watcher    *spaces.Watcher
+	operations *spaces.Operations
+	tags       *spaces.TagCache
 }
 
+const (
+	watchInterval = time.Second
+	// watches scan for open ports no more often than clients used to poll
+	watchPortInterval = 5 * time.Second
+	defaultWatchWait  = 30 * time.Second
+	maxWatchWait      = 5 * time.Minute
+	operationTTL      = 10 * time.Minute
+	// how long a served ETag answers matching polls without a fresh Get
+	etagTTL = 5 * time.Second
+)
+
 func New(manager spaces.Manager) http.Handler {
 
 	r := chi.NewRouter()
 
 	ret := &router{
-		Mux:     r,
-		manager: manager,
+		Mux:        r,
+		manager:    manager,
+		watcher:    spaces.NewWatcher(manager, watchInterval, watchPortInterval),
+		operations: spaces.NewOperations(operationTTL),
+		tags:       spaces.NewTagCache(etagTTL),
 	}
 
 	r.Use(loggingMiddleware)
@@ -54,8 +73,9 @@ type createSpaceRequest struct {
 	Image    string `json:"image"`
 }
 
-func (r *router) GetSpacesUser(w http.ResponseWriter, req *http.Request, user string) {
-	instances, err := r.manager.List(user)
+func (r *router) GetSpacesUser(w http.ResponseWriter, req *http.Request, user string, params openapi_server.GetSpacesUserParams) {
+	summary := params.Summary != nil && *params.Summary
+	instances, err := r.manager.List(user, summary)
 
 	if err != nil {
 		w.WriteHeader(500)
@@ -63,6 +83,10 @@ func (r *router) GetSpacesUser(w http.ResponseWriter, req *http.Request, user st
 		return
 	}
 
+	if notModified(w, req, spaces.ListETag(instances)) {
+		return
+	}
+
 	raw, err := json.Marshal(instances)
 
 	if err != nil {
@@ -71,8 +95,29 @@ func (r *router) GetSpacesUser(w http.ResponseWriter, req *http.Request, user st
 		return
 	}
 
-	w.Write(raw)
 	w.Header().Add("Content-Type", "application/json")
+	w.Write(raw)
+}
+
+// notModified sets the ETag header and answers 304 when the client's
+// If-None-Match shows it already has this version.
+func notModified(w http.ResponseWriter, req *http.Request, etag string) bool {
+	w.Header().Set("ETag", etag)
+	if matchETag(req, etag) {
+		w.WriteHeader(http.StatusNotModified)
+		return true
+	}
+	return false
+}
+
+func matchETag(req *http.Request, etag string) bool {
+	for _, tag := range strings.Split(req.Header.Get("If-None-Match"), ",") {
+		tag = trimETag(tag)
+		if tag == etag || tag == "*" {
+			return true
+		}
+	}
+	return false
 }
 
 func (r *router) GetHealth(w http.ResponseWriter, req *http.Request) {
@@ -112,9 +157,22 @@ func (r *router) PostSpacesUser(w http.ResponseWriter, req *http.Request, user s
 		Image:    csr.Image,
 	}
 
-	instance, output, err := r.manager.Create(s)
+	if respondAsync(req) {
+		if _, err := r.manager.Get(user, csr.Name, false); err == nil {
+			w.WriteHeader(409)
+			return
+		}
 
-	if os.IsExist(err) {
+		op, err := r.operations.Start("create", user, csr.Name, func(progress spaces.Progress) (*spaces.Instance, string, error) {
+			return r.manager.Create(s, progress)
+		})
+		r.writeAccepted(w, op, err)
+		return
+	}
+
+	instance, output, err := r.manager.Create(s, nil)
+
+	if os.IsExist(err) || err == spaces.ErrBusy {
 		w.WriteHeader(409)
 		return
 	}
@@ -149,16 +207,30 @@ func (r *router) PostSpacesUser(w http.ResponseWriter, req *http.Request, user s
 
 // (DELETE /spaces/{user}/{name})
 func (r *router) DeleteSpacesUserName(w http.ResponseWriter, req *http.Request, user string, name string) {
+	defer r.tags.Forget(user, name)
 	err := r.manager.Kill(user, name)
 
 	if os.IsNotExist(err) {
 		w.WriteHeader(404)
 		return
 	}
+
+	if err == spaces.ErrBusy {
+		w.WriteHeader(409)
+		return
+	}
 }
 
 // (GET /spaces/{user}/{name})
 func (r *router) GetSpacesUserName(w http.ResponseWriter, req *http.Request, user string, name string) {
+	// a poll that matches what was just served skips the Get and its
+	// port scan
+	if etag, ok := r.tags.Get(user, name); ok && matchETag(req, etag) {
+		w.Header().Set("ETag", etag)
+		w.WriteHeader(http.StatusNotModified)
+		return
+	}
+
 	instance, err := r.manager.Get(user, name, true)
 
 	if os.IsNotExist(err) {
@@ -172,6 +244,12 @@ func (r *router) GetSpacesUserName(w http.ResponseWriter, req *http.Request, use
 		return
 	}
 
+	etag := instance.ETag()
+	r.tags.Set(user, name, etag)
+	if notModified(w, req, etag) {
+		return
+	}
+
 	raw, err := json.Marshal(instance)
 
 	if err != nil {
@@ -180,20 +258,182 @@ func (r *router) GetSpacesUserName(w http.ResponseWriter, req *http.Request, use
 		return
 	}
 
+	w.Header().Add("Content-Type", "application/json")
+	w.WriteHeader(200)
+	w.Write(raw)
+}
+
+// respondAsync is true when the client asked for a 202 and an operation to
+// follow rather than waiting for a create or restart.
+func respondAsync(req *http.Request) bool {
+	for _, pref := range strings.Split(req.Header.Get("Prefer"), ",") {
+		if strings.EqualFold(strings.TrimSpace(pref), "respond-async") {
+			return true
+		}
+	}
+	return false
+}
+
+func (r *router) writeAccepted(w http.ResponseWriter, op spaces.Operation, err error) {
+	if os.IsExist(err) {
+		// something is already happening to the instance
+		w.WriteHeader(409)
+		return
+	}
+
+	raw, err := json.Marshal(op)
+	if err != nil {
+		w.WriteHeader(500)
+		w.Write([]byte(fmt.Sprintf("Error marshalling: %v", err)))
+		return
+	}
+
+	w.Header().Set("Location", "/operations/"+op.ID)
+	w.Header().Set("Preference-Applied", "respond-async")
+	w.Header().Set("ETag", op.ETag())
+	w.Header().Add("Content-Type", "application/json")
+	w.WriteHeader(http.StatusAccepted)
+	w.Write(raw)
+}
+
+// (GET /operations/{id})
+func (r *router) GetOperationsId(w http.ResponseWriter, req *http.Request, id string, params openapi_server.GetOperationsIdParams) {
+	etag := trimETag(req.Header.Get("If-None-Match"))
+
+	wait := time.Duration(0)
+	if etag != "" {
+		wait = defaultWatchWait
+		if params.Wait != nil {
+			wait = time.Duration(*params.Wait) * time.Second
+			if wait > maxWatchWait {
+				wait = maxWatchWait
+			}
+		}
+	}
+
+	ctx, cancel := context.WithTimeout(req.Context(), wait)
+	defer cancel()
+
+	op, err := r.operations.Wait(ctx, id, etag)
+
+	if os.IsNotExist(err) {
+		w.WriteHeader(404)
+		return
+	}
+
+	if err == context.DeadlineExceeded || err == context.Canceled {
+		w.Header().Set("ETag", op.ETag())
+		w.WriteHeader(http.StatusNotModified)
+		return
+	}
+
+	raw, err := json.Marshal(op)
+
+	if err != nil {
+		w.WriteHeader(500)
+		w.Write([]byte(fmt.Sprintf("Error marshalling: %v", err)))
+		return
+	}
+
+	w.Header().Set("ETag", op.ETag())
+	w.Header().Add("Content-Type", "application/json")
 	w.WriteHeader(200)
+	w.Write(raw)
+}
+
+func trimETag(tag string) string {
+	return strings.TrimSpace(strings.TrimPrefix(strings.TrimSpace(tag), "W/"))
+}
+
+// (GET /spaces/{user}/{name}/watch)
+func (r *router) GetSpacesUserNameWatch(w http.ResponseWriter, req *http.Request, user string, name string, params openapi_server.GetSpacesUserNameWatchParams) {
+	wait := defaultWatchWait
+	if params.Wait != nil {
+		wait = time.Duration(*params.Wait) * time.Second
+		if wait > maxWatchWait {
+			wait = maxWatchWait
+		}
+	}
+
+	ctx, cancel := context.WithTimeout(req.Context(), wait)
+	defer cancel()
+
+	instance, err := r.watcher.Wait(ctx, user, name, trimETag(req.Header.Get("If-None-Match")))
+
+	if err == spaces.ErrNotReady {
+		// no state to compare with yet
+		w.Header().Set("Retry-After", "1")
+		w.WriteHeader(http.StatusServiceUnavailable)
+		return
+	}
+
+	if err == context.DeadlineExceeded || err == context.Canceled {
+		w.Header().Set("ETag", instance.ETag())
+		w.WriteHeader(http.StatusNotModified)
+		return
+	}
+
+	if os.IsNotExist(err) {
+		// JSON, so clients can tell a missing instance from a backend
+		// without this route
+		w.Header().Add("Content-Type", "application/json")
+		w.WriteHeader(404)
+		w.Write([]byte(`{"error":"instance not found"}`))
+		return
+	}
+
+	if err != nil {
+		w.WriteHeader(500)
+		w.Write([]byte(fmt.Sprintf("Error getting: %v", err)))
+		return
+	}
+
+	raw, err := json.Marshal(instance)
+
+	if err != nil {
+		w.WriteHeader(500)
+		w.Write([]byte(fmt.Sprintf("Error marshalling: %v", err)))
+		return
+	}
+
+	w.Header().Set("ETag", instance.ETag())
 	w.Header().Add("Content-Type", "application/json")
+	w.WriteHeader(200)
 	w.Write(raw)
 }
 
 // (POST /spaces/{user}/{name}/restart)
 func (r *router) PostSpacesUserNameRestart(w http.ResponseWriter, req *http.Request, user string, name string) {
-	err := r.manager.Restart(user, name)
+	defer r.tags.Forget(user, name)
+	if respondAsync(req) {
+		if _, err := r.manager.Get(user, name, false); os.IsNotExist(err) {
+			w.WriteHeader(404)
+			return
+		}
+
+		op, err := r.operations.Start("restart", user, name, func(progress spaces.Progress) (*spaces.Instance, string, error) {
+			if err := r.manager.Restart(user, name, progress); err != nil {
+				return nil, "", err
+			}
+			instance, err := r.manager.Get(user, name, false)
+			return &instance, "", err
+		})
+		r.writeAccepted(w, op, err)
+		return
+	}
+
+	err := r.manager.Restart(user, name, nil)
 
 	if os.IsNotExist(err) {
 		w.WriteHeader(404)
 		return
 	}
 
+	if err == spaces.ErrBusy {
+		w.WriteHeader(409)
+		return
+	}
+
 	if err != nil {
 		w.WriteHeader(500)
 		w.Write([]byte(err.Error()))
@@ -202,6 +442,7 @@ func (r *router) PostSpacesUserNameRestart(w http.ResponseWriter, req *http.Requ
 
 // (POST /spaces/{user}/{name}/start)
 func (r *router) PostSpacesUserNameStart(w http.ResponseWriter, req *http.Request, user string, name string) {
+	defer r.tags.Forget(user, name)
 	err := r.manager.Start(user, name)
 
 	if err == nil {
@@ -211,6 +452,10 @@ func (r *router) PostSpacesUserNameStart(w http.ResponseWriter, req *http.Reques
 		w.WriteHeader(404)
 		return
 	}
+	if err == spaces.ErrBusy {
+		w.WriteHeader(409)
+		return
+	}
 	w.WriteHeader(500)
 	w.Write([]byte(err.Error()))
 
@@ -218,6 +463,7 @@ func (r *router) PostSpacesUserNameStart(w http.ResponseWriter, req *http.Reques
 
 // (POST /spaces/{user}/{name}/stop)
 func (r *router) PostSpacesUserNameStop(w http.ResponseWriter, req *http.Request, user string, name string) {
+	defer r.tags.Forget(user, name)
 	err := r.manager.Stop(user, name)
 
 	if err == nil {
@@ -228,6 +474,11 @@ func (r *router) PostSpacesUserNameStop(w http.ResponseWriter, req *http.Request
 		return
 	}
 
+	if err == spaces.ErrBusy {
+		w.WriteHeader(409)
+		return
+	}
+
 	if err == os.ErrInvalid {
 		w.WriteHeader(400)
 		return
@@ -0,0 +1,97 @@
+package spaces
+
+import (
+	"fmt"
+	"hash/fnv"
+	"io"
+	"sort"
+	"sync"
+	"time"
+)
+
+// ETag identifies the state a polling client cares about (status, ssh port
+// and the set of forwarded ports), so unchanged instances can be answered
+// with a 304.  Container stats are left out on purpose, they change on
+// every call.
+func (i Instance) ETag() string {
+	h := fnv.New64a()
+	i.writeTag(h)
+	return fmt.Sprintf(`"%x"`, h.Sum64())
+}
+
+// ListETag is the ETag for a list of instances, in the order given.
+func ListETag(instances []Instance) string {
+	h := fnv.New64a()
+	fmt.Fprintf(h, "%d\x00", len(instances))
+	for _, i := range instances {
+		i.writeTag(h)
+	}
+	return fmt.Sprintf(`"%x"`, h.Sum64())
+}
+
+func (i Instance) writeTag(w io.Writer) {
+	fmt.Fprintf(w, "%s\x00%s\x00%s\x00%s\x00%d\x00%d\x00", i.User, i.Name, i.Host, i.Status, i.SshPort, len(i.Ports))
+
+	ports := append([]instancePort(nil), i.Ports...)
+	sort.Slice(ports, func(a, b int) bool {
+		return ports[a].RemotePort < ports[b].RemotePort
+	})
+	for _, p := range ports {
+		fmt.Fprintf(w, "%s\x00%s\x00%d\x00%d\x00", p.Label, p.Message, p.Port, p.RemotePort)
+	}
+}
+
+// TagCache remembers the ETag last served for each instance for ttl, so a
+// conditional GET that still matches can be answered with a 304 without
+// inspecting the instance or scanning its ports again.  Port changes inside
+// the container can take up to ttl to show.
+type TagCache struct {
+	ttl time.Duration
+
+	mu   sync.Mutex
+	tags map[string]cachedTag
+}
+
+type cachedTag struct {
+	etag    string
+	expires time.Time
+}
+
+func NewTagCache(ttl time.Duration) *TagCache {
+	return &TagCache{
+		ttl:  ttl,
+		tags: map[string]cachedTag{},
+	}
+}
+
+// Get returns the instance's ETag if one was set within ttl.
+func (c *TagCache) Get(user, name string) (string, bool) {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+
+	tag, ok := c.tags[user+"/"+name]
+	if !ok || time.Now().After(tag.expires) {
+		return "", false
+	}
+	return tag.etag, true
+}
+
+func (c *TagCache) Set(user, name, etag string) {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+
+	now := time.Now()
+	for key, tag := range c.tags {
+		if now.After(tag.expires) {
+			delete(c.tags, key)
+		}
+	}
+	c.tags[user+"/"+name] = cachedTag{etag: etag, expires: now.Add(c.ttl)}
+}
+
+// Forget drops the instance's ETag, for when it is changed through the API.
+func (c *TagCache) Forget(user, name string) {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+	delete(c.tags, user+"/"+name)
+}
@@ -0,0 +1,65 @@
+package spaces
+
+import (
+	"testing"
+	"time"
+
+	"github.com/stretchr/testify/require"
+)
+
+func TestInstanceETag(t *testing.T) {
+	i := Instance{
+		User:    "the-user",
+		Name:    "the-name",
+		SshPort: 1022,
+		Status:  "running",
+		Ports: []instancePort{
+			{Label: "a", Port: 8080, RemotePort: 8080},
+			{Label: "b", Port: 9090, RemotePort: 9090},
+		},
+	}
+
+	etag := i.ETag()
+	require.Equal(t, etag, i.ETag())
+
+	// port order and stats don't matter
+	reordered := i
+	reordered.Ports = []instancePort{i.Ports[1], i.Ports[0]}
+	reordered.ContainerStats = &ContainerStats{}
+	require.Equal(t, etag, reordered.ETag())
+
+	stopped := i
+	stopped.Status = "stopped"
+	require.NotEqual(t, etag, stopped.ETag())
+
+	fewer := i
+	fewer.Ports = i.Ports[:1]
+	require.NotEqual(t, etag, fewer.ETag())
+
+	require.Equal(t, ListETag([]Instance{i, stopped}), ListETag([]Instance{reordered, stopped}))
+	require.NotEqual(t, ListETag([]Instance{i, stopped}), ListETag([]Instance{i}))
+}
+
+func TestTagCache(t *testing.T) {
+	c := NewTagCache(50 * time.Millisecond)
+
+	_, ok := c.Get("the-user", "the-name")
+	require.False(t, ok)
+
+	c.Set("the-user", "the-name", `"abc"`)
+	etag, ok := c.Get("the-user", "the-name")
+	require.True(t, ok)
+	require.Equal(t, `"abc"`, etag)
+
+	c.Forget("the-user", "the-name")
+	_, ok = c.Get("the-user", "the-name")
+	require.False(t, ok)
+
+	// expired entries are dropped
+	c.Set("the-user", "the-name", `"abc"`)
+	time.Sleep(60 * time.Millisecond)
+	_, ok = c.Get("the-user", "the-name")
+	require.False(t, ok)
+	c.Set("the-user", "other-name", `"def"`)
+	require.Len(t, c.tags, 1)
+}
@@ -0,0 +1,197 @@
+package spaces
+
+import (
+	"context"
+	"crypto/rand"
+	"encoding/hex"
+	"fmt"
+	"os"
+	"sync"
+	"time"
+)
+
+// Stages a create or restart reports as it goes.
+const (
+	StagePending  = "pending"
+	StagePulling  = "pulling"
+	StageCreating = "creating"
+	StageStarting = "starting"
+	StageSshReady = "ssh-ready"
+	StageDone     = "done"
+	StageFailed   = "failed"
+)
+
+// Progress is told each stage a lifecycle call reaches.  A nil Progress
+// ignores them.
+type Progress func(stage string)
+
+func (p Progress) report(stage string) {
+	if p != nil {
+		p(stage)
+	}
+}
+
+// Operation is a create or restart running in the background.
+type Operation struct {
+	ID       string    `json:"id"`
+	Kind     string    `json:"kind"`
+	User     string    `json:"user"`
+	Name     string    `json:"name"`
+	Stage    string    `json:"stage"`
+	Done     bool      `json:"done"`
+	Error    string    `json:"error,omitempty"`
+	Detail   string    `json:"detail,omitempty"`
+	Instance *Instance `json:"instance,omitempty"`
+	// bumped on every change, served as the ETag
+	Version int `json:"version"`
+
+	finished time.Time
+	changed  chan struct{}
+}
+
+// ETag is the quoted Version, the same form as Instance.ETag.
+func (op Operation) ETag() string {
+	return fmt.Sprintf(`"%d"`, op.Version)
+}
+
+// OperationFunc does the work of an operation, reporting its stages.
+type OperationFunc func(progress Progress) (*Instance, string, error)
+
+// Operations runs lifecycle calls in the background and keeps their
+// progress, so the request that started one can return right away and
+// clients can wait on it.  Finished operations are kept for ttl.
+type Operations struct {
+	ttl time.Duration
+
+	mu  sync.Mutex
+	ops map[string]*Operation
+}
+
+func NewOperations(ttl time.Duration) *Operations {
+	return &Operations{
+		ttl: ttl,
+		ops: map[string]*Operation{},
+	}
+}
+
+// Start runs fn in the background.  Only one operation runs per instance
+// at a time; if one is already running, it is returned with os.ErrExist.
+// This only saves starting one that would fail: the manager is what keeps
+// any other call off the instance while fn runs.
+func (o *Operations) Start(kind, user, name string, fn OperationFunc) (Operation, error) {
+	o.mu.Lock()
+	defer o.mu.Unlock()
+
+	o.expire()
+
+	if name != "" {
+		for _, op := range o.ops {
+			if !op.Done && op.User == user && op.Name == name {
+				return *op, os.ErrExist
+			}
+		}
+	}
+
+	op := &Operation{
+		ID:      newOperationID(),
+		Kind:    kind,
+		User:    user,
+		Name:    name,
+		Stage:   StagePending,
+		Version: 1,
+		changed: make(chan struct{}),
+	}
+	o.ops[op.ID] = op
+
+	go func() {
+		instance, detail, err := fn(func(stage string) {
+			o.update(op, func() { op.Stage = stage })
+		})
+
+		o.update(op, func() {
+			op.Done = true
+			op.finished = time.Now()
+			op.Stage = StageDone
+			op.Instance = instance
+			if instance != nil {
+				op.Name = instance.Name
+			}
+			if err != nil {
+				op.Stage = StageFailed
+				op.Error = err.Error()
+				op.Detail = detail
+			}
+		})
+	}()
+
+	return *op, nil
+}
+
+func (o *Operations) update(op *Operation, change func()) {
+	o.mu.Lock()
+	defer o.mu.Unlock()
+
+	before := *op
+	change()
+	if op.Stage == before.Stage && op.Done == before.Done {
+		return
+	}
+
+	op.Version++
+	close(op.changed)
+	op.changed = make(chan struct{})
+}
+
+// Get returns the operation, or os.ErrNotExist.
+func (o *Operations) Get(id string) (Operation, error) {
+	o.mu.Lock()
+	defer o.mu.Unlock()
+
+	op, ok := o.ops[id]
+	if !ok {
+		return Operation{}, os.ErrNotExist
+	}
+	return *op, nil
+}
+
+// Wait returns the operation as soon as its ETag differs from etag or it
+// is done, or the last known state with ctx's error once ctx ends.
+func (o *Operations) Wait(ctx context.Context, id, etag string) (Operation, error) {
+	for {
+		o.mu.Lock()
+		op, ok := o.ops[id]
+		if !ok {
+			o.mu.Unlock()
+			return Operation{}, os.ErrNotExist
+		}
+		current := *op
+		o.mu.Unlock()
+
+		if current.Done || current.ETag() != etag {
+			return current, nil
+		}
+
+		select {
+		case <-current.changed:
+		case <-ctx.Done():
+			return current, ctx.Err()
+		}
+	}
+}
+
+func (o *Operations) expire() {
+	// must be called with the lock held
+	for id, op := range o.ops {
+		if op.Done && time.Since(op.finished) > o.ttl {
+			delete(o.ops, id)
+		}
+	}
+}
+
+func newOperationID() string {
+	b := make([]byte, 8)
+	if _, err := rand.Read(b); err != nil {
+		panic(err)
+	}
+	return hex.EncodeToString(b)
+}
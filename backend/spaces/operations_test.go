@@ -0,0 +1,70 @@
+package spaces
+
+import (
+	"context"
+	"errors"
+	"os"
+	"testing"
+	"time"
+
+	"github.com/stretchr/testify/require"
+)
+
+func TestOperations(t *testing.T) {
+	ops := NewOperations(time.Minute)
+
+	next := make(chan string)
+	op, err := ops.Start("create", "the-user", "the-name", func(progress Progress) (*Instance, string, error) {
+		for stage := range next {
+			progress(stage)
+		}
+		return &Instance{User: "the-user", Name: "the-name", Status: "running"}, "", nil
+	})
+	require.NoError(t, err)
+	require.Equal(t, StagePending, op.Stage)
+	require.Equal(t, `"1"`, op.ETag())
+
+	// one operation per instance at a time
+	_, err = ops.Start("restart", "the-user", "the-name", nil)
+	require.True(t, os.IsExist(err))
+
+	// nothing new yet
+	ctx, cancel := context.WithTimeout(context.Background(), 10*time.Millisecond)
+	defer cancel()
+	current, err := ops.Wait(ctx, op.ID, op.ETag())
+	require.Equal(t, context.DeadlineExceeded, err)
+	require.Equal(t, op.Version, current.Version)
+
+	// each stage wakes the waiter
+	etag := op.ETag()
+	for _, stage := range []string{StageCreating, StageStarting, StageSshReady} {
+		next <- stage
+		current, err = ops.Wait(context.Background(), op.ID, etag)
+		require.NoError(t, err)
+		require.Equal(t, stage, current.Stage)
+		etag = current.ETag()
+	}
+
+	close(next)
+	require.Eventually(t, func() bool {
+		current, _ = ops.Get(op.ID)
+		return current.Done
+	}, time.Second, time.Millisecond)
+	require.Equal(t, StageDone, current.Stage)
+	require.Equal(t, "running", current.Instance.Status)
+
+	// failures keep the error and output
+	op, err = ops.Start("restart", "the-user", "the-name", func(progress Progress) (*Instance, string, error) {
+		return nil, "the-output", errors.New("no luck")
+	})
+	require.NoError(t, err)
+	current, err = ops.Wait(context.Background(), op.ID, op.ETag())
+	require.NoError(t, err)
+	require.True(t, current.Done)
+	require.Equal(t, StageFailed, current.Stage)
+	require.Equal(t, "no luck", current.Error)
+	require.Equal(t, "the-output", current.Detail)
+
+	_, err = ops.Get("unknown")
+	require.True(t, os.IsNotExist(err))
+}
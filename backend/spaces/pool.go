@@ -0,0 +1,336 @@
+package spaces
+
+import (
+	"context"
+	"fmt"
+	"io/ioutil"
+	"log"
+	"os"
+	"path"
+	"sort"
+	"sync"
+	"time"
+
+	"github.com/docker/docker/api/types"
+	"github.com/docker/docker/api/types/filters"
+	"github.com/docker/docker/api/types/volume"
+	"github.com/docker/docker/client"
+)
+
+const (
+	// docker-compose labels everything it makes with its project
+	labelProject = "com.docker.compose.project"
+
+	// pooled stacks are named for this user until they are claimed
+	poolUser = "pool"
+
+	// marks a pooled stack as provisioned and paused
+	poolReadyFile = "ready"
+
+	// how often the pool is topped up when nothing claims from it
+	poolInterval = time.Minute
+)
+
+// pool keeps stacks provisioned ahead of time, per image, so a create can
+// claim one whose dind is already up rather than wait for docker to start
+// it.  Each stack has its own external home volume and network, so it can
+// be handed to any user and name, and its dind sits paused until then.
+// The workspace container is only created on claim, with the user's env,
+// so no pool account ever exists in it.  Claims are refilled in the
+// background.
+type pool struct {
+	dcm   *dockerComposeManager
+	dir   string
+	sizes map[string]int
+
+	mu    sync.Mutex
+	ready map[string][]string
+	wake  chan struct{}
+}
+
+func newPool(dcm *dockerComposeManager, sizes map[string]int) *pool {
+	return &pool{
+		dcm:   dcm,
+		dir:   path.Join(dcm.root, "pool"),
+		sizes: sizes,
+		ready: map[string][]string{},
+		wake:  make(chan struct{}, 1),
+	}
+}
+
+// run picks up the stacks left from the last run, then keeps the pool
+// full until ctx ends.
+func (p *pool) run(ctx context.Context) {
+	p.load(ctx)
+
+	ticker := time.NewTicker(poolInterval)
+	defer ticker.Stop()
+
+	for {
+		p.fill(ctx)
+
+		select {
+		case <-ctx.Done():
+			return
+		case <-p.wake:
+		case <-ticker.C:
+		}
+	}
+}
+
+func (p *pool) load(ctx context.Context) {
+	entries, err := ioutil.ReadDir(p.dir)
+	if err != nil {
+		return
+	}
+
+	for _, entry := range entries {
+		id := entry.Name()
+		dir := path.Join(p.dir, id)
+
+		space, err := p.dcm.loadArgs(dir)
+		if _, statErr := os.Stat(path.Join(dir, poolReadyFile)); err != nil || statErr != nil {
+			// never finished provisioning
+			p.teardown(ctx, id, dir)
+			continue
+		}
+		p.add(space.Image, id)
+	}
+}
+
+func (p *pool) fill(ctx context.Context) {
+	images := make([]string, 0, len(p.sizes))
+	for image := range p.sizes {
+		images = append(images, image)
+	}
+	sort.Strings(images)
+
+	for _, image := range images {
+		for p.count(image) < p.sizes[image] {
+			if ctx.Err() != nil {
+				return
+			}
+
+			id := newOperationID()
+			if err := p.provision(ctx, image, id); err != nil {
+				log.Printf("Can't provision pooled space for %s: %v", image, err)
+				p.teardown(ctx, id, path.Join(p.dir, id))
+				break
+			}
+			p.add(image, id)
+		}
+	}
+}
+
+func (p *pool) count(image string) int {
+	p.mu.Lock()
+	defer p.mu.Unlock()
+	return len(p.ready[image])
+}
+
+func (p *pool) add(image, id string) {
+	p.mu.Lock()
+	defer p.mu.Unlock()
+	p.ready[image] = append(p.ready[image], id)
+}
+
+// take removes a ready stack for image from the pool, returning "" if
+// there are none, and wakes the filler to replace it.
+func (p *pool) take(image string) string {
+	p.mu.Lock()
+	defer p.mu.Unlock()
+
+	ids := p.ready[image]
+	if len(ids) == 0 {
+		return ""
+	}
+	id := ids[0]
+	p.ready[image] = ids[1:]
+
+	select {
+	case p.wake <- struct{}{}:
+	default:
+	}
+	return id
+}
+
+// poolResource names the volume and network of a pooled stack.
+func poolResource(id string) string {
+	return "docker-env-" + id
+}
+
+// provision brings up the dind of a stack for image, then pauses it.
+func (p *pool) provision(ctx context.Context, image, id string) error {
+	cli, err := p.dcm.client()
+	if err != nil {
+		return err
+	}
+
+	dir := path.Join(p.dir, id)
+	if err := os.MkdirAll(dir, os.ModeDir|os.ModePerm); err != nil {
+		return err
+	}
+
+	space := NewSpace{
+		User:      poolUser,
+		Name:      id,
+		Image:     image,
+		Root:      p.dcm.root,
+		UserRoot:  p.dcm.userRoot(),
+		Volume:    poolResource(id),
+		Network:   poolResource(id),
+		HomeMount: "/home",
+		Project:   id,
+		params:    p.dcm.params,
+	}
+
+	labels := map[string]string{labelProject: id}
+	_, err = cli.VolumeCreate(ctx, volume.VolumeCreateBody{Name: space.Volume, Driver: "local", Labels: labels})
+	if err != nil {
+		return fmt.Errorf("can't create volume %q: %v", space.Volume, err)
+	}
+	_, err = cli.NetworkCreate(ctx, space.Network, types.NetworkCreate{CheckDuplicate: true, Driver: "bridge", Labels: labels})
+	if err != nil {
+		return fmt.Errorf("can't create network %q: %v", space.Network, err)
+	}
+
+	// the ports are kept, so they go in the args
+	if err := space.allocatePorts(); err != nil {
+		return err
+	}
+	if err := saveArgs(dir, space); err != nil {
+		return err
+	}
+	if err := createSpaceFiles(dir, space); err != nil {
+		return err
+	}
+
+	if output, err := p.dcm.runCompose(dir, "-p", id, "up", "-d", "docker"); err != nil {
+		return fmt.Errorf("%v\n%s", err, output)
+	}
+	if output, err := p.dcm.runCompose(dir, "-p", id, "pause", "docker"); err != nil {
+		return fmt.Errorf("%v\n%s", err, output)
+	}
+
+	log.Printf("Pooled space %s ready for %s", id, image)
+	return ioutil.WriteFile(path.Join(dir, poolReadyFile), nil, 0644)
+}
+
+// claim hands a pooled stack to space, returning a nil instance if there
+// is none to claim.
+func (p *pool) claim(space NewSpace, progress Progress) (*Instance, error) {
+	if space.Image == "" {
+		space.Image = p.dcm.params.DefaultImage
+	}
+	if space.Name == "" {
+		space.Name = p.dcm.pickName(space.User)
+	}
+	if space.Name == "" {
+		return nil, nil
+	}
+
+	target, exists := p.dcm.getDCDir(space.User, space.Name)
+	if exists {
+		return nil, nil
+	}
+
+	id := p.take(space.Image)
+	if id == "" {
+		return nil, nil
+	}
+
+	dir := path.Join(p.dir, id)
+	if err := p.personalize(dir, target, space, progress); err != nil {
+		p.teardown(context.Background(), id, dir)
+		os.RemoveAll(target)
+		return nil, err
+	}
+
+	log.Printf("Claimed pooled space %s for %s/%s", id, space.User, space.Name)
+	i, err := p.dcm.Get(space.User, space.Name, false)
+	if err != nil {
+		return nil, err
+	}
+
+	if progress != nil {
+		p.dcm.waitForSsh(i, progress)
+	}
+	return &i, nil
+}
+
+// personalize moves the pooled stack in dir to target as space's, wakes
+// its dind and brings up the workspace for space's user.
+func (p *pool) personalize(dir, target string, space NewSpace, progress Progress) error {
+	pooled, err := p.dcm.loadArgs(dir)
+	if err != nil {
+		return err
+	}
+
+	// keep the pooled stack's ports, volume, network and project
+	space.Root = p.dcm.root
+	space.UserRoot = p.dcm.userRoot()
+	space.SshPort = pooled.SshPort
+	space.VsCodePort = pooled.VsCodePort
+	space.ProjectorPort = pooled.ProjectorPort
+	space.Volume = pooled.Volume
+	space.Network = pooled.Network
+	space.HomeMount = pooled.HomeMount
+	space.Project = pooled.Project
+	space.params = p.dcm.params
+
+	os.Remove(path.Join(dir, poolReadyFile))
+	if err := os.MkdirAll(path.Dir(target), os.ModeDir|os.ModePerm); err != nil {
+		return err
+	}
+	if err := os.Rename(dir, target); err != nil {
+		return err
+	}
+	if err := saveArgs(target, space); err != nil {
+		return err
+	}
+	if err := createSpaceFiles(target, space); err != nil {
+		return err
+	}
+
+	if output, err := p.dcm.runCompose(target, "-p", space.Project, "unpause", "docker"); err != nil {
+		return fmt.Errorf("%v\n%s", err, output)
+	}
+
+	// dind is unchanged, so up only creates the workspace
+	if output, err := p.dcm.compose(target, "up", progress); err != nil {
+		return fmt.Errorf("%v\n%s", err, output)
+	}
+	return nil
+}
+
+// teardown removes whatever was made for the pooled stack id.
+func (p *pool) teardown(ctx context.Context, id, dir string) {
+	defer os.RemoveAll(dir)
+
+	cli, err := p.dcm.client()
+	if err != nil {
+		return
+	}
+
+	containers, err := cli.ContainerList(ctx, types.ContainerListOptions{
+		All:     true,
+		Filters: filters.NewArgs(filters.Arg("label", labelProject+"="+id)),
+	})
+	if err != nil {
+		log.Printf("Can't list containers of pooled space %s: %v", id, err)
+	}
+	for _, c := range containers {
+		err := cli.ContainerRemove(ctx, c.ID, types.ContainerRemoveOptions{Force: true})
+		if err != nil && !client.IsErrNotFound(err) {
+			log.Printf("Can't remove container %s of pooled space %s: %v", c.ID, id, err)
+		}
+	}
+
+	name := poolResource(id)
+	if err := cli.NetworkRemove(ctx, name); err != nil && !client.IsErrNotFound(err) {
+		log.Printf("Can't remove network %s: %v", name, err)
+	}
+	if err := cli.VolumeRemove(ctx, name, true); err != nil && !client.IsErrNotFound(err) {
+		log.Printf("Can't remove volume %s: %v", name, err)
+	}
+}
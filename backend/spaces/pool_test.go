@@ -0,0 +1,95 @@
+package spaces
+
+import (
+	"context"
+	"io/ioutil"
+	"os"
+	"path"
+	"strings"
+	"testing"
+	"time"
+
+	"github.com/shawnburke/docker-env/backend/config"
+	"github.com/stretchr/testify/require"
+)
+
+func TestPoolClaim(t *testing.T) {
+	root, err := ioutil.TempDir("", "docker-env-pool")
+	require.NoError(t, err)
+	t.Cleanup(func() { os.RemoveAll(root) })
+
+	cli := &fakeDocker{}
+	dcm := New(config.Config{Dir: root, DefaultImage: "the-image"}).(*dockerComposeManager)
+	dcm.cli = cli
+	dcm.sshReady = func(port int, timeout time.Duration) bool { return true }
+	dcm.execOpenPorts = func(container string) (string, error) { return "", nil }
+
+	composed := []string{}
+	dcm.runCompose = func(dir string, args ...string) (string, error) {
+		composed = append(composed, path.Base(dir)+": "+strings.Join(args, " "))
+		return "", nil
+	}
+
+	dcm.pool = newPool(dcm, map[string]int{"the-image": 1})
+	dcm.pool.fill(context.Background())
+
+	// only dind is started, then paused
+	require.Equal(t, 1, dcm.pool.count("the-image"))
+	id := dcm.pool.ready["the-image"][0]
+	require.Equal(t, []string{
+		id + ": -p " + id + " up -d docker",
+		id + ": -p " + id + " pause docker",
+	}, composed)
+	_, err = os.Stat(path.Join(root, "pool", id, poolReadyFile))
+	require.NoError(t, err)
+
+	composed = nil
+	stages := []string{}
+	instance, _, err := dcm.Create(NewSpace{User: "the-user", Name: "the-space", Password: "the-password"}, func(stage string) {
+		stages = append(stages, stage)
+	})
+	require.NoError(t, err)
+	require.Equal(t, "running", instance.Status)
+	require.Equal(t, []string{StageStarting, StageSshReady}, stages)
+
+	// the workspace is created for the user, in the pooled project
+	require.Equal(t, []string{
+		"the-space: -p " + id + " unpause docker",
+		"the-space: -p " + id + " up -d",
+	}, composed)
+
+	dir, exists := dcm.getDCDir("the-user", "the-space")
+	require.True(t, exists)
+	args, err := dcm.loadArgs(dir)
+	require.NoError(t, err)
+	require.Equal(t, poolResource(id), args.Volume)
+	require.Equal(t, id, args.Project)
+	require.Equal(t, "the-image", args.Image)
+
+	dc, err := ioutil.ReadFile(path.Join(dir, dockerComposeYml))
+	require.NoError(t, err)
+	require.Contains(t, string(dc), `container_name: "dind-pool-`+id+`"`)
+	require.Contains(t, string(dc), `container_name: "space-the-user-the-space"`)
+	require.Contains(t, string(dc), `hostname: "the-user-the-space"`)
+	require.Contains(t, string(dc), `ENV_USER: "the-user"`)
+	require.NotContains(t, string(dc), `ENV_USER: "`+poolUser+`"`)
+
+	_, err = os.Stat(path.Join(root, "pool", id))
+	require.True(t, os.IsNotExist(err))
+
+	// the claim asks for a replacement
+	require.Equal(t, 0, dcm.pool.count("the-image"))
+	require.Len(t, dcm.pool.wake, 1)
+
+	// an empty pool falls back to a regular create
+	composed = nil
+	_, _, err = dcm.Create(NewSpace{User: "the-user", Name: "other-space"}, nil)
+	require.NoError(t, err)
+	require.Equal(t, []string{"other-space: up -d"}, composed)
+
+	// kill takes the pooled network and home volume with it
+	composed = nil
+	require.NoError(t, dcm.Kill("the-user", "the-space"))
+	require.Equal(t, []string{"the-space: -p " + id + " down"}, composed)
+	require.Equal(t, []string{"network " + poolResource(id), "volume " + poolResource(id)}, cli.removed)
+}
@@ -8,6 +8,7 @@ import (
 	"encoding/json"
 	"errors"
 	"fmt"
+	"io"
 	"io/ioutil"
 	"log"
 	"net"
@@ -17,10 +18,13 @@ import (
 	"regexp"
 	"strconv"
 	"strings"
+	"sync"
 	"text/template"
 	"time"
 
 	"github.com/docker/docker/api/types"
+	"github.com/docker/docker/api/types/events"
+	"github.com/docker/docker/api/types/volume"
 	"github.com/docker/docker/client"
 	"github.com/docker/go-connections/nat"
 	"github.com/phayes/freeport"
@@ -39,9 +43,44 @@ type NewSpace struct {
 	Root          string
 	UserRoot      string
 
+	// set for spaces claimed from the warm pool: the home volume and
+	// network were made for the pooled stack, and the volume holds all
+	// of /home rather than just the user's
+	Volume    string `json:",omitempty"`
+	Network   string `json:",omitempty"`
+	HomeMount string `json:",omitempty"`
+	// the compose project the pooled stack was started under, kept so
+	// compose still finds its dind container after the claim
+	Project string `json:",omitempty"`
+
 	params config.Config
 }
 
+// VolumeKey is the home volume's name in docker-compose.yml.
+func (ns NewSpace) VolumeKey() string {
+	if ns.Project != "" {
+		return ns.Project + "-volume"
+	}
+	return ns.User + "-" + ns.Name + "-volume"
+}
+
+// DindName is the dind container's name.  A claimed space keeps the one
+// from the pool, so compose sees the same container rather than a new one.
+func (ns NewSpace) DindName() string {
+	if ns.Project != "" {
+		return "dind-" + poolUser + "-" + ns.Project
+	}
+	return "dind-" + ns.User + "-" + ns.Name
+}
+
+// HomeDir is where the home volume is mounted.
+func (ns NewSpace) HomeDir() string {
+	if ns.HomeMount != "" {
+		return ns.HomeMount
+	}
+	return "/home/" + ns.User
+}
+
 func (ns NewSpace) DockerArgs() string {
 
 	args := []string{
@@ -90,13 +129,20 @@ type instancePort struct {
 	RemotePort int    `json:"remote_port"`
 }
 type Manager interface {
-	Create(space NewSpace) (*Instance, string, error)
-	List(user string) ([]Instance, error)
+	// Create and Restart report their stages to progress, if given, and
+	// then also wait for ssh to come up.
+	Create(space NewSpace, progress Progress) (*Instance, string, error)
+	// List returns the user's instances.  With summary set only the status
+	// and ssh port are filled in, skipping the docker exec for open ports.
+	List(user string, summary bool) ([]Instance, error)
 	Get(user, name string, stats bool) (Instance, error)
+	// GetSummary is Get with only the status and ssh port, which come from
+	// the container state index rather than a docker exec.
+	GetSummary(user, name string) (Instance, error)
 	Start(user, name string) error
 	Stop(user, name string) error
 	Kill(user, name string) error
-	Restart(user, name string) error
+	Restart(user, name string, progress Progress) error
 }
 
 const dockerComposeYml = "docker-compose.yml"
@@ -115,10 +161,23 @@ func New(p config.Config) Manager {
 
 	p = p.Sanitize()
 
+	if p.ListConcurrency <= 0 {
+		p.ListConcurrency = config.DefaultListConcurrency
+	}
+
 	dcm := &dockerComposeManager{
-		root:   p.Dir,
-		uroot:  path.Join(p.Dir, "spaces"),
-		params: p,
+		root:          p.Dir,
+		uroot:         path.Join(p.Dir, "spaces"),
+		params:        p,
+		execOpenPorts: dockerExecOpenPorts,
+		runCompose:    dockerCompose,
+		sshReady:      waitForSshPort,
+		state:         newStateIndex(),
+	}
+
+	if len(p.WarmPool) > 0 {
+		dcm.pool = newPool(dcm, p.WarmPool)
+		go dcm.pool.run(context.Background())
 	}
 
 	if len(p.DnsNameservers) > 0 {
@@ -132,14 +191,55 @@ func New(p config.Config) Manager {
 	return dcm
 }
 
+// dockerClient is the part of the docker API the manager uses, so
+// tests can swap in a fake.
+type dockerClient interface {
+	ContainerInspect(ctx context.Context, containerID string) (types.ContainerJSON, error)
+	ContainerStats(ctx context.Context, containerID string, stream bool) (types.ContainerStats, error)
+	ImageInspectWithRaw(ctx context.Context, imageID string) (types.ImageInspect, []byte, error)
+	ContainerList(ctx context.Context, options types.ContainerListOptions) ([]types.Container, error)
+	Events(ctx context.Context, options types.EventsOptions) (<-chan events.Message, <-chan error)
+
+	// the warm pool's volumes and networks, see pool.go
+	ContainerRemove(ctx context.Context, containerID string, options types.ContainerRemoveOptions) error
+	NetworkCreate(ctx context.Context, name string, options types.NetworkCreate) (types.NetworkCreateResponse, error)
+	NetworkRemove(ctx context.Context, networkID string) error
+	VolumeCreate(ctx context.Context, options volume.VolumeCreateBody) (types.Volume, error)
+	VolumeRemove(ctx context.Context, volumeID string, force bool) error
+}
+
 type dockerComposeManager struct {
 	root   string
 	uroot  string
-	cli    *client.Client
 	params config.Config
+
+	mu  sync.Mutex
+	cli dockerClient
+
+	// instances with a lifecycle call running, by user/name
+	busyMu sync.Mutex
+	busy   map[string]bool
+
+	// container status and ports, kept current from docker events
+	state *stateIndex
+
+	// runs open-ports in a container, returning its output
+	execOpenPorts func(container string) (string, error)
+
+	// runs docker-compose in dir, returning its output
+	runCompose func(dir string, args ...string) (string, error)
+
+	// waits up to timeout for sshd to answer on port
+	sshReady func(port int, timeout time.Duration) bool
+
+	// pre-provisioned stacks, if the config asks for any
+	pool *pool
 }
 
-func (dcm *dockerComposeManager) client() (*client.Client, error) {
+func (dcm *dockerComposeManager) client() (dockerClient, error) {
+	dcm.mu.Lock()
+	defer dcm.mu.Unlock()
+
 	if dcm.cli == nil {
 		cli, err := client.NewClientWithOpts(client.FromEnv)
 
@@ -149,10 +249,43 @@ func (dcm *dockerComposeManager) client() (*client.Client, error) {
 		}
 		cli.NegotiateAPIVersion(context.Background())
 		dcm.cli = cli
+		go dcm.state.run(context.Background(), cli)
 	}
 	return dcm.cli, nil
 }
 
+// ErrBusy is returned when another create, start, stop, restart or kill
+// is already running on the instance.
+var ErrBusy = errors.New("instance is busy")
+
+// lock claims the instance for one lifecycle call, returning the func that
+// releases it, or ErrBusy if another call has it.  Instances without a
+// name yet aren't locked.
+func (dcm *dockerComposeManager) lock(user, name string) (func(), error) {
+	if name == "" {
+		return func() {}, nil
+	}
+
+	key := fmt.Sprintf("%s/%s", user, name)
+
+	dcm.busyMu.Lock()
+	defer dcm.busyMu.Unlock()
+
+	if dcm.busy[key] {
+		return nil, ErrBusy
+	}
+	if dcm.busy == nil {
+		dcm.busy = map[string]bool{}
+	}
+	dcm.busy[key] = true
+
+	return func() {
+		dcm.busyMu.Lock()
+		defer dcm.busyMu.Unlock()
+		delete(dcm.busy, key)
+	}, nil
+}
+
 func (dcm *dockerComposeManager) userRoot() string {
 	if dcm.uroot == "" {
 		panic("no root set")
@@ -173,7 +306,7 @@ func (dcm *dockerComposeManager) pickName(user string) string {
 	return ""
 }
 
-func (dcm *dockerComposeManager) dockerCompose(dir string, args ...string) (string, error) {
+func dockerCompose(dir string, args ...string) (string, error) {
 	output := &bytes.Buffer{}
 
 	cmd := exec.Command("docker-compose", args...)
@@ -186,6 +319,26 @@ func (dcm *dockerComposeManager) dockerCompose(dir string, args ...string) (stri
 	return output.String(), err
 }
 
+// compose runs `docker-compose up -d`, `stop` or `down` for the space in
+// dir.
+func (dcm *dockerComposeManager) compose(dir string, action string, progress Progress) (string, error) {
+
+	// dir is {root}/spaces/{user}/{name}; drop what we knew about the
+	// container so the next Get doesn't race the events for this change
+	defer dcm.state.forget(containerName(path.Base(path.Dir(dir)), path.Base(dir)))
+
+	args := []string{action}
+	if action == "up" {
+		args = append(args, "-d")
+		progress.report(StageStarting)
+	}
+	// a claimed space's stack stays in the pool's project
+	if space, err := dcm.loadArgs(dir); err == nil && space.Project != "" {
+		args = append([]string{"-p", space.Project}, args...)
+	}
+	return dcm.runCompose(dir, args...)
+}
+
 const spaceArgsFile = "args.json"
 
 func (dcm *dockerComposeManager) createArgsFile(dir string, space NewSpace) (NewSpace, error) {
@@ -218,25 +371,29 @@ func (dcm *dockerComposeManager) createArgsFile(dir string, space NewSpace) (New
 	}
 
 	// save the args to the target dir
-	raw, err := json.MarshalIndent(space, "", "  ")
-
-	if err != nil {
-		return space, err
-	}
+	return space, saveArgs(dir, space)
+}
 
-	err = ioutil.WriteFile(path.Join(dir, spaceArgsFile), raw, 0644)
+func saveArgs(dir string, space NewSpace) error {
+	raw, err := json.MarshalIndent(space, "", "  ")
 
 	if err != nil {
-		return space, err
+		return err
 	}
 
-	return space, nil
+	return ioutil.WriteFile(path.Join(dir, spaceArgsFile), raw, 0644)
 }
 
-func (dcm *dockerComposeManager) Create(space NewSpace) (*Instance, string, error) {
+func (dcm *dockerComposeManager) Create(space NewSpace, progress Progress) (*Instance, string, error) {
 
 	key := fmt.Sprintf("%s/%s", space.User, space.Name)
 
+	unlock, err := dcm.lock(space.User, space.Name)
+	if err != nil {
+		return nil, "", err
+	}
+	defer unlock()
+
 	dir, exists := dcm.getDCDir(space.User, space.Name)
 
 	if exists {
@@ -246,8 +403,18 @@ func (dcm *dockerComposeManager) Create(space NewSpace) (*Instance, string, erro
 		}
 	}
 
+	if dcm.pool != nil {
+		instance, err := dcm.pool.claim(space, progress)
+		if err == nil && instance != nil {
+			return instance, "", nil
+		}
+		if err != nil {
+			log.Printf("Can't claim a pooled space for %s, creating one: %v", key, err)
+		}
+	}
+
 	// create the dir
-	err := os.MkdirAll(dir, os.ModeDir|os.ModePerm)
+	err = os.MkdirAll(dir, os.ModeDir|os.ModePerm)
 	if err != nil {
 		return nil, "can't create dir", err
 	}
@@ -264,7 +431,7 @@ func (dcm *dockerComposeManager) Create(space NewSpace) (*Instance, string, erro
 
 	log.Printf("Starting space")
 
-	output, err := dcm.dockerCompose(dir, "up", "-d")
+	output, err := dcm.compose(dir, "up", progress)
 
 	if err != nil {
 		log.Printf("Error: %v\noutput:\n%v\n", err.Error(), output)
@@ -279,26 +446,84 @@ func (dcm *dockerComposeManager) Create(space NewSpace) (*Instance, string, erro
 		return nil, err.Error(), err
 	}
 
+	if progress != nil {
+		dcm.waitForSsh(i, progress)
+	}
+
 	return &i, output, nil
 }
 
-func (dcm *dockerComposeManager) generateDC(user, name string) error {
-	dir, _ := dcm.getDCDir(user, name)
+const sshReadyTimeout = 2 * time.Minute
+
+// waitForSsh waits until sshd answers on the instance's ssh port, then
+// reports StageSshReady.  The published port accepts connections before
+// sshd is up, so this waits for the SSH banner rather than a connect.
+func (dcm *dockerComposeManager) waitForSsh(i Instance, progress Progress) {
+	if i.SshPort == 0 {
+		return
+	}
+
+	if !dcm.sshReady(i.SshPort, sshReadyTimeout) {
+		log.Printf("ssh for %s-%s not ready after %v", i.User, i.Name, sshReadyTimeout)
+		return
+	}
+	progress.report(StageSshReady)
+}
+
+func waitForSshPort(port int, timeout time.Duration) bool {
+	hostport := net.JoinHostPort("localhost", strconv.Itoa(port))
+	deadline := time.Now().Add(timeout)
+
+	for time.Now().Before(deadline) {
+		if sshBanner(hostport) {
+			return true
+		}
+		time.Sleep(250 * time.Millisecond)
+	}
+	return false
+}
+
+func sshBanner(hostport string) bool {
+	conn, err := net.DialTimeout("tcp", hostport, time.Second)
+	if err != nil {
+		return false
+	}
+	defer conn.Close()
+
+	conn.SetReadDeadline(time.Now().Add(time.Second))
+	banner := make([]byte, 4)
+	_, err = io.ReadFull(conn, banner)
+	return err == nil && string(banner) == "SSH-"
+}
+
+// loadArgs reads the args file saved in dir.
+func (dcm *dockerComposeManager) loadArgs(dir string) (NewSpace, error) {
 	argsFile := path.Join(dir, spaceArgsFile)
 
 	raw, err := ioutil.ReadFile(argsFile)
 	if err != nil {
-		return fmt.Errorf("can't find arg file at %q (%v)", argsFile, err)
+		return NewSpace{}, fmt.Errorf("can't find arg file at %q (%v)", argsFile, err)
 	}
 
 	space := NewSpace{}
 
 	err = json.Unmarshal(raw, &space)
 	if err != nil {
-		return fmt.Errorf("can't unmarshal args file: %v", err)
+		return NewSpace{}, fmt.Errorf("can't unmarshal args file: %v", err)
 	}
 
 	space.params = dcm.params
+	return space, nil
+}
+
+func (dcm *dockerComposeManager) generateDC(user, name string) error {
+	dir, _ := dcm.getDCDir(user, name)
+
+	space, err := dcm.loadArgs(dir)
+	if err != nil {
+		return err
+	}
+
 	err = createSpaceFiles(dir, space)
 	if err != nil {
 		return err
@@ -315,7 +540,7 @@ type ContainerStats struct {
 
 func (dcm *dockerComposeManager) stats(user, name string) (*ContainerStats, error) {
 
-	key := fmt.Sprintf("space-%s-%s", user, name)
+	key := containerName(user, name)
 
 	cli, err := dcm.client()
 	if err != nil {
@@ -396,6 +621,14 @@ func (dcm *dockerComposeManager) getDCDir(user, name string) (string, bool) {
 }
 
 func (dcm *dockerComposeManager) Get(user, name string, stats bool) (Instance, error) {
+	return dcm.get(user, name, true, stats)
+}
+
+func (dcm *dockerComposeManager) GetSummary(user, name string) (Instance, error) {
+	return dcm.get(user, name, false, false)
+}
+
+func (dcm *dockerComposeManager) get(user, name string, ports, stats bool) (Instance, error) {
 
 	i := &Instance{
 		User: user,
@@ -406,51 +639,39 @@ func (dcm *dockerComposeManager) Get(user, name string, stats bool) (Instance, e
 		return Instance{}, os.ErrNotExist
 	}
 
-	cli, err := dcm.client()
-	if err != nil {
-		return Instance{}, err
-	}
-	key := fmt.Sprintf("space-%s-%s", i.User, i.Name)
+	key := containerName(i.User, i.Name)
 
-	j, err := cli.ContainerInspect(context.Background(), key)
+	state, err := dcm.containerState(key)
 	if err != nil {
-
-		if client.IsErrNotFound(err) {
-			return Instance{}, os.ErrNotExist
-		}
-
-		fmt.Fprintf(os.Stderr, "Error inspecting %q: %v", key, err)
-
 		return Instance{}, err
 	}
 
-	i.Status = j.State.Status
-	if j.State.Status != "running" {
+	i.Status = state.Status
+	if state.Status != "running" {
 		return *i, nil
 	}
 
-	i.SshPort = getPort(22, j.NetworkSettings.Ports)
+	i.SshPort = getPort(22, state.Ports)
 
-	// check open ports
+	if !ports {
+		return *i, nil
+	}
 
-	output := &bytes.Buffer{}
+	// check open ports
 
-	cmd := exec.Command("docker", "exec", key, "open-ports")
-	cmd.Stdout = output
-	cmd.Stderr = output
-	err = cmd.Run()
+	output, err := dcm.execOpenPorts(key)
 
 	if err != nil {
 
-		if strings.Contains(output.String(), "executable file not found") {
+		if strings.Contains(output, "executable file not found") {
 			log.Println("Error: can't get ports (open-ports not installed)")
 			return *i, nil
 		}
 
-		return Instance{}, fmt.Errorf("error running docker exec: %v", output.String())
+		return Instance{}, fmt.Errorf("error running docker exec: %v", output)
 	}
 
-	i.Ports = dcm.getOpenPorts(output.String())
+	i.Ports = dcm.getOpenPorts(output)
 
 	if stats {
 
@@ -465,7 +686,51 @@ func (dcm *dockerComposeManager) Get(user, name string, stats bool) (Instance, e
 	return *i, nil
 }
 
-func (dcm *dockerComposeManager) List(user string) ([]Instance, error) {
+func containerName(user, name string) string {
+	return fmt.Sprintf("%s%s-%s", spacePrefix, user, name)
+}
+
+// containerState returns the container's status and port bindings from the
+// state index, inspecting the container when the index doesn't have it.
+func (dcm *dockerComposeManager) containerState(key string) (containerState, error) {
+	if state, ok := dcm.state.get(key); ok {
+		return state, nil
+	}
+
+	cli, err := dcm.client()
+	if err != nil {
+		return containerState{}, err
+	}
+
+	mark := dcm.state.mark()
+	j, err := cli.ContainerInspect(context.Background(), key)
+	if err != nil {
+
+		if client.IsErrNotFound(err) {
+			return containerState{}, os.ErrNotExist
+		}
+
+		fmt.Fprintf(os.Stderr, "Error inspecting %q: %v", key, err)
+
+		return containerState{}, err
+	}
+
+	state := stateFromInspect(j)
+	dcm.state.add(key, state, mark)
+	return state, nil
+}
+
+func dockerExecOpenPorts(container string) (string, error) {
+	output := &bytes.Buffer{}
+
+	cmd := exec.Command("docker", "exec", container, "open-ports")
+	cmd.Stdout = output
+	cmd.Stderr = output
+	err := cmd.Run()
+	return output.String(), err
+}
+
+func (dcm *dockerComposeManager) List(user string, summary bool) ([]Instance, error) {
 
 	dir := path.Join(dcm.userRoot(), user)
 	instances := []Instance{}
@@ -480,19 +745,40 @@ func (dcm *dockerComposeManager) List(user string) ([]Instance, error) {
 		return instances, err
 	}
 
+	names := []string{}
 	for _, f := range files {
-		if !f.IsDir() {
-			continue
+		if f.IsDir() {
+			names = append(names, f.Name())
 		}
+	}
+
+	// each get is an inspect plus a docker exec, so run a few at once;
+	// results land in their own slot to keep the ReadDir order
+	results := make([]Instance, len(names))
+	errs := make([]error, len(names))
+	sem := make(chan struct{}, dcm.params.ListConcurrency)
+	wg := sync.WaitGroup{}
+
+	for idx, name := range names {
+		wg.Add(1)
+		sem <- struct{}{}
+		go func(idx int, name string) {
+			defer wg.Done()
+			defer func() { <-sem }()
+			results[idx], errs[idx] = dcm.get(user, name, !summary, false)
+		}(idx, name)
+	}
+	wg.Wait()
 
-		i, err := dcm.Get(user, f.Name(), false)
+	for idx, i := range results {
+		err := errs[idx]
 
 		if os.IsNotExist(err) {
 			continue
 		}
 
 		if err != nil {
-			fmt.Fprintf(os.Stderr, "Error getting instance %s.%s: %v", user, f.Name(), err)
+			fmt.Fprintf(os.Stderr, "Error getting instance %s.%s: %v", user, names[idx], err)
 			continue
 		}
 
@@ -521,12 +807,18 @@ func getPort(port int, pm nat.PortMap) int {
 }
 
 func (dcm *dockerComposeManager) Stop(user string, name string) error {
+	unlock, err := dcm.lock(user, name)
+	if err != nil {
+		return err
+	}
+	defer unlock()
+
 	dir, exists := dcm.getDCDir(user, name)
 	if !exists {
 		return os.ErrNotExist
 	}
 
-	i, err := dcm.Get(user, name, false)
+	i, err := dcm.get(user, name, false, false)
 
 	if err != nil {
 		return err
@@ -541,7 +833,7 @@ func (dcm *dockerComposeManager) Stop(user string, name string) error {
 		return os.ErrInvalid
 	}
 
-	output, err := dcm.dockerCompose(dir, "stop")
+	output, err := dcm.compose(dir, "stop", nil)
 
 	if err != nil {
 		fmt.Println("Failed to up:\n", output)
@@ -552,12 +844,22 @@ func (dcm *dockerComposeManager) Stop(user string, name string) error {
 }
 
 func (dcm *dockerComposeManager) Start(user string, name string) error {
+	unlock, err := dcm.lock(user, name)
+	if err != nil {
+		return err
+	}
+	defer unlock()
+
+	return dcm.start(user, name, nil)
+}
+
+func (dcm *dockerComposeManager) start(user string, name string, progress Progress) error {
 	dir, exists := dcm.getDCDir(user, name)
 	if !exists {
 		return os.ErrNotExist
 	}
 
-	i, err := dcm.Get(user, name, false)
+	i, err := dcm.get(user, name, false, false)
 
 	if err != nil && !os.IsNotExist(err) {
 		return err
@@ -579,7 +881,7 @@ func (dcm *dockerComposeManager) Start(user string, name string) error {
 		return err
 	}
 
-	output, err := dcm.dockerCompose(dir, "up", "-d")
+	output, err := dcm.compose(dir, "up", progress)
 
 	if err != nil {
 		fmt.Println("Failed to up:\n", output)
@@ -590,9 +892,15 @@ func (dcm *dockerComposeManager) Start(user string, name string) error {
 
 }
 
-func (dcm *dockerComposeManager) Restart(user string, name string) error {
+func (dcm *dockerComposeManager) Restart(user string, name string, progress Progress) error {
+
+	unlock, err := dcm.lock(user, name)
+	if err != nil {
+		return err
+	}
+	defer unlock()
 
-	i, err := dcm.Get(user, name, false)
+	i, err := dcm.get(user, name, false, false)
 
 	if err != nil {
 		return err
@@ -604,17 +912,33 @@ func (dcm *dockerComposeManager) Restart(user string, name string) error {
 
 	dir, _ := dcm.getDCDir(user, name)
 
-	output, err := dcm.dockerCompose(dir, "down")
+	output, err := dcm.compose(dir, "down", nil)
 
 	if err != nil {
 		return fmt.Errorf("Failed to stop running instance: %v, output=\n%s\n", err, output)
 	}
 
-	return dcm.Start(user, name)
+	err = dcm.start(user, name, progress)
+	if err != nil || progress == nil {
+		return err
+	}
+
+	i, err = dcm.get(user, name, false, false)
+	if err != nil {
+		return err
+	}
+	dcm.waitForSsh(i, progress)
+	return nil
 }
 
 func (dcm *dockerComposeManager) Kill(user string, name string) error {
-	i, err := dcm.Get(user, name, false)
+	unlock, err := dcm.lock(user, name)
+	if err != nil {
+		return err
+	}
+	defer unlock()
+
+	i, err := dcm.get(user, name, false, false)
 
 	if err != nil {
 		return err
@@ -622,7 +946,7 @@ func (dcm *dockerComposeManager) Kill(user string, name string) error {
 
 	dir, _ := dcm.getDCDir(i.User, i.Name)
 
-	output, err := dcm.dockerCompose(dir, "down")
+	output, err := dcm.compose(dir, "down", nil)
 
 	if err != nil {
 		fmt.Println("Failed to destroy")
@@ -630,33 +954,43 @@ func (dcm *dockerComposeManager) Kill(user string, name string) error {
 		return err
 	}
 
+	// down leaves external networks and volumes alone, and a pooled
+	// space's were only ever its own
+	if space, err := dcm.loadArgs(dir); err == nil {
+		if cli, err := dcm.client(); err == nil {
+			if space.Network != "" {
+				cli.NetworkRemove(context.Background(), space.Network)
+			}
+			if space.Volume != "" {
+				cli.VolumeRemove(context.Background(), space.Volume, true)
+			}
+		}
+	}
+
 	return os.RemoveAll(dir)
 
 }
 
-func createSpaceFiles(dir string, space NewSpace) error {
-
-	if space.SshPort == 0 {
-		port, err := freeport.GetFreePort()
-		if err != nil {
-			return err
+// allocatePorts picks free host ports for any that aren't set.
+func (ns *NewSpace) allocatePorts() error {
+	for _, p := range []*int{&ns.SshPort, &ns.VsCodePort, &ns.ProjectorPort} {
+		if *p != 0 {
+			continue
 		}
-		space.SshPort = port
-	}
-
-	if space.VsCodePort == 0 {
 		port, err := freeport.GetFreePort()
 		if err != nil {
 			return err
 		}
-		space.VsCodePort = port
+		*p = port
 	}
+	return nil
+}
 
-	port, err := freeport.GetFreePort()
-	if err != nil {
+func createSpaceFiles(dir string, space NewSpace) error {
+
+	if err := space.allocatePorts(); err != nil {
 		return err
 	}
-	space.ProjectorPort = port
 
 	b, err := createDockerCompose(space)
 	if err != nil {
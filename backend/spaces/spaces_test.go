@@ -1,15 +1,22 @@
 package spaces
 
 import (
+	"context"
 	"fmt"
+	"io/ioutil"
 	"net"
 	"os"
 	"path"
 	"strconv"
 	"strings"
+	"sync/atomic"
 	"testing"
 	"time"
 
+	"github.com/docker/docker/api/types"
+	"github.com/docker/docker/api/types/events"
+	"github.com/docker/docker/api/types/volume"
+	"github.com/docker/go-connections/nat"
 	"github.com/shawnburke/docker-env/backend/config"
 	"github.com/stretchr/testify/require"
 	"gopkg.in/yaml.v3"
@@ -230,3 +237,158 @@ func TestParseOpenPorts(t *testing.T) {
 	require.Equal(t, 8080, ports[0].RemotePort)
 	require.Equal(t, "msg", ports[0].Message)
 }
+
+// fakeDocker answers inspects for every container with status (running
+// if unset), after a delay.  List and Events serve containers, msgs and errs.
+// Removed networks and volumes are kept in removed.
+type fakeDocker struct {
+	delay    time.Duration
+	inspects int32
+	status   string
+
+	containers []types.Container
+	msgs       chan events.Message
+	errs       chan error
+	removed    []string
+}
+
+func (f *fakeDocker) ContainerInspect(ctx context.Context, containerID string) (types.ContainerJSON, error) {
+	atomic.AddInt32(&f.inspects, 1)
+	time.Sleep(f.delay)
+	status := f.status
+	if status == "" {
+		status = "running"
+	}
+	return types.ContainerJSON{
+		ContainerJSONBase: &types.ContainerJSONBase{
+			State: &types.ContainerState{Status: status},
+		},
+		NetworkSettings: &types.NetworkSettings{
+			NetworkSettingsBase: types.NetworkSettingsBase{
+				Ports: nat.PortMap{"22/tcp": []nat.PortBinding{{HostPort: "1022"}}},
+			},
+		},
+	}, nil
+}
+
+func (f *fakeDocker) ContainerStats(ctx context.Context, containerID string, stream bool) (types.ContainerStats, error) {
+	return types.ContainerStats{}, os.ErrNotExist
+}
+
+func (f *fakeDocker) ImageInspectWithRaw(ctx context.Context, imageID string) (types.ImageInspect, []byte, error) {
+	return types.ImageInspect{}, nil, nil
+}
+
+func (f *fakeDocker) ContainerList(ctx context.Context, options types.ContainerListOptions) ([]types.Container, error) {
+	return f.containers, nil
+}
+
+func (f *fakeDocker) Events(ctx context.Context, options types.EventsOptions) (<-chan events.Message, <-chan error) {
+	return f.msgs, f.errs
+}
+
+func (f *fakeDocker) ContainerRemove(ctx context.Context, containerID string, options types.ContainerRemoveOptions) error {
+	return nil
+}
+
+func (f *fakeDocker) NetworkCreate(ctx context.Context, name string, options types.NetworkCreate) (types.NetworkCreateResponse, error) {
+	return types.NetworkCreateResponse{ID: name}, nil
+}
+
+func (f *fakeDocker) NetworkRemove(ctx context.Context, networkID string) error {
+	f.removed = append(f.removed, "network "+networkID)
+	return nil
+}
+
+func (f *fakeDocker) VolumeCreate(ctx context.Context, options volume.VolumeCreateBody) (types.Volume, error) {
+	return types.Volume{Name: options.Name}, nil
+}
+
+func (f *fakeDocker) VolumeRemove(ctx context.Context, volumeID string, force bool) error {
+	f.removed = append(f.removed, "volume "+volumeID)
+	return nil
+}
+
+// newFakeManager creates a manager over count instances for the-user, with
+// a fake docker client and open-ports taking execDelay.
+func newFakeManager(t testing.TB, count, concurrency int, execDelay time.Duration) (*dockerComposeManager, *int32) {
+	dir, err := ioutil.TempDir("", "docker-env-list")
+	require.NoError(t, err)
+	t.Cleanup(func() { os.RemoveAll(dir) })
+
+	for i := 0; i < count; i++ {
+		instanceDir := path.Join(dir, "spaces", "the-user", fmt.Sprintf("instance-%03d", i))
+		require.NoError(t, os.MkdirAll(instanceDir, os.ModePerm))
+		require.NoError(t, ioutil.WriteFile(path.Join(instanceDir, dockerComposeYml), []byte("version: '3'"), 0644))
+	}
+
+	dcm := New(config.Config{Dir: dir, ListConcurrency: concurrency}).(*dockerComposeManager)
+	dcm.cli = &fakeDocker{delay: time.Millisecond}
+
+	execs := int32(0)
+	dcm.execOpenPorts = func(container string) (string, error) {
+		atomic.AddInt32(&execs, 1)
+		time.Sleep(execDelay)
+		return "8080=web|Web on LOCAL_PORT\n", nil
+	}
+	return dcm, &execs
+}
+
+func TestListOrder(t *testing.T) {
+	dcm, execs := newFakeManager(t, 20, 4, time.Millisecond)
+
+	instances, err := dcm.List("the-user", false)
+	require.NoError(t, err)
+	require.Len(t, instances, 20)
+	for i, instance := range instances {
+		require.Equal(t, fmt.Sprintf("instance-%03d", i), instance.Name)
+		require.Equal(t, 1022, instance.SshPort)
+		require.Len(t, instance.Ports, 1)
+	}
+	require.Equal(t, int32(20), atomic.LoadInt32(execs))
+
+	// summary skips open-ports
+	instances, err = dcm.List("the-user", true)
+	require.NoError(t, err)
+	require.Len(t, instances, 20)
+	require.Equal(t, "running", instances[0].Status)
+	require.Empty(t, instances[0].Ports)
+	require.Equal(t, int32(20), atomic.LoadInt32(execs))
+}
+
+func BenchmarkList(b *testing.B) {
+	for _, concurrency := range []int{1, 8} {
+		b.Run(fmt.Sprintf("concurrency-%d", concurrency), func(b *testing.B) {
+			dcm, _ := newFakeManager(b, 32, concurrency, 5*time.Millisecond)
+			b.ResetTimer()
+			for n := 0; n < b.N; n++ {
+				_, err := dcm.List("the-user", false)
+				require.NoError(b, err)
+			}
+		})
+	}
+}
+
+func TestLock(t *testing.T) {
+	dcm := &dockerComposeManager{}
+
+	unlock, err := dcm.lock("the-user", "the-space")
+	require.NoError(t, err)
+
+	// every lifecycle call stays off an instance that is busy
+	_, err = dcm.lock("the-user", "the-space")
+	require.Equal(t, ErrBusy, err)
+	require.Equal(t, ErrBusy, dcm.Kill("the-user", "the-space"))
+	require.Equal(t, ErrBusy, dcm.Restart("the-user", "the-space", nil))
+	_, _, err = dcm.Create(NewSpace{User: "the-user", Name: "the-space"}, nil)
+	require.Equal(t, ErrBusy, err)
+
+	other, err := dcm.lock("the-user", "other-space")
+	require.NoError(t, err)
+	other()
+
+	unlock()
+	unlock, err = dcm.lock("the-user", "the-space")
+	require.NoError(t, err)
+	unlock()
+}
@@ -0,0 +1,254 @@
+package spaces
+
+import (
+	"context"
+	"log"
+	"strconv"
+	"strings"
+	"sync"
+	"time"
+
+	"github.com/docker/docker/api/types"
+	"github.com/docker/docker/api/types/events"
+	"github.com/docker/docker/api/types/filters"
+	"github.com/docker/go-connections/nat"
+)
+
+const spacePrefix = "space-"
+
+// containerState is what Get needs to know about a space container.
+type containerState struct {
+	Status string
+	Ports  nat.PortMap
+}
+
+// stateIndex keeps the status and port bindings of every space container,
+// keyed by container name (space-{user}-{name}).  It is filled from one
+// container list and then kept current from the docker events stream, so
+// polls don't each cost a ContainerInspect.
+//
+// While the stream is down the index is not live and callers inspect.
+//
+// Every change the stream makes to a key is stamped with the next seq, and
+// so is the listing, so a state inspected before either can't be added
+// over it.
+type stateIndex struct {
+	mu      sync.RWMutex
+	live    bool
+	states  map[string]containerState
+	seq     uint64
+	listed  uint64
+	changed map[string]uint64
+}
+
+func newStateIndex() *stateIndex {
+	return &stateIndex{states: map[string]containerState{}, changed: map[string]uint64{}}
+}
+
+// actions that can change a container's status or port bindings; exec
+// events (one set per open-ports check) are left out on purpose
+var stateActions = map[string]bool{
+	"create":  true,
+	"start":   true,
+	"restart": true,
+	"stop":    true,
+	"die":     true,
+	"kill":    true,
+	"pause":   true,
+	"unpause": true,
+	"rename":  true,
+	"destroy": true,
+}
+
+// get returns the indexed state for the container, if the index is live
+// and has it.
+func (s *stateIndex) get(key string) (containerState, bool) {
+	if s == nil {
+		return containerState{}, false
+	}
+	s.mu.RLock()
+	defer s.mu.RUnlock()
+	if !s.live {
+		return containerState{}, false
+	}
+	state, ok := s.states[key]
+	return state, ok
+}
+
+// mark returns the seq to pass to add for an inspect starting now.
+func (s *stateIndex) mark() uint64 {
+	if s == nil {
+		return 0
+	}
+	s.mu.RLock()
+	defer s.mu.RUnlock()
+	return s.seq
+}
+
+// add records a state found by an inspect that started at mark, unless an
+// event for the container came in since.
+func (s *stateIndex) add(key string, state containerState, mark uint64) {
+	if s == nil {
+		return
+	}
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	if mark < s.listed || s.changed[key] > mark {
+		return
+	}
+	if _, ok := s.states[key]; s.live && !ok {
+		s.states[key] = state
+	}
+}
+
+// forget drops the container, so the next get inspects it again.
+func (s *stateIndex) forget(key string) {
+	if s == nil {
+		return
+	}
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	delete(s.states, key)
+	s.stamp(key)
+}
+
+// stamp records a change to key; s.mu must be held.
+func (s *stateIndex) stamp(key string) {
+	s.seq++
+	s.changed[key] = s.seq
+}
+
+// run keeps the index in sync until ctx ends, subscribing again with a
+// growing delay whenever the events stream fails.
+func (s *stateIndex) run(ctx context.Context, cli dockerClient) {
+	delay := time.Second
+	for ctx.Err() == nil {
+		started := time.Now()
+		err := s.follow(ctx, cli)
+
+		s.mu.Lock()
+		s.live = false
+		s.states = map[string]containerState{}
+		s.changed = map[string]uint64{}
+		s.mu.Unlock()
+
+		if ctx.Err() != nil {
+			return
+		}
+
+		if time.Since(started) > time.Minute {
+			delay = time.Second
+		}
+		log.Printf("Docker events stream failed (%v), inspecting containers until it is back", err)
+
+		select {
+		case <-time.After(delay):
+		case <-ctx.Done():
+			return
+		}
+		if delay < 30*time.Second {
+			delay *= 2
+		}
+	}
+}
+
+func (s *stateIndex) follow(ctx context.Context, cli dockerClient) error {
+	ctx, cancel := context.WithCancel(ctx)
+	defer cancel()
+
+	// subscribe before listing so no change falls in between
+	msgs, errs := cli.Events(ctx, types.EventsOptions{
+		Filters: filters.NewArgs(filters.Arg("type", "container")),
+	})
+
+	containers, err := cli.ContainerList(ctx, types.ContainerListOptions{
+		All:     true,
+		Filters: filters.NewArgs(filters.Arg("name", spacePrefix)),
+	})
+	if err != nil {
+		return err
+	}
+
+	states := map[string]containerState{}
+	for _, c := range containers {
+		for _, name := range c.Names {
+			name = strings.TrimPrefix(name, "/")
+			if strings.HasPrefix(name, spacePrefix) {
+				states[name] = stateFromList(c)
+			}
+		}
+	}
+
+	s.mu.Lock()
+	s.states = states
+	s.seq++
+	s.listed = s.seq
+	s.changed = map[string]uint64{}
+	s.live = true
+	s.mu.Unlock()
+
+	for {
+		select {
+		case m := <-msgs:
+			s.apply(ctx, cli, m)
+		case err := <-errs:
+			return err
+		case <-ctx.Done():
+			return ctx.Err()
+		}
+	}
+}
+
+func (s *stateIndex) apply(ctx context.Context, cli dockerClient, m events.Message) {
+	name := m.Actor.Attributes["name"]
+	if !strings.HasPrefix(name, spacePrefix) || !stateActions[m.Action] {
+		return
+	}
+
+	if m.Action == "rename" {
+		s.forget(strings.TrimPrefix(m.Actor.Attributes["oldName"], "/"))
+	}
+
+	if m.Action == "destroy" {
+		s.forget(name)
+		return
+	}
+
+	// the event only says something changed, look at the container again
+	j, err := cli.ContainerInspect(ctx, m.Actor.ID)
+	if err != nil {
+		s.forget(name)
+		return
+	}
+
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	s.states[name] = stateFromInspect(j)
+	s.stamp(name)
+}
+
+func stateFromInspect(j types.ContainerJSON) containerState {
+	state := containerState{}
+	if j.ContainerJSONBase != nil && j.State != nil {
+		state.Status = j.State.Status
+	}
+	if j.NetworkSettings != nil {
+		state.Ports = j.NetworkSettings.Ports
+	}
+	return state
+}
+
+func stateFromList(c types.Container) containerState {
+	ports := nat.PortMap{}
+	for _, p := range c.Ports {
+		if p.PublicPort == 0 {
+			continue
+		}
+		key := nat.Port(strconv.Itoa(int(p.PrivatePort)) + "/" + p.Type)
+		ports[key] = append(ports[key], nat.PortBinding{
+			HostIP:   p.IP,
+			HostPort: strconv.Itoa(int(p.PublicPort)),
+		})
+	}
+	return containerState{Status: c.State, Ports: ports}
+}
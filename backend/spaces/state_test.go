@@ -0,0 +1,100 @@
+package spaces
+
+import (
+	"context"
+	"sync/atomic"
+	"testing"
+	"time"
+
+	"github.com/docker/docker/api/types"
+	"github.com/docker/docker/api/types/events"
+	"github.com/stretchr/testify/require"
+)
+
+func TestStateIndex(t *testing.T) {
+	dcm, _ := newFakeManager(t, 2, 1, 0)
+
+	fake := &fakeDocker{
+		containers: []types.Container{
+			{
+				ID:    "c0",
+				Names: []string{"/space-the-user-instance-000"},
+				State: "running",
+				Ports: []types.Port{{PrivatePort: 22, PublicPort: 1022, Type: "tcp"}},
+			},
+		},
+		msgs: make(chan events.Message),
+		errs: make(chan error),
+	}
+	dcm.cli = fake
+
+	ctx, cancel := context.WithCancel(context.Background())
+	t.Cleanup(cancel)
+	go dcm.state.run(ctx, fake)
+
+	require.Eventually(t, func() bool {
+		_, ok := dcm.state.get("space-the-user-instance-000")
+		return ok
+	}, time.Second, time.Millisecond)
+
+	// listed containers are answered from the index
+	i, err := dcm.get("the-user", "instance-000", false, false)
+	require.NoError(t, err)
+	require.Equal(t, "running", i.Status)
+	require.Equal(t, 1022, i.SshPort)
+	require.Equal(t, int32(0), atomic.LoadInt32(&fake.inspects))
+
+	// anything else is inspected once, then indexed
+	for n := 0; n < 3; n++ {
+		_, err = dcm.get("the-user", "instance-001", false, false)
+		require.NoError(t, err)
+	}
+	require.Equal(t, int32(1), atomic.LoadInt32(&fake.inspects))
+
+	// events update the index; exec events are ignored
+	fake.status = "exited"
+	fake.msgs <- events.Message{Action: "exec_start: open-ports", Actor: events.Actor{ID: "c0", Attributes: map[string]string{"name": "space-the-user-instance-000"}}}
+	fake.msgs <- events.Message{Action: "die", Actor: events.Actor{ID: "c0", Attributes: map[string]string{"name": "space-the-user-instance-000"}}}
+	require.Eventually(t, func() bool {
+		state, _ := dcm.state.get("space-the-user-instance-000")
+		return state.Status == "exited"
+	}, time.Second, time.Millisecond)
+	require.Equal(t, int32(2), atomic.LoadInt32(&fake.inspects))
+
+	fake.msgs <- events.Message{Action: "destroy", Actor: events.Actor{ID: "c0", Attributes: map[string]string{"name": "space-the-user-instance-000"}}}
+	require.Eventually(t, func() bool {
+		_, ok := dcm.state.get("space-the-user-instance-000")
+		return !ok
+	}, time.Second, time.Millisecond)
+
+	// without the stream everything is inspected
+	fake.errs <- context.DeadlineExceeded
+	require.Eventually(t, func() bool {
+		_, ok := dcm.state.get("space-the-user-instance-001")
+		return !ok
+	}, time.Second, time.Millisecond)
+
+	_, err = dcm.get("the-user", "instance-001", false, false)
+	require.NoError(t, err)
+	require.Equal(t, int32(3), atomic.LoadInt32(&fake.inspects))
+}
+
+func TestStateIndexStaleAdd(t *testing.T) {
+	s := newStateIndex()
+	s.live = true
+
+	// destroyed while it was being inspected
+	mark := s.mark()
+	s.forget("space-the-user-instance-000")
+	s.add("space-the-user-instance-000", containerState{Status: "running"}, mark)
+	_, ok := s.get("space-the-user-instance-000")
+	require.False(t, ok)
+
+	// other containers' events don't hold up an add
+	mark = s.mark()
+	s.forget("space-the-user-instance-001")
+	s.add("space-the-user-instance-000", containerState{Status: "running"}, mark)
+	state, ok := s.get("space-the-user-instance-000")
+	require.True(t, ok)
+	require.Equal(t, "running", state.Status)
+}
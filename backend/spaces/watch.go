@@ -0,0 +1,125 @@
+package spaces
+
+import (
+	"context"
+	"errors"
+	"sync"
+	"time"
+)
+
+// ErrNotReady is returned by Watcher.Wait when ctx ends before the
+// instance has been read even once, so there is no state to report.
+var ErrNotReady = errors.New("instance not read yet")
+
+// Watcher lets clients wait for an instance to change rather than polling
+// it.  Each instance that has clients waiting on it is checked once per
+// interval no matter how many clients are waiting, and is no longer
+// checked once they have all gone.
+//
+// A check reads only the status and ssh port, which cost no docker exec.
+// The open ports are scanned once per portInterval, or straight away when
+// the status or ssh port changes.
+type Watcher struct {
+	manager      Manager
+	interval     time.Duration
+	portInterval time.Duration
+
+	mu      sync.Mutex
+	watches map[string]*watch
+}
+
+type watch struct {
+	waiters  int
+	ready    bool
+	instance Instance
+	etag     string
+	err      error
+	// closed and replaced each time the instance changes
+	changed chan struct{}
+}
+
+func NewWatcher(manager Manager, interval, portInterval time.Duration) *Watcher {
+	return &Watcher{
+		manager:      manager,
+		interval:     interval,
+		portInterval: portInterval,
+		watches:      map[string]*watch{},
+	}
+}
+
+// Wait blocks until the instance's ETag is different from etag (or it can't
+// be read), returning the instance.  If ctx ends first it returns the
+// current instance and ctx's error, or ErrNotReady if it hasn't been read.
+func (w *Watcher) Wait(ctx context.Context, user, name, etag string) (Instance, error) {
+	key := user + "/" + name
+
+	w.mu.Lock()
+	wt, ok := w.watches[key]
+	if !ok {
+		wt = &watch{changed: make(chan struct{})}
+		w.watches[key] = wt
+		go w.poll(key, user, name, wt)
+	}
+	wt.waiters++
+	w.mu.Unlock()
+
+	defer func() {
+		w.mu.Lock()
+		wt.waiters--
+		w.mu.Unlock()
+	}()
+
+	for {
+		w.mu.Lock()
+		ready, instance, current, err, changed := wt.ready, wt.instance, wt.etag, wt.err, wt.changed
+		w.mu.Unlock()
+
+		if ready && (err != nil || current != etag) {
+			return instance, err
+		}
+
+		select {
+		case <-changed:
+		case <-ctx.Done():
+			if !ready {
+				return Instance{}, ErrNotReady
+			}
+			return instance, ctx.Err()
+		}
+	}
+}
+
+func (w *Watcher) poll(key, user, name string, wt *watch) {
+	var last Instance
+	var scanned time.Time
+	for {
+		instance, err := w.manager.GetSummary(user, name)
+		if err == nil && instance.Status == "running" {
+			if instance.Status != last.Status || instance.SshPort != last.SshPort || time.Since(scanned) >= w.portInterval {
+				instance, err = w.manager.Get(user, name, false)
+				scanned = time.Now()
+			} else {
+				instance.Ports = last.Ports
+			}
+		}
+		// after an error the next check scans again
+		last = instance
+		etag := instance.ETag()
+
+		w.mu.Lock()
+		if wt.waiters == 0 && wt.ready {
+			delete(w.watches, key)
+			w.mu.Unlock()
+			return
+		}
+		if !wt.ready || err != nil || wt.err != nil || etag != wt.etag {
+			wt.ready = true
+			wt.instance, wt.etag, wt.err = instance, etag, err
+			close(wt.changed)
+			wt.changed = make(chan struct{})
+		}
+		w.mu.Unlock()
+
+		time.Sleep(w.interval)
+	}
+}
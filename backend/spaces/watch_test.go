@@ -0,0 +1,135 @@
+package spaces
+
+import (
+	"context"
+	"os"
+	"sync"
+	"testing"
+	"time"
+
+	"github.com/stretchr/testify/require"
+)
+
+type fakeManager struct {
+	Manager
+
+	mu        sync.Mutex
+	gets      int
+	summaries int
+	instance  Instance
+	err       error
+	delay     time.Duration
+}
+
+func (f *fakeManager) Get(user, name string, stats bool) (Instance, error) {
+	time.Sleep(f.delay)
+	f.mu.Lock()
+	defer f.mu.Unlock()
+	f.gets++
+	return f.instance, f.err
+}
+
+func (f *fakeManager) GetSummary(user, name string) (Instance, error) {
+	time.Sleep(f.delay)
+	f.mu.Lock()
+	defer f.mu.Unlock()
+	f.summaries++
+	i := f.instance
+	i.Ports = nil
+	return i, f.err
+}
+
+func (f *fakeManager) counts() (int, int) {
+	f.mu.Lock()
+	defer f.mu.Unlock()
+	return f.summaries, f.gets
+}
+
+func (f *fakeManager) set(i Instance) {
+	f.mu.Lock()
+	defer f.mu.Unlock()
+	f.instance = i
+}
+
+func TestWatcherWait(t *testing.T) {
+	i := Instance{User: "the-user", Name: "the-name", Status: "running", SshPort: 1022}
+	m := &fakeManager{instance: i}
+	w := NewWatcher(m, 10*time.Millisecond, 10*time.Millisecond)
+
+	// an unknown etag returns right away
+	got, err := w.Wait(context.Background(), "the-user", "the-name", "")
+	require.NoError(t, err)
+	require.Equal(t, i.ETag(), got.ETag())
+
+	// unchanged waits until the context ends
+	ctx, cancel := context.WithTimeout(context.Background(), 50*time.Millisecond)
+	defer cancel()
+	_, err = w.Wait(ctx, "the-user", "the-name", i.ETag())
+	require.Equal(t, context.DeadlineExceeded, err)
+
+	// a new port wakes the waiter
+	go func() {
+		time.Sleep(30 * time.Millisecond)
+		changed := i
+		changed.Ports = []instancePort{{Label: "web", Port: 8080, RemotePort: 8080}}
+		m.set(changed)
+	}()
+	got, err = w.Wait(context.Background(), "the-user", "the-name", i.ETag())
+	require.NoError(t, err)
+	require.Len(t, got.Ports, 1)
+}
+
+func TestWatcherError(t *testing.T) {
+	m := &fakeManager{err: os.ErrNotExist}
+	w := NewWatcher(m, 10*time.Millisecond, 10*time.Millisecond)
+
+	_, err := w.Wait(context.Background(), "the-user", "the-name", "")
+	require.True(t, os.IsNotExist(err))
+}
+
+func TestWatcherNotReady(t *testing.T) {
+	m := &fakeManager{instance: Instance{User: "the-user", Name: "the-name"}, delay: 100 * time.Millisecond}
+	w := NewWatcher(m, 10*time.Millisecond, 10*time.Millisecond)
+
+	// no state yet, rather than a zero instance's ETag
+	ctx, cancel := context.WithTimeout(context.Background(), 10*time.Millisecond)
+	defer cancel()
+	_, err := w.Wait(ctx, "the-user", "the-name", "")
+	require.Equal(t, ErrNotReady, err)
+}
+
+func TestWatcherPortScans(t *testing.T) {
+	i := Instance{User: "the-user", Name: "the-name", Status: "running", SshPort: 1022}
+	m := &fakeManager{instance: i}
+	w := NewWatcher(m, 5*time.Millisecond, time.Hour)
+
+	got, err := w.Wait(context.Background(), "the-user", "the-name", "")
+	require.NoError(t, err)
+
+	// between port scans only the status is read
+	ctx, cancel := context.WithTimeout(context.Background(), 50*time.Millisecond)
+	defer cancel()
+	_, err = w.Wait(ctx, "the-user", "the-name", got.ETag())
+	require.Equal(t, context.DeadlineExceeded, err)
+	summaries, gets := m.counts()
+	require.Greater(t, summaries, 2)
+	require.Equal(t, 1, gets)
+
+	// a status change scans again straight away
+	stopped := i
+	stopped.Status = "exited"
+	stopped.SshPort = 0
+	m.set(stopped)
+	got, err = w.Wait(context.Background(), "the-user", "the-name", got.ETag())
+	require.NoError(t, err)
+	require.Equal(t, "exited", got.Status)
+
+	changed := i
+	changed.Ports = []instancePort{{Label: "web", Port: 8080, RemotePort: 8080}}
+	m.set(changed)
+	got, err = w.Wait(context.Background(), "the-user", "the-name", got.ETag())
+	require.NoError(t, err)
+	require.Len(t, got.Ports, 1)
+	_, gets = m.counts()
+	require.Equal(t, 2, gets)
+}
@@ -0,0 +1,86 @@
+"""
+The attrs models openapi-python-client generated for Instance before they
+were replaced with slotted ones, kept so benchmarks.models can compare the
+two.  Only what parsing touches is kept.
+"""
+from typing import Any, Dict, List, Type, TypeVar, Union
+
+import attr
+
+from docker_env_client.lib.api_client.types import UNSET, Unset
+
+T = TypeVar("T", bound="Instance")
+P = TypeVar("P", bound="InstancePortsItem")
+
+
+@attr.s(auto_attribs=True)
+class InstancePortsItem:
+    label: Union[Unset, str] = UNSET
+    message: Union[Unset, str] = UNSET
+    port: Union[Unset, int] = UNSET
+    remote_port: Union[Unset, int] = UNSET
+    additional_properties: Dict[str, Any] = attr.ib(init=False, factory=dict)
+
+    @classmethod
+    def from_dict(cls: Type[P], src_dict: Dict[str, Any]) -> P:
+        d = src_dict.copy()
+        label = d.pop("label", UNSET)
+
+        message = d.pop("message", UNSET)
+
+        port = d.pop("port", UNSET)
+
+        remote_port = d.pop("remote_port", UNSET)
+
+        instance_ports_item = cls(
+            label=label,
+            message=message,
+            port=port,
+            remote_port=remote_port,
+        )
+
+        instance_ports_item.additional_properties = d
+        return instance_ports_item
+
+
+@attr.s(auto_attribs=True)
+class Instance:
+    name: Union[Unset, str] = UNSET
+    user: Union[Unset, str] = UNSET
+    status: Union[Unset, str] = UNSET
+    ssh_port: Union[Unset, int] = UNSET
+    host: Union[Unset, str] = UNSET
+    ports: Union[Unset, List[InstancePortsItem]] = UNSET
+    additional_properties: Dict[str, Any] = attr.ib(init=False, factory=dict)
+
+    @classmethod
+    def from_dict(cls: Type[T], src_dict: Dict[str, Any]) -> T:
+        d = src_dict.copy()
+        name = d.pop("name", UNSET)
+
+        user = d.pop("user", UNSET)
+
+        status = d.pop("status", UNSET)
+
+        ssh_port = d.pop("ssh_port", UNSET)
+
+        host = d.pop("host", UNSET)
+
+        ports = []
+        _ports = d.pop("ports", UNSET)
+        for ports_item_data in _ports or []:
+            ports_item = InstancePortsItem.from_dict(ports_item_data)
+
+            ports.append(ports_item)
+
+        instance = cls(
+            name=name,
+            user=user,
+            status=status,
+            ssh_port=ssh_port,
+            host=host,
+            ports=ports,
+        )
+
+        instance.additional_properties = d
+        return instance
@@ -0,0 +1,39 @@
+"""
+Decodes a 1,000-instance list_instances response into models with the
+standard library json and with the codec API uses.
+
+    python -m benchmarks.codec [instances] [ports]
+"""
+import json
+import sys
+import timeit
+
+import httpx
+
+from docker_env_client.lib import codec
+from docker_env_client.lib.api_client import Client
+from docker_env_client.lib.api_client.api.default import get_spaces_user
+
+from .models import payload
+
+
+def main(instances=1000, ports=10):
+    response = httpx.Response(200, content=json.dumps(payload(instances, ports)).encode("utf-8"))
+
+    clients = [
+        ("json", Client(base_url="http://localhost")),
+        (codec.name, Client(base_url="http://localhost", json_loads=codec.loads, json_dumps=codec.dumps)),
+    ]
+
+    print(f'{instances} instances x {ports} ports, {len(response.content) / 1024:.0f} KiB')
+    runs = 20
+    for name, client in clients:
+        seconds = min(timeit.repeat(
+            lambda: get_spaces_user._parse_response(client=client, response=response),
+            number=runs, repeat=5)) / runs
+        decode = min(timeit.repeat(lambda: client.json_loads(response.content), number=runs, repeat=5)) / runs
+        print(f'  {name:8} decode {decode * 1000:7.2f} ms   decode + models {seconds * 1000:7.2f} ms')
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,63 @@
+"""
+Parses a large list_instances payload with the old attrs models and with
+the slotted ones, and reports time and allocations per parse for each.
+
+    python -m benchmarks.models [instances] [ports]
+"""
+import gc
+import sys
+import timeit
+import tracemalloc
+
+from docker_env_client.lib.api_client.models import Instance
+
+from . import baseline_models
+
+
+def payload(instances=500, ports=20):
+    return [
+        {
+            "name": f'instance-{i}',
+            "user": "the-user",
+            "status": "running",
+            "ssh_port": 50000 + i,
+            "host": "the-host",
+            "ports": [
+                {"label": f'port {p}', "message": f'Port {p} on LOCAL_PORT', "port": 8000 + p, "remote_port": 8000 + p}
+                for p in range(ports)
+            ],
+        }
+        for i in range(instances)
+    ]
+
+
+def parse(data, model=Instance):
+    return [model.from_dict(item) for item in data]
+
+
+def measure(data, model):
+    runs = 20
+    seconds = min(timeit.repeat(lambda: parse(data, model), number=runs, repeat=5)) / runs
+
+    gc.collect()
+    tracemalloc.start()
+    parsed = parse(data, model)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+
+    return seconds, retained, peak
+
+
+def main(instances=500, ports=20):
+    data = payload(instances, ports)
+
+    print(f'{instances} instances x {ports} ports')
+    print(f'  {"":8} {"parse":>11} {"retained":>12} {"peak":>12}')
+    for name, model in [("attrs", baseline_models.Instance), ("slotted", Instance)]:
+        seconds, retained, peak = measure(data, model)
+        print(f'  {name:8} {seconds * 1000:8.2f} ms {retained / 1024:8.0f} KiB {peak / 1024:8.0f} KiB')
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
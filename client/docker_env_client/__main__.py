@@ -6,13 +6,21 @@ from docker_env_client import lib
 from docker_env_client.lib.commands import RootCommand
 from docker_env_client.lib.client import DockerEnvClient
 
+config = lib.Config()
+scheduler = lib.Scheduler(config.scheduler_workers)
+supervisor = lib.ProcessSupervisor(config)
+
 container = lib.Container({
     lib.Printer: lib.Printer(),
+    lib.Scheduler: scheduler,
+    lib.PortProber: lib.PortProber(scheduler, config),
+    lib.ProcessSupervisor: supervisor,
     lib.SSH: lib.SSH,
     lib.Tunnel: lib.Tunnel,
     lib.Connection: lib.Connection,
     lib.API: lib.API,
-    lib.Config: lib.Config(),
+    lib.InstanceWatcher: lib.InstanceWatcher,
+    lib.Config: config,
 })
 
 if __name__ == '__main__':
@@ -34,6 +42,9 @@ if __name__ == '__main__':
     #       * periodically polls for other ports, if found, it connect to them eg ssh -p SSH_PORT -NL PORT:localhost:PORT user@localhost
     #       * Announces "Connected my-instance VSCode Browser as port 1234"
 
+    # where pidfds aren't available, SIGCHLD tells us when a tunnel's ssh exits
+    supervisor.install_signal_handler()
+
     root = RootCommand()
 
     state = root.exec(None)
@@ -45,17 +56,23 @@ if __name__ == '__main__':
 
     # Ensure the host exists and/or SSH to the jumpbox to set it up
 
+    def confirm_destroy(names):
+        print(f'This will destroy {len(names)} instance(s): {", ".join(names)}')
+        print('Continue? [y/N] ', end="", flush=True)
+        return sys.stdin.readline().strip().lower() in ("y", "yes")
+
     commands = {
         "ls": lambda res: cli.list(),
         "connect": lambda res: cli.connect(res.get("instance")),
         "create": lambda res: cli.create(res.get("name"), res.get("password"), res.get("pubkey_path"), res.get("image")),
-        "destroy": lambda res: cli.destroy(res.get("instance")),
+        "destroy": lambda res: cli.each(cli.destroy, res.get("instances"), res.get("all"), res.get("status"), res.get("parallel"),
+                                        confirm=None if res.get("yes") else confirm_destroy),
         "disconnect": lambda res: cli.disconnect(res.get("instance")),
         "ssh": lambda res: cli.ssh(res.get("instance")),
         "info": lambda res: cli.get(res.get("instance")),
-        "restart": lambda res: cli.restart(res.get("instance")),
-        "start": lambda res: cli.start_instance(res.get("instance")),
-        "stop": lambda res: cli.stop_instance(res.get("instance")),
+        "restart": lambda res: cli.each(cli.restart, res.get("instances"), res.get("all"), res.get("status"), res.get("parallel")),
+        "start": lambda res: cli.each(cli.start_instance, res.get("instances"), res.get("all"), res.get("status"), res.get("parallel")),
+        "stop": lambda res: cli.each(cli.stop_instance, res.get("instances"), res.get("all"), res.get("status"), res.get("parallel")),
         "quit": lambda res: cli.stop()
     }
 
@@ -85,6 +102,9 @@ if __name__ == '__main__':
                 print(f' Unknown command: {command}')
                 continue
 
-            target(result)
+            try:
+                target(result)
+            except lib.Unavailable as ex:
+                print(f'{ex}, try again in {ex.retry_after:.0f}s')
     except KeyboardInterrupt:
         cli.stop()
@@ -1,7 +1,13 @@
 from .container import Container
+from .scheduler import Scheduler
+from .backoff import Backoff
+from .prober import PortProber
+from .supervisor import ProcessSupervisor
 from .connection import Connection
 from .tunnel import Tunnel, TunnelEvents
 from .ssh import SSH
 from .printer import NullPrinter, Printer
-from .api import API
+from .api import API, AsyncAPI
+from .breaker import CircuitBreaker, OutcomeUnknown, Unavailable
+from .watcher import InstanceWatcher
 from .config import Config
\ No newline at end of file
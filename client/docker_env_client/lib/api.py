@@ -1,50 +1,297 @@
-from typing import Any, List, Union
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Union
+
+import httpx
 
 from .printer import Printer
 from .container import Container
+from .config import Config
+from .cache import ResponseCache, SingleFlight
+from .backoff import Backoff
+from .breaker import CircuitBreaker, OutcomeUnknown, Unavailable
+from . import codec
 
 from .api_client import Client
-from .api_client.api.default import get_spaces_user, get_spaces_user_name, get_health, post_spaces_user, post_spaces_user_name_restart, delete_spaces_user_name, post_spaces_user_name_start, post_spaces_user_name_stop
-from .api_client.models import Instance, GetHealthResponse200, PostSpacesUserJsonBody, PostSpacesUserResponse400
-from .api_client.types import Response
+from .api_client.api.default import get_spaces_user, get_spaces_user_name, get_spaces_user_name_watch, get_operations_id, get_health, post_spaces_user, post_spaces_user_name_restart, delete_spaces_user_name, post_spaces_user_name_start, post_spaces_user_name_stop
+from .api_client.models import Instance, Operation, GetHealthResponse200, PostSpacesUserJsonBody, PostSpacesUserResponse400
+from .api_client.types import UNSET, Response
 
 headers_list = {
     "Accept": "application/json",
     "Content-Type": "application/json"
 }
 
+def _pool_options(config: 'Config') -> Dict[str, Any]:
+    return dict(
+        timeout=httpx.Timeout(config.api_timeout_seconds, connect=config.api_connect_timeout_seconds),
+        limits=httpx.Limits(
+            max_connections=config.api_max_connections,
+            max_keepalive_connections=config.api_max_connections,
+            keepalive_expiry=config.api_keepalive_seconds),
+    )
+
+
+# gateway errors while the backend or the tunnel is coming back, worth retrying
+RETRY_STATUS = (502, 503, 504)
+
+# the request never reached the backend, so even non-idempotent calls can be retried
+NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# most responses kept for revalidation, the least recently used go first
+VALIDATED_MAX = 256
+
+
 class API:
     def __init__(self, container: 'Container', host, port, user):
         self.host = host
         self.port = port
         self.user = user
         self.printer = container.get(Printer)
-        self.api_client = Client(base_url=f'http://{host}:{port}', timeout=60)
+        config = container.get(Config)
+        self.config = config
+
+        # one keep-alive pool for every call, rather than a new connection through the tunnel each time
+        self.http = httpx.Client(**_pool_options(config))
+        self.api_client = Client(
+            base_url=f'http://{host}:{port}',
+            timeout=config.api_timeout_seconds,
+            httpx_client=self.http,
+            json_loads=codec.loads,
+            json_dumps=codec.dumps)
+        self.cache = ResponseCache(config.api_cache_ttl_seconds)
+        self.flights = SingleFlight()
+        # key => last 200 response, revalidated with its ETag once the cache entry expires
+        self.validated = {}
+        self.validated_lock = threading.Lock()
+        self.breaker = CircuitBreaker(
+            config.api_breaker_threshold,
+            Backoff(config.api_breaker_min_seconds, config.api_breaker_max_seconds, jitter=.2))
+
+    def close(self):
+        self.api_client.close()
+
+    def _call(self, request, idempotent=False) -> Response:
+        """
+            Makes a request through the circuit breaker.  Idempotent requests
+            are retried with jittered backoff on connection and gateway
+            errors, others only if they never reached the backend.  Raises
+            Unavailable if the backend can't be reached, or OutcomeUnknown if
+            a non-idempotent request was sent but got no answer.
+        """
+        backoff = Backoff(self.config.api_retry_min_seconds, self.config.api_retry_max_seconds, jitter=.5)
+        attempt = 0
+        while True:
+            self.breaker.before()
+            attempt += 1
+            retries_left = attempt <= self.config.api_retries
+            try:
+                response = request()
+            except httpx.TransportError as ex:
+                self.breaker.failure()
+                if not (idempotent or isinstance(ex, NOT_SENT)):
+                    raise OutcomeUnknown(f'No answer from the API, the request may have gone through, check before trying again: {ex}') from ex
+                if not retries_left:
+                    raise Unavailable(f'API unavailable: {ex}', self.breaker.retry_after()) from ex
+            except BaseException:
+                # says nothing about the backend, but don't hold on to a trial
+                self.breaker.release()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    self.breaker.success()
+                    return response
+                self.breaker.failure()
+                if not retries_left or not idempotent:
+                    return response
+            time.sleep(backoff.next())
+
+    def _cached(self, key, fetch) -> Response:
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+
+        generation = self.cache.generation
+
+        def fetch_and_store():
+            client = self.api_client
+            previous = self._validated(key)
+            etag = previous.headers.get("etag") if previous is not None else None
+            if etag:
+                client = client.with_headers({"If-None-Match": etag})
+
+            response = self._call(lambda: fetch(client), idempotent=True)
+            if response.status_code == 304 and previous is not None:
+                # unchanged, keep the instance we already parsed
+                response = previous
+            else:
+                self._validate(key, response if response.status_code == 200 else None)
+
+            if response.status_code == 200:
+                self.cache.put(key, response, generation)
+            return response
+
+        # callers asking at the same time share one request; never join one started before a mutation
+        return self.flights.do((key, generation), fetch_and_store)
+
+    def _validated(self, key) -> Response:
+        with self.validated_lock:
+            response = self.validated.pop(key, None)
+            if response is not None:
+                # most recently used goes last
+                self.validated[key] = response
+            return response
+
+    def _validate(self, key, response):
+        """
+            Keeps response to revalidate key with, or forgets key if None.
+        """
+        with self.validated_lock:
+            self.validated.pop(key, None)
+            if response is None:
+                return
+            self.validated[key] = response
+            while len(self.validated) > VALIDATED_MAX:
+                del self.validated[next(iter(self.validated))]
+
+    def _invalidate(self, user, name):
+        self.cache.invalidate(("list", user, False), ("list", user, True), ("instance", user, name))
 
     def get_instance(self, user, name) -> Response['Instance']:
-        return get_spaces_user_name.sync_detailed(user=user, name=name, client=self.api_client)
+        return self._cached(
+            ("instance", user, name),
+            lambda client: get_spaces_user_name.sync_detailed(user=user, name=name, client=client))
        
-    def list_instances(self, user) -> Response[List['Instance']]:
-        return get_spaces_user.sync_detailed(user=user, client=self.api_client)
+    def list_instances(self, user, summary=False) -> Response[List['Instance']]:
+        """
+            Lists the user's instances.  With summary, only name, status and
+            ssh port are filled in, which is much cheaper for the backend.
+        """
+        return self._cached(
+            ("list", user, summary),
+            lambda client: get_spaces_user.sync_detailed(user=user, client=client, summary=summary or UNSET))
 
     def get_health(self) -> 'GetHealthResponse200':
-        return get_health.sync(client=self.api_client)
+        return self._call(lambda: get_health.sync_detailed(client=self.api_client), idempotent=True).parsed
 
-    def create_instance(self, user, name, pubkey=None, password=None, image=None) -> Response[Union['Instance',PostSpacesUserResponse400,Any]]:
+    def _lifecycle_client(self, respond_async) -> 'Client':
+        if respond_async:
+            # older backends ignore this and answer when they are done
+            return self.api_client.with_headers({"Prefer": "respond-async"})
+        return self.api_client
+
+    def create_instance(self, user, name, pubkey=None, password=None, image=None, respond_async=False) -> Response[Union['Instance','Operation',PostSpacesUserResponse400,Any]]:
+        """
+            With respond_async, a backend that supports it answers 202 with
+            an Operation to follow through get_operation.
+        """
         args = PostSpacesUserJsonBody(user=user, name=name, pubkey=pubkey,password=password,image=image)
-        return post_spaces_user.sync_detailed(user=user, client=self.api_client, json_body=args)
+        client = self._lifecycle_client(respond_async)
+        response = self._call(lambda: post_spaces_user.sync_detailed(user=user, client=client, json_body=args))
+        self._invalidate(user, name)
+        return response
+
+    def restart_instance(self, user, name, respond_async=False) -> Response[Union['Operation',Any]]:
+        client = self._lifecycle_client(respond_async)
+        response = self._call(lambda: post_spaces_user_name_restart.sync_detailed(user=user,name=name, client=client))
+        self._invalidate(user, name)
+        return response
 
-    def restart_instance(self, user, name) -> Response:
-        return post_spaces_user_name_restart.sync_detailed(user=user,name=name, client=self.api_client)
+    def get_operation(self, id, etag=None, wait=None) -> Response['Operation']:
+        """
+            Long-polls until the operation differs from `etag`.  Answers 304
+            if nothing changed within `wait` seconds.
+        """
+        client = self.api_client
+        if etag:
+            client = client.with_headers({"If-None-Match": etag})
+        response = self._call(lambda: get_operations_id.sync_detailed(id=id, client=client, wait=wait), idempotent=True)
+        if response.status_code == 200 and response.parsed.done and response.parsed.user:
+            self._invalidate(response.parsed.user, response.parsed.name)
+        return response
 
     def delete_instance(self, user, name) -> Response:
-        return delete_spaces_user_name.sync_detailed(user=user,name=name, client=self.api_client)
+        response = self._call(lambda: delete_spaces_user_name.sync_detailed(user=user,name=name, client=self.api_client))
+        self._invalidate(user, name)
+        if response.status_code in (200, 404):
+            # gone, nothing left to revalidate
+            self._validate(("instance", user, name), None)
+        return response
 
     def start_instance(self, user, name) -> Response:
-        return post_spaces_user_name_start.sync_detailed(user=user, name=name, client=self.api_client)
+        response = self._call(lambda: post_spaces_user_name_start.sync_detailed(user=user, name=name, client=self.api_client))
+        self._invalidate(user, name)
+        return response
 
     def stop_instance(self, user, name) -> Response:
-        return post_spaces_user_name_stop.sync_detailed(user=user, name=name, client=self.api_client)
+        response = self._call(lambda: post_spaces_user_name_stop.sync_detailed(user=user, name=name, client=self.api_client))
+        self._invalidate(user, name)
+        return response
+
+
+class AsyncAPI:
+    """
+        AsyncAPI is the asyncio version of API, sharing one AsyncClient
+        connection pool between every call so many requests can be in
+        flight at once.  Use it from a single event loop.
+    """
+    def __init__(self, container: 'Container', host, port, user):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.printer = container.get(Printer)
+        config = container.get(Config)
+
+        self.http = httpx.AsyncClient(**_pool_options(config))
+        self.api_client = Client(
+            base_url=f'http://{host}:{port}',
+            timeout=config.api_timeout_seconds,
+            async_httpx_client=self.http,
+            json_loads=codec.loads,
+            json_dumps=codec.dumps)
+
+    async def close(self):
+        await self.api_client.aclose()
+
+    async def get_instance(self, user, name) -> Response['Instance']:
+        return await get_spaces_user_name.asyncio_detailed(user=user, name=name, client=self.api_client)
+
+    async def get_instances(self, user, names) -> Dict[str, Response['Instance']]:
+        """
+            Fetches several instances at once, returning name => response.
+        """
+        responses = await asyncio.gather(*[self.get_instance(user, name) for name in names])
+        return dict(zip(names, responses))
+
+    async def watch_instance(self, user, name, etag=None, wait=None) -> Response['Instance']:
+        """
+            Long-polls until the instance differs from `etag`.  Answers 304
+            if nothing changed within `wait` seconds.
+        """
+        client = self.api_client
+        if etag:
+            client = client.with_headers({"If-None-Match": etag})
+        return await get_spaces_user_name_watch.asyncio_detailed(user=user, name=name, client=client, wait=wait)
+
+    async def list_instances(self, user, summary=False) -> Response[List['Instance']]:
+        return await get_spaces_user.asyncio_detailed(user=user, client=self.api_client, summary=summary or UNSET)
+
+    async def get_health(self) -> 'GetHealthResponse200':
+        return await get_health.asyncio(client=self.api_client)
+
+    async def create_instance(self, user, name, pubkey=None, password=None, image=None) -> Response[Union['Instance',PostSpacesUserResponse400,Any]]:
+        args = PostSpacesUserJsonBody(user=user, name=name, pubkey=pubkey,password=password,image=image)
+        return await post_spaces_user.asyncio_detailed(user=user, client=self.api_client, json_body=args)
+
+    async def restart_instance(self, user, name) -> Response:
+        return await post_spaces_user_name_restart.asyncio_detailed(user=user,name=name, client=self.api_client)
 
+    async def delete_instance(self, user, name) -> Response:
+        return await delete_spaces_user_name.asyncio_detailed(user=user,name=name, client=self.api_client)
 
+    async def start_instance(self, user, name) -> Response:
+        return await post_spaces_user_name_start.asyncio_detailed(user=user, name=name, client=self.api_client)
 
+    async def stop_instance(self, user, name) -> Response:
+        return await post_spaces_user_name_stop.asyncio_detailed(user=user, name=name, client=self.api_client)
@@ -14,31 +14,29 @@ def _get_kwargs(
     url = "{}/health".format(client.base_url)
 
     headers: Dict[str, str] = client.get_headers()
-    cookies: Dict[str, Any] = client.get_cookies()
 
     return {
         "method": "get",
         "url": url,
         "headers": headers,
-        "cookies": cookies,
         "timeout": client.get_timeout(),
     }
 
 
-def _parse_response(*, response: httpx.Response) -> Optional[GetHealthResponse200]:
+def _parse_response(*, client: Client, response: httpx.Response) -> Optional[GetHealthResponse200]:
     if response.status_code == 200:
-        response_200 = GetHealthResponse200.from_dict(response.json())
+        response_200 = GetHealthResponse200.from_dict(client.json_loads(response.content))
 
         return response_200
     return None
 
 
-def _build_response(*, response: httpx.Response) -> Response[GetHealthResponse200]:
+def _build_response(*, client: Client, response: httpx.Response) -> Response[GetHealthResponse200]:
     return Response(
         status_code=response.status_code,
         content=response.content,
         headers=response.headers,
-        parsed=_parse_response(response=response),
+        parsed=_parse_response(client=client, response=response),
     )
 
 
@@ -56,12 +54,11 @@ def sync_detailed(
         client=client,
     )
 
-    response = httpx.request(
-        verify=client.verify_ssl,
+    response = client.get_httpx_client().request(
         **kwargs,
     )
 
-    return _build_response(response=response)
+    return _build_response(client=client, response=response)
 
 
 def sync(
@@ -93,10 +90,9 @@ async def asyncio_detailed(
         client=client,
     )
 
-    async with httpx.AsyncClient(verify=client.verify_ssl) as _client:
-        response = await _client.request(**kwargs)
+    response = await client.get_async_httpx_client().request(**kwargs)
 
-    return _build_response(response=response)
+    return _build_response(client=client, response=response)
 
 
 async def asyncio(
@@ -0,0 +1,156 @@
+from typing import Any, Dict, Optional, Union
+
+import httpx
+
+from ...client import Client
+from ...models.operation import Operation
+from ...types import UNSET, Response, Unset
+
+
+def _get_kwargs(
+    id: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Dict[str, Any]:
+    url = "{}/operations/{id}".format(client.base_url, id=id)
+
+    headers: Dict[str, str] = client.get_headers()
+
+    params: Dict[str, Any] = {}
+    params["wait"] = wait
+
+    params = {k: v for k, v in params.items() if v is not UNSET and v is not None}
+
+    return {
+        "method": "get",
+        "url": url,
+        "headers": headers,
+        "timeout": client.get_timeout(),
+        "params": params,
+    }
+
+
+def _parse_response(*, client: Client, response: httpx.Response) -> Optional[Operation]:
+    if response.status_code == 200:
+        response_200 = Operation.from_dict(client.json_loads(response.content))
+
+        return response_200
+    return None
+
+
+def _build_response(*, client: Client, response: httpx.Response) -> Response[Operation]:
+    return Response(
+        status_code=response.status_code,
+        content=response.content,
+        headers=response.headers,
+        parsed=_parse_response(client=client, response=response),
+    )
+
+
+def sync_detailed(
+    id: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Response[Operation]:
+    """Progress of an asynchronous create or restart.  With If-None-Match set to the last ETag seen, waits
+    up to `wait` seconds for the next stage and returns 304 if there was none.
+
+    Args:
+        id (str):
+        wait (Union[Unset, None, int]):
+
+    Returns:
+        Response[Operation]
+    """
+
+    kwargs = _get_kwargs(
+        id=id,
+        client=client,
+        wait=wait,
+    )
+
+    response = client.get_httpx_client().request(
+        **kwargs,
+    )
+
+    return _build_response(client=client, response=response)
+
+
+def sync(
+    id: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Optional[Operation]:
+    """Progress of an asynchronous create or restart.  With If-None-Match set to the last ETag seen, waits
+    up to `wait` seconds for the next stage and returns 304 if there was none.
+
+    Args:
+        id (str):
+        wait (Union[Unset, None, int]):
+
+    Returns:
+        Response[Operation]
+    """
+
+    return sync_detailed(
+        id=id,
+        client=client,
+        wait=wait,
+    ).parsed
+
+
+async def asyncio_detailed(
+    id: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Response[Operation]:
+    """Progress of an asynchronous create or restart.  With If-None-Match set to the last ETag seen, waits
+    up to `wait` seconds for the next stage and returns 304 if there was none.
+
+    Args:
+        id (str):
+        wait (Union[Unset, None, int]):
+
+    Returns:
+        Response[Operation]
+    """
+
+    kwargs = _get_kwargs(
+        id=id,
+        client=client,
+        wait=wait,
+    )
+
+    response = await client.get_async_httpx_client().request(**kwargs)
+
+    return _build_response(client=client, response=response)
+
+
+async def asyncio(
+    id: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Optional[Operation]:
+    """Progress of an asynchronous create or restart.  With If-None-Match set to the last ETag seen, waits
+    up to `wait` seconds for the next stage and returns 304 if there was none.
+
+    Args:
+        id (str):
+        wait (Union[Unset, None, int]):
+
+    Returns:
+        Response[Operation]
+    """
+
+    return (
+        await asyncio_detailed(
+            id=id,
+            client=client,
+            wait=wait,
+        )
+    ).parsed
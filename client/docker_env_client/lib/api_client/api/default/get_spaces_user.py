@@ -1,50 +1,51 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 import httpx
 
 from ...client import Client
 from ...models.instance import Instance
-from ...types import Response
+from ...types import UNSET, Response, Unset
 
 
 def _get_kwargs(
     user: str,
     *,
     client: Client,
+    summary: Union[Unset, None, bool] = UNSET,
 ) -> Dict[str, Any]:
     url = "{}/spaces/{user}".format(client.base_url, user=user)
 
     headers: Dict[str, str] = client.get_headers()
-    cookies: Dict[str, Any] = client.get_cookies()
+
+    params: Dict[str, Any] = {}
+    params["summary"] = summary
+
+    params = {k: v for k, v in params.items() if v is not UNSET and v is not None}
 
     return {
         "method": "get",
         "url": url,
         "headers": headers,
-        "cookies": cookies,
         "timeout": client.get_timeout(),
+        "params": params,
     }
 
 
-def _parse_response(*, response: httpx.Response) -> Optional[List[Instance]]:
+def _parse_response(*, client: Client, response: httpx.Response) -> Optional[List[Instance]]:
     if response.status_code == 200:
-        response_200 = []
-        _response_200 = response.json()
-        for response_200_item_data in _response_200:
-            response_200_item = Instance.from_dict(response_200_item_data)
-
-            response_200.append(response_200_item)
+        from_dict = Instance.from_dict
+        response_200 = [from_dict(response_200_item_data) for response_200_item_data in client.json_loads(response.content)]
 
         return response_200
     return None
 
 
-def _build_response(*, response: httpx.Response) -> Response[List[Instance]]:
+def _build_response(*, client: Client, response: httpx.Response) -> Response[List[Instance]]:
     return Response(
         status_code=response.status_code,
         content=response.content,
         headers=response.headers,
-        parsed=_parse_response(response=response),
+        parsed=_parse_response(client=client, response=response),
     )
 
 
@@ -52,11 +53,13 @@ def sync_detailed(
     user: str,
     *,
     client: Client,
+    summary: Union[Unset, None, bool] = UNSET,
 ) -> Response[List[Instance]]:
     """Get list of instances for user
 
     Args:
         user (str):
+        summary (Union[Unset, None, bool]):
 
     Returns:
         Response[List[Instance]]
@@ -65,25 +68,27 @@ def sync_detailed(
     kwargs = _get_kwargs(
         user=user,
         client=client,
+        summary=summary,
     )
 
-    response = httpx.request(
-        verify=client.verify_ssl,
+    response = client.get_httpx_client().request(
         **kwargs,
     )
 
-    return _build_response(response=response)
+    return _build_response(client=client, response=response)
 
 
 def sync(
     user: str,
     *,
     client: Client,
+    summary: Union[Unset, None, bool] = UNSET,
 ) -> Optional[List[Instance]]:
     """Get list of instances for user
 
     Args:
         user (str):
+        summary (Union[Unset, None, bool]):
 
     Returns:
         Response[List[Instance]]
@@ -92,6 +97,7 @@ def sync(
     return sync_detailed(
         user=user,
         client=client,
+        summary=summary,
     ).parsed
 
 
@@ -99,11 +105,13 @@ async def asyncio_detailed(
     user: str,
     *,
     client: Client,
+    summary: Union[Unset, None, bool] = UNSET,
 ) -> Response[List[Instance]]:
     """Get list of instances for user
 
     Args:
         user (str):
+        summary (Union[Unset, None, bool]):
 
     Returns:
         Response[List[Instance]]
@@ -112,23 +120,25 @@ async def asyncio_detailed(
     kwargs = _get_kwargs(
         user=user,
         client=client,
+        summary=summary,
     )
 
-    async with httpx.AsyncClient(verify=client.verify_ssl) as _client:
-        response = await _client.request(**kwargs)
+    response = await client.get_async_httpx_client().request(**kwargs)
 
-    return _build_response(response=response)
+    return _build_response(client=client, response=response)
 
 
 async def asyncio(
     user: str,
     *,
     client: Client,
+    summary: Union[Unset, None, bool] = UNSET,
 ) -> Optional[List[Instance]]:
     """Get list of instances for user
 
     Args:
         user (str):
+        summary (Union[Unset, None, bool]):
 
     Returns:
         Response[List[Instance]]
@@ -138,5 +148,6 @@ async def asyncio(
         await asyncio_detailed(
             user=user,
             client=client,
+            summary=summary,
         )
     ).parsed
@@ -0,0 +1,169 @@
+from typing import Any, Dict, Optional, Union
+
+import httpx
+
+from ...client import Client
+from ...models.instance import Instance
+from ...types import UNSET, Response, Unset
+
+
+def _get_kwargs(
+    user: str,
+    name: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Dict[str, Any]:
+    url = "{}/spaces/{user}/{name}/watch".format(client.base_url, user=user, name=name)
+
+    headers: Dict[str, str] = client.get_headers()
+
+    params: Dict[str, Any] = {}
+    params["wait"] = wait
+
+    params = {k: v for k, v in params.items() if v is not UNSET and v is not None}
+
+    return {
+        "method": "get",
+        "url": url,
+        "headers": headers,
+        "timeout": client.get_timeout(),
+        "params": params,
+    }
+
+
+def _parse_response(*, client: Client, response: httpx.Response) -> Optional[Instance]:
+    if response.status_code == 200:
+        response_200 = Instance.from_dict(client.json_loads(response.content))
+
+        return response_200
+    return None
+
+
+def _build_response(*, client: Client, response: httpx.Response) -> Response[Instance]:
+    return Response(
+        status_code=response.status_code,
+        content=response.content,
+        headers=response.headers,
+        parsed=_parse_response(client=client, response=response),
+    )
+
+
+def sync_detailed(
+    user: str,
+    name: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Response[Instance]:
+    """Wait for the instance to change. Returns as soon as its ETag differs from the one sent in If-None-
+    Match, or 304 if nothing changed within `wait` seconds.
+
+    Args:
+        user (str):
+        name (str):
+        wait (Union[Unset, None, int]):
+
+    Returns:
+        Response[Instance]
+    """
+
+    kwargs = _get_kwargs(
+        user=user,
+        name=name,
+        client=client,
+        wait=wait,
+    )
+
+    response = client.get_httpx_client().request(
+        **kwargs,
+    )
+
+    return _build_response(client=client, response=response)
+
+
+def sync(
+    user: str,
+    name: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Optional[Instance]:
+    """Wait for the instance to change. Returns as soon as its ETag differs from the one sent in If-None-
+    Match, or 304 if nothing changed within `wait` seconds.
+
+    Args:
+        user (str):
+        name (str):
+        wait (Union[Unset, None, int]):
+
+    Returns:
+        Response[Instance]
+    """
+
+    return sync_detailed(
+        user=user,
+        name=name,
+        client=client,
+        wait=wait,
+    ).parsed
+
+
+async def asyncio_detailed(
+    user: str,
+    name: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Response[Instance]:
+    """Wait for the instance to change. Returns as soon as its ETag differs from the one sent in If-None-
+    Match, or 304 if nothing changed within `wait` seconds.
+
+    Args:
+        user (str):
+        name (str):
+        wait (Union[Unset, None, int]):
+
+    Returns:
+        Response[Instance]
+    """
+
+    kwargs = _get_kwargs(
+        user=user,
+        name=name,
+        client=client,
+        wait=wait,
+    )
+
+    response = await client.get_async_httpx_client().request(**kwargs)
+
+    return _build_response(client=client, response=response)
+
+
+async def asyncio(
+    user: str,
+    name: str,
+    *,
+    client: Client,
+    wait: Union[Unset, None, int] = UNSET,
+) -> Optional[Instance]:
+    """Wait for the instance to change. Returns as soon as its ETag differs from the one sent in If-None-
+    Match, or 304 if nothing changed within `wait` seconds.
+
+    Args:
+        user (str):
+        name (str):
+        wait (Union[Unset, None, int]):
+
+    Returns:
+        Response[Instance]
+    """
+
+    return (
+        await asyncio_detailed(
+            user=user,
+            name=name,
+            client=client,
+            wait=wait,
+        )
+    ).parsed
@@ -4,6 +4,7 @@ import httpx
 
 from ...client import Client
 from ...models.instance import Instance
+from ...models.operation import Operation
 from ...models.post_spaces_user_json_body import PostSpacesUserJsonBody
 from ...models.post_spaces_user_response_400 import PostSpacesUserResponse400
 from ...types import Response
@@ -18,7 +19,7 @@ def _get_kwargs(
     url = "{}/spaces/{user}".format(client.base_url, user=user)
 
     headers: Dict[str, str] = client.get_headers()
-    cookies: Dict[str, Any] = client.get_cookies()
+    headers["Content-Type"] = "application/json"
 
     json_json_body = json_body.to_dict()
 
@@ -26,19 +27,22 @@ def _get_kwargs(
         "method": "post",
         "url": url,
         "headers": headers,
-        "cookies": cookies,
         "timeout": client.get_timeout(),
-        "json": json_json_body,
+        "content": client.json_dumps(json_json_body),
     }
 
 
-def _parse_response(*, response: httpx.Response) -> Optional[Union[Any, Instance, PostSpacesUserResponse400]]:
+def _parse_response(*, client: Client, response: httpx.Response) -> Optional[Union[Any, Instance, Operation, PostSpacesUserResponse400]]:
     if response.status_code == 201:
-        response_201 = Instance.from_dict(response.json())
+        response_201 = Instance.from_dict(client.json_loads(response.content))
 
         return response_201
+    if response.status_code == 202:
+        response_202 = Operation.from_dict(client.json_loads(response.content))
+
+        return response_202
     if response.status_code == 400:
-        response_400 = PostSpacesUserResponse400.from_dict(response.json())
+        response_400 = PostSpacesUserResponse400.from_dict(client.json_loads(response.content))
 
         return response_400
     if response.status_code == 409:
@@ -47,12 +51,12 @@ def _parse_response(*, response: httpx.Response) -> Optional[Union[Any, Instance
     return None
 
 
-def _build_response(*, response: httpx.Response) -> Response[Union[Any, Instance, PostSpacesUserResponse400]]:
+def _build_response(*, client: Client, response: httpx.Response) -> Response[Union[Any, Instance, Operation, PostSpacesUserResponse400]]:
     return Response(
         status_code=response.status_code,
         content=response.content,
         headers=response.headers,
-        parsed=_parse_response(response=response),
+        parsed=_parse_response(client=client, response=response),
     )
 
 
@@ -61,15 +65,16 @@ def sync_detailed(
     *,
     client: Client,
     json_body: PostSpacesUserJsonBody,
-) -> Response[Union[Any, Instance, PostSpacesUserResponse400]]:
-    """Create a new instance
+) -> Response[Union[Any, Instance, Operation, PostSpacesUserResponse400]]:
+    """Create a new instance.  Send `Prefer: respond-async` to get a 202 with an operation to follow
+    rather than waiting for the instance.
 
     Args:
         user (str):
         json_body (PostSpacesUserJsonBody):
 
     Returns:
-        Response[Union[Any, Instance, PostSpacesUserResponse400]]
+        Response[Union[Any, Instance, Operation, PostSpacesUserResponse400]]
     """
 
     kwargs = _get_kwargs(
@@ -78,12 +83,11 @@ def sync_detailed(
         json_body=json_body,
     )
 
-    response = httpx.request(
-        verify=client.verify_ssl,
+    response = client.get_httpx_client().request(
         **kwargs,
     )
 
-    return _build_response(response=response)
+    return _build_response(client=client, response=response)
 
 
 def sync(
@@ -91,15 +95,16 @@ def sync(
     *,
     client: Client,
     json_body: PostSpacesUserJsonBody,
-) -> Optional[Union[Any, Instance, PostSpacesUserResponse400]]:
-    """Create a new instance
+) -> Optional[Union[Any, Instance, Operation, PostSpacesUserResponse400]]:
+    """Create a new instance.  Send `Prefer: respond-async` to get a 202 with an operation to follow
+    rather than waiting for the instance.
 
     Args:
         user (str):
         json_body (PostSpacesUserJsonBody):
 
     Returns:
-        Response[Union[Any, Instance, PostSpacesUserResponse400]]
+        Response[Union[Any, Instance, Operation, PostSpacesUserResponse400]]
     """
 
     return sync_detailed(
@@ -114,15 +119,16 @@ async def asyncio_detailed(
     *,
     client: Client,
     json_body: PostSpacesUserJsonBody,
-) -> Response[Union[Any, Instance, PostSpacesUserResponse400]]:
-    """Create a new instance
+) -> Response[Union[Any, Instance, Operation, PostSpacesUserResponse400]]:
+    """Create a new instance.  Send `Prefer: respond-async` to get a 202 with an operation to follow
+    rather than waiting for the instance.
 
     Args:
         user (str):
         json_body (PostSpacesUserJsonBody):
 
     Returns:
-        Response[Union[Any, Instance, PostSpacesUserResponse400]]
+        Response[Union[Any, Instance, Operation, PostSpacesUserResponse400]]
     """
 
     kwargs = _get_kwargs(
@@ -131,10 +137,9 @@ async def asyncio_detailed(
         json_body=json_body,
     )
 
-    async with httpx.AsyncClient(verify=client.verify_ssl) as _client:
-        response = await _client.request(**kwargs)
+    response = await client.get_async_httpx_client().request(**kwargs)
 
-    return _build_response(response=response)
+    return _build_response(client=client, response=response)
 
 
 async def asyncio(
@@ -142,15 +147,16 @@ async def asyncio(
     *,
     client: Client,
     json_body: PostSpacesUserJsonBody,
-) -> Optional[Union[Any, Instance, PostSpacesUserResponse400]]:
-    """Create a new instance
+) -> Optional[Union[Any, Instance, Operation, PostSpacesUserResponse400]]:
+    """Create a new instance.  Send `Prefer: respond-async` to get a 202 with an operation to follow
+    rather than waiting for the instance.
 
     Args:
         user (str):
         json_body (PostSpacesUserJsonBody):
 
     Returns:
-        Response[Union[Any, Instance, PostSpacesUserResponse400]]
+        Response[Union[Any, Instance, Operation, PostSpacesUserResponse400]]
     """
 
     return (
@@ -1,8 +1,9 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Union
 
 import httpx
 
 from ...client import Client
+from ...models.operation import Operation
 from ...types import Response
 
 
@@ -15,23 +16,29 @@ def _get_kwargs(
     url = "{}/spaces/{user}/{name}/restart".format(client.base_url, user=user, name=name)
 
     headers: Dict[str, str] = client.get_headers()
-    cookies: Dict[str, Any] = client.get_cookies()
 
     return {
         "method": "post",
         "url": url,
         "headers": headers,
-        "cookies": cookies,
         "timeout": client.get_timeout(),
     }
 
 
-def _build_response(*, response: httpx.Response) -> Response[Any]:
+def _parse_response(*, client: Client, response: httpx.Response) -> Optional[Union[Any, Operation]]:
+    if response.status_code == 202:
+        response_202 = Operation.from_dict(client.json_loads(response.content))
+
+        return response_202
+    return None
+
+
+def _build_response(*, client: Client, response: httpx.Response) -> Response[Union[Any, Operation]]:
     return Response(
         status_code=response.status_code,
         content=response.content,
         headers=response.headers,
-        parsed=None,
+        parsed=_parse_response(client=client, response=response),
     )
 
 
@@ -40,14 +47,16 @@ def sync_detailed(
     name: str,
     *,
     client: Client,
-) -> Response[Any]:
-    """
+) -> Response[Union[Any, Operation]]:
+    """Restart an instance.  Send `Prefer: respond-async` to get a 202 with an operation to follow
+    rather than waiting for the restart.
+
     Args:
         user (str):
         name (str):
 
     Returns:
-        Response[Any]
+        Response[Union[Any, Operation]]
     """
 
     kwargs = _get_kwargs(
@@ -56,12 +65,11 @@ def sync_detailed(
         client=client,
     )
 
-    response = httpx.request(
-        verify=client.verify_ssl,
+    response = client.get_httpx_client().request(
         **kwargs,
     )
 
-    return _build_response(response=response)
+    return _build_response(client=client, response=response)
 
 
 async def asyncio_detailed(
@@ -69,14 +77,16 @@ async def asyncio_detailed(
     name: str,
     *,
     client: Client,
-) -> Response[Any]:
-    """
+) -> Response[Union[Any, Operation]]:
+    """Restart an instance.  Send `Prefer: respond-async` to get a 202 with an operation to follow
+    rather than waiting for the restart.
+
     Args:
         user (str):
         name (str):
 
     Returns:
-        Response[Any]
+        Response[Union[Any, Operation]]
     """
 
     kwargs = _get_kwargs(
@@ -85,7 +95,6 @@ async def asyncio_detailed(
         client=client,
     )
 
-    async with httpx.AsyncClient(verify=client.verify_ssl) as _client:
-        response = await _client.request(**kwargs)
+    response = await client.get_async_httpx_client().request(**kwargs)
 
-    return _build_response(response=response)
+    return _build_response(client=client, response=response)
@@ -1,7 +1,9 @@
+import json
 import ssl
-from typing import Dict, Union
+from typing import Any, Callable, Dict, Optional, Union
 
 import attr
+import httpx
 
 
 @attr.s(auto_attribs=True)
@@ -13,6 +15,10 @@ class Client:
     headers: Dict[str, str] = attr.ib(factory=dict, kw_only=True)
     timeout: float = attr.ib(5.0, kw_only=True)
     verify_ssl: Union[str, bool, ssl.SSLContext] = attr.ib(True, kw_only=True)
+    httpx_client: Optional[httpx.Client] = attr.ib(None, kw_only=True)
+    async_httpx_client: Optional[httpx.AsyncClient] = attr.ib(None, kw_only=True)
+    json_loads: Callable[[Union[bytes, str]], Any] = attr.ib(json.loads, kw_only=True)
+    json_dumps: Callable[[Any], Union[bytes, str]] = attr.ib(json.dumps, kw_only=True)
 
     def get_headers(self) -> Dict[str, str]:
         """Get headers to be used in all endpoints"""
@@ -36,6 +42,34 @@ class Client:
         """Get a new client matching this one with a new timeout (in seconds)"""
         return attr.evolve(self, timeout=timeout)
 
+    def get_httpx_client(self) -> httpx.Client:
+        """Get the httpx.Client shared by every request, creating it on first use.
+
+        Clients derived with the with_* methods share the same connection pool.
+        """
+        if self.httpx_client is None:
+            self.httpx_client = httpx.Client(verify=self.verify_ssl, cookies=self.cookies)
+        return self.httpx_client
+
+    def get_async_httpx_client(self) -> httpx.AsyncClient:
+        """Get the httpx.AsyncClient shared by every async request, creating it on first use.
+
+        The pool belongs to the event loop it is first used on.
+        """
+        if self.async_httpx_client is None:
+            self.async_httpx_client = httpx.AsyncClient(verify=self.verify_ssl, cookies=self.cookies)
+        return self.async_httpx_client
+
+    def close(self) -> None:
+        """Close the shared connection pool"""
+        if self.httpx_client is not None:
+            self.httpx_client.close()
+
+    async def aclose(self) -> None:
+        """Close the shared async connection pool"""
+        if self.async_httpx_client is not None:
+            await self.async_httpx_client.aclose()
+
 
 @attr.s(auto_attribs=True)
 class AuthenticatedClient(Client):
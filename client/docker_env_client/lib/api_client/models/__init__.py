@@ -3,5 +3,6 @@
 from .get_health_response_200 import GetHealthResponse200
 from .instance import Instance
 from .instance_ports_item import InstancePortsItem
+from .operation import Operation
 from .post_spaces_user_json_body import PostSpacesUserJsonBody
 from .post_spaces_user_response_400 import PostSpacesUserResponse400
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Type, TypeVar, Union
+from typing import Any, Dict, List, Optional, Type, TypeVar, Union
 
 import attr
 
@@ -7,8 +7,10 @@ from ..types import UNSET, Unset
 
 T = TypeVar("T", bound="Instance")
 
+_FIELDS = frozenset(("name", "user", "status", "ssh_port", "host", "ports"))
 
-@attr.s(auto_attribs=True)
+
+@attr.s(auto_attribs=True, slots=True)
 class Instance:
     """
     Attributes:
@@ -26,7 +28,18 @@ class Instance:
     ssh_port: Union[Unset, int] = UNSET
     host: Union[Unset, str] = UNSET
     ports: Union[Unset, List[InstancePortsItem]] = UNSET
-    additional_properties: Dict[str, Any] = attr.ib(init=False, factory=dict)
+    # only allocated when the payload has unknown keys
+    _additional_properties: Optional[Dict[str, Any]] = attr.ib(init=False, default=None, repr=False)
+
+    @property
+    def additional_properties(self) -> Dict[str, Any]:
+        if self._additional_properties is None:
+            self._additional_properties = {}
+        return self._additional_properties
+
+    @additional_properties.setter
+    def additional_properties(self, value: Dict[str, Any]) -> None:
+        self._additional_properties = value
 
     def to_dict(self) -> Dict[str, Any]:
         name = self.name
@@ -43,8 +56,8 @@ class Instance:
                 ports.append(ports_item)
 
         field_dict: Dict[str, Any] = {}
-        field_dict.update(self.additional_properties)
-        field_dict.update({})
+        if self._additional_properties:
+            field_dict.update(self._additional_properties)
         if name is not UNSET:
             field_dict["name"] = name
         if user is not UNSET:
@@ -62,39 +75,25 @@ class Instance:
 
     @classmethod
     def from_dict(cls: Type[T], src_dict: Dict[str, Any]) -> T:
-        d = src_dict.copy()
-        name = d.pop("name", UNSET)
-
-        user = d.pop("user", UNSET)
-
-        status = d.pop("status", UNSET)
-
-        ssh_port = d.pop("ssh_port", UNSET)
-
-        host = d.pop("host", UNSET)
-
-        ports = []
-        _ports = d.pop("ports", UNSET)
-        for ports_item_data in _ports or []:
-            ports_item = InstancePortsItem.from_dict(ports_item_data)
-
-            ports.append(ports_item)
-
+        # positional, in field order, is noticeably cheaper than keywords
+        get = src_dict.get
+        from_item = InstancePortsItem.from_dict
         instance = cls(
-            name=name,
-            user=user,
-            status=status,
-            ssh_port=ssh_port,
-            host=host,
-            ports=ports,
+            get("name", UNSET),
+            get("user", UNSET),
+            get("status", UNSET),
+            get("ssh_port", UNSET),
+            get("host", UNSET),
+            [from_item(ports_item_data) for ports_item_data in get("ports") or ()],
         )
 
-        instance.additional_properties = d
+        if not _FIELDS.issuperset(src_dict):
+            instance._additional_properties = {k: v for k, v in src_dict.items() if k not in _FIELDS}
         return instance
 
     @property
     def additional_keys(self) -> List[str]:
-        return list(self.additional_properties.keys())
+        return list(self._additional_properties or ())
 
     def __getitem__(self, key: str) -> Any:
         return self.additional_properties[key]
@@ -106,4 +105,4 @@ class Instance:
         del self.additional_properties[key]
 
     def __contains__(self, key: str) -> bool:
-        return key in self.additional_properties
+        return key in (self._additional_properties or ())
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Type, TypeVar, Union
+from typing import Any, Dict, List, Optional, Type, TypeVar, Union
 
 import attr
 
@@ -6,8 +6,10 @@ from ..types import UNSET, Unset
 
 T = TypeVar("T", bound="InstancePortsItem")
 
+_FIELDS = frozenset(("label", "message", "port", "remote_port"))
 
-@attr.s(auto_attribs=True)
+
+@attr.s(auto_attribs=True, slots=True)
 class InstancePortsItem:
     """
     Attributes:
@@ -21,7 +23,18 @@ class InstancePortsItem:
     message: Union[Unset, str] = UNSET
     port: Union[Unset, int] = UNSET
     remote_port: Union[Unset, int] = UNSET
-    additional_properties: Dict[str, Any] = attr.ib(init=False, factory=dict)
+    # only allocated when the payload has unknown keys
+    _additional_properties: Optional[Dict[str, Any]] = attr.ib(init=False, default=None, repr=False)
+
+    @property
+    def additional_properties(self) -> Dict[str, Any]:
+        if self._additional_properties is None:
+            self._additional_properties = {}
+        return self._additional_properties
+
+    @additional_properties.setter
+    def additional_properties(self, value: Dict[str, Any]) -> None:
+        self._additional_properties = value
 
     def to_dict(self) -> Dict[str, Any]:
         label = self.label
@@ -30,8 +43,8 @@ class InstancePortsItem:
         remote_port = self.remote_port
 
         field_dict: Dict[str, Any] = {}
-        field_dict.update(self.additional_properties)
-        field_dict.update({})
+        if self._additional_properties:
+            field_dict.update(self._additional_properties)
         if label is not UNSET:
             field_dict["label"] = label
         if message is not UNSET:
@@ -45,28 +58,22 @@ class InstancePortsItem:
 
     @classmethod
     def from_dict(cls: Type[T], src_dict: Dict[str, Any]) -> T:
-        d = src_dict.copy()
-        label = d.pop("label", UNSET)
-
-        message = d.pop("message", UNSET)
-
-        port = d.pop("port", UNSET)
-
-        remote_port = d.pop("remote_port", UNSET)
-
+        # positional, in field order, is noticeably cheaper than keywords
+        get = src_dict.get
         instance_ports_item = cls(
-            label=label,
-            message=message,
-            port=port,
-            remote_port=remote_port,
+            get("label", UNSET),
+            get("message", UNSET),
+            get("port", UNSET),
+            get("remote_port", UNSET),
         )
 
-        instance_ports_item.additional_properties = d
+        if not _FIELDS.issuperset(src_dict):
+            instance_ports_item._additional_properties = {k: v for k, v in src_dict.items() if k not in _FIELDS}
         return instance_ports_item
 
     @property
     def additional_keys(self) -> List[str]:
-        return list(self.additional_properties.keys())
+        return list(self._additional_properties or ())
 
     def __getitem__(self, key: str) -> Any:
         return self.additional_properties[key]
@@ -78,4 +85,4 @@ class InstancePortsItem:
         del self.additional_properties[key]
 
     def __contains__(self, key: str) -> bool:
-        return key in self.additional_properties
+        return key in (self._additional_properties or ())
@@ -0,0 +1,143 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Type, TypeVar, Union
+
+import attr
+
+from ..types import UNSET, Unset
+
+if TYPE_CHECKING:
+    from ..models.instance import Instance
+
+
+T = TypeVar("T", bound="Operation")
+
+
+@attr.s(auto_attribs=True)
+class Operation:
+    """
+    Attributes:
+        id (Union[Unset, str]):
+        kind (Union[Unset, str]): create or restart
+        user (Union[Unset, str]):
+        name (Union[Unset, str]):
+        stage (Union[Unset, str]): pending, pulling, creating, starting, ssh-ready, then done or failed
+        done (Union[Unset, bool]):
+        error (Union[Unset, str]):
+        detail (Union[Unset, str]):
+        instance (Union[Unset, Instance]):
+        version (Union[Unset, int]):
+    """
+
+    id: Union[Unset, str] = UNSET
+    kind: Union[Unset, str] = UNSET
+    user: Union[Unset, str] = UNSET
+    name: Union[Unset, str] = UNSET
+    stage: Union[Unset, str] = UNSET
+    done: Union[Unset, bool] = UNSET
+    error: Union[Unset, str] = UNSET
+    detail: Union[Unset, str] = UNSET
+    instance: Union[Unset, "Instance"] = UNSET
+    version: Union[Unset, int] = UNSET
+    additional_properties: Dict[str, Any] = attr.ib(init=False, factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        id = self.id
+        kind = self.kind
+        user = self.user
+        name = self.name
+        stage = self.stage
+        done = self.done
+        error = self.error
+        detail = self.detail
+        instance: Union[Unset, Dict[str, Any]] = UNSET
+        if not isinstance(self.instance, Unset):
+            instance = self.instance.to_dict()
+
+        version = self.version
+
+        field_dict: Dict[str, Any] = {}
+        field_dict.update(self.additional_properties)
+        field_dict.update({})
+        if id is not UNSET:
+            field_dict["id"] = id
+        if kind is not UNSET:
+            field_dict["kind"] = kind
+        if user is not UNSET:
+            field_dict["user"] = user
+        if name is not UNSET:
+            field_dict["name"] = name
+        if stage is not UNSET:
+            field_dict["stage"] = stage
+        if done is not UNSET:
+            field_dict["done"] = done
+        if error is not UNSET:
+            field_dict["error"] = error
+        if detail is not UNSET:
+            field_dict["detail"] = detail
+        if instance is not UNSET:
+            field_dict["instance"] = instance
+        if version is not UNSET:
+            field_dict["version"] = version
+
+        return field_dict
+
+    @classmethod
+    def from_dict(cls: Type[T], src_dict: Dict[str, Any]) -> T:
+        from ..models.instance import Instance
+
+        d = src_dict.copy()
+        id = d.pop("id", UNSET)
+
+        kind = d.pop("kind", UNSET)
+
+        user = d.pop("user", UNSET)
+
+        name = d.pop("name", UNSET)
+
+        stage = d.pop("stage", UNSET)
+
+        done = d.pop("done", UNSET)
+
+        error = d.pop("error", UNSET)
+
+        detail = d.pop("detail", UNSET)
+
+        _instance = d.pop("instance", UNSET)
+        instance: Union[Unset, Instance]
+        if isinstance(_instance, Unset) or _instance is None:
+            instance = UNSET
+        else:
+            instance = Instance.from_dict(_instance)
+
+        version = d.pop("version", UNSET)
+
+        operation = cls(
+            id=id,
+            kind=kind,
+            user=user,
+            name=name,
+            stage=stage,
+            done=done,
+            error=error,
+            detail=detail,
+            instance=instance,
+            version=version,
+        )
+
+        operation.additional_properties = d
+        return operation
+
+    @property
+    def additional_keys(self) -> List[str]:
+        return list(self.additional_properties.keys())
+
+    def __getitem__(self, key: str) -> Any:
+        return self.additional_properties[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.additional_properties[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.additional_properties[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.additional_properties
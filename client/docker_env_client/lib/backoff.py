@@ -0,0 +1,29 @@
+import random
+
+
+class Backoff:
+    """
+        Backoff hands out exponentially growing delays, from `minimum` up to
+        `maximum` seconds.  Each delay is spread by +/- `jitter` (a fraction)
+        so that many callers started together drift apart.
+
+        `reset` goes back to the minimum, e.g. when something changed and
+        we want to look again quickly.
+    """
+    def __init__(self, minimum, maximum, factor=2.0, jitter=0.0):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.factor = factor
+        self.jitter = jitter
+        self.current = minimum
+        self._random = random.Random()
+
+    def reset(self):
+        self.current = self.minimum
+
+    def next(self) -> float:
+        delay = self.current
+        self.current = min(self.current * self.factor, self.maximum)
+        if self.jitter:
+            delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        return delay
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from .backoff import Backoff
+
+
+class Unavailable(Exception):
+    """
+        The backend can't be reached, either after retrying or because the
+        circuit breaker is open.  `retry_after` is how many seconds until
+        it is worth trying again.
+    """
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OutcomeUnknown(Exception):
+    """
+        A call that changes something was sent but no answer came back, so
+        it may or may not have happened.  Check before trying it again.
+    """
+
+
+class CircuitBreaker:
+    """
+        CircuitBreaker stops calls to a backend that keeps failing.
+
+        After `threshold` failures in a row it opens, and calls fail fast
+        with Unavailable.  Once the backoff delay has passed one call is let
+        through as a trial: success closes the breaker, failure opens it
+        again for a longer delay.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, threshold, backoff: 'Backoff'):
+        self.threshold = threshold
+        self.backoff = backoff
+        self.failures = 0
+        self.state = CircuitBreaker.CLOSED
+        self.opened_until = 0.0
+        self.lock = threading.Lock()
+
+    def before(self):
+        """
+            Call before each request, raises Unavailable if the request
+            should not be made.
+        """
+        with self.lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return
+
+            now = time.monotonic()
+            if self.state == CircuitBreaker.OPEN and now >= self.opened_until:
+                # let this one through as the trial
+                self.state = CircuitBreaker.HALF_OPEN
+                return
+
+            raise Unavailable("API unavailable", max(self.opened_until - now, 0.0))
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.state = CircuitBreaker.CLOSED
+            self.backoff.reset()
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == CircuitBreaker.HALF_OPEN or self.failures >= self.threshold:
+                self.state = CircuitBreaker.OPEN
+                self.opened_until = time.monotonic() + self.backoff.next()
+
+    def release(self):
+        """
+            Call when a request ended without telling us whether the backend
+            is up, e.g. its response couldn't be parsed.  A trial it held is
+            given up, so the next call can be one.
+        """
+        with self.lock:
+            if self.state == CircuitBreaker.HALF_OPEN:
+                self.state = CircuitBreaker.OPEN
+                self.opened_until = time.monotonic()
+
+    def retry_after(self) -> float:
+        with self.lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return 0.0
+            return max(self.opened_until - time.monotonic(), 0.0)
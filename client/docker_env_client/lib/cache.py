@@ -0,0 +1,93 @@
+import threading
+import time
+from typing import Any, Optional
+
+
+class ResponseCache:
+    """
+        ResponseCache holds API responses for `ttl` seconds, so calls made
+        back to back (e.g. the ssh command, connect, then the first poll)
+        share one backend request.
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.entries = {}  # key => (expires, value)
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, key) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            return value
+
+    def put(self, key, value, generation=None):
+        """
+            Stores value, unless something was invalidated since `generation`
+            was read, since the value may have been fetched before the change.
+        """
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, *keys):
+        with self.lock:
+            self.generation += 1
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries = {}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+        SingleFlight collapses concurrent calls for the same key into one:
+        while a call is in flight, later callers wait for it and share its
+        result (or exception) instead of making their own.
+    """
+    def __init__(self):
+        self.flights = {}  # key => _Flight
+        self.lock = threading.Lock()
+
+    def do(self, key, function) -> Any:
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self.flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = function()
+        except BaseException as ex:
+            flight.error = ex
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result
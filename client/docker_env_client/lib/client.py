@@ -1,7 +1,10 @@
 
+import fnmatch
 import sys
-import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from os import path
+from typing import Callable, Dict, List, Optional
 
 from .config import Config
 from .tunnel import Tunnel
@@ -10,6 +13,10 @@ from .printer import Printer
 from .container import Container
 from .ssh import SSH
 from .api import API
+from .api_client.models import Operation
+from .watcher import InstanceWatcher
+from .util import is_port_open
+from .scheduler import Scheduler
 
 
 class DockerEnvClient(Printer):
@@ -28,12 +35,18 @@ class DockerEnvClient(Printer):
         self.hostport = f'{host}:{port}'
         self.user = user
         self.connections = {} # name => connection
+        # bulk actions connect and disconnect from several threads at once
+        self.connections_lock = threading.RLock()
         self._in_ssh = False
         self.api_tunnel = None
         self.api : 'API'
         self.api = container.create(API, self.container, self.host, self.port, self.user)
+        self.watcher: 'InstanceWatcher'
+        self.watcher = container.create(InstanceWatcher, self.container, self.host, self.port, self.user)
         self.config: Config
         self.config = container.get(Config)
+        self.scheduler: Scheduler
+        self.scheduler = container.get(Scheduler)
         
 
     def print(self, msg: str, end='\n'):
@@ -50,10 +63,15 @@ class DockerEnvClient(Printer):
         return self.api_tunnel.start()
 
     def stop(self, code=0):
-        for c in self.connections.values():
+        with self.connections_lock:
+            connections = list(self.connections.values())
+        for c in connections:
             c.stop()
+        self.watcher.stop()
+        self.api.close()
         if self.api_tunnel:
             self.api_tunnel.stop()
+        self.scheduler.stop()
         sys.exit(code)
 
     def create(self, name, password=None, pubkey_path=None, image=None):
@@ -75,9 +93,18 @@ class DockerEnvClient(Printer):
                 self.print(f'Error: No pubkey found ({pubkey_path}), must supply password via "--password"')
                 sys.exit(1)
     
-        response = self.api.create_instance(user=self.user, name=name, pubkey=pubkey,image=image,password=password)
+        response = self.api.create_instance(user=self.user, name=name, pubkey=pubkey,image=image,password=password, respond_async=True)
 
-        if response.status_code == 201:
+        if response.status_code == 202:
+            operation = self._follow(response, f'Creating {name}')
+            if operation is None or operation.error:
+                return None
+            instance = operation.instance
+            self.print(f'Created {instance.name}')
+            self.print(f'\tSSH Port: {instance.ssh_port}')
+            self.print(f'Run `connect {instance.name}` to start tunnels')
+            return instance
+        elif response.status_code == 201:
             instance = response.parsed
             self.print(f'Created {instance.name}')
             self.print(f'\tSSH Port: {instance.ssh_port}')
@@ -94,35 +121,42 @@ class DockerEnvClient(Printer):
         response = self.api.delete_instance(self.user, name)
 
         if response.status_code == 200:   
-            self.disconnect(name, quiet=True)
-            self.print("Successfully deleted instance")
+            # its local ports won't be needed again
+            self.disconnect(name, quiet=True, release_ports=True)
+            self.print(f'Successfully deleted instance {name}')
+            return True
         elif response.status_code == 404:
             self.print(f'Unknown instance "{name}"')
         else:
-            self.print(f'Unexpected response {response.status_code}')
+            self.print(f'Unexpected response {response.status_code} for {name}')
+        return False
 
     def stop_instance(self, name):
         response = self.api.stop_instance(self.user, name)
         if response.status_code == 200:   
             self.disconnect(name, quiet=True)
-            self.print("Successfully stopped instance")
+            self.print(f'Successfully stopped instance {name}')
+            return True
         elif response.status_code == 400:
             self.print(f'Instance "{name}" must be in "running" state')
         elif response.status_code == 404:
             self.print(f'Unknown instance "{name}"')
         else:
-            self.print(f'Unexpected response {response.status_code}')
+            self.print(f'Unexpected response {response.status_code} for {name}')
+        return False
 
     def start_instance(self, name):
         response = self.api.start_instance(self.user, name)
         if response.status_code == 200:
-            self.print("Successfully started instance")
+            self.print(f'Successfully started instance {name}')
+            return True
         elif response.status_code == 400:
             self.print(f'Instance "{name}" must be in "stopped" or "exited" state')
         elif response.status_code == 404:
             self.print(f'Unknown instance "{name}"')
         else:
-            self.print(f'Unexpected response {response.status_code}')
+            self.print(f'Unexpected response {response.status_code} for {name}')
+        return False
 
     def _get_instance(self, name):
         response = self.api.get_instance(self.user, name)
@@ -151,9 +185,8 @@ class DockerEnvClient(Printer):
         self.print(f'\tSSH Port: {instance.ssh_port}')
         ports = instance.ports
 
-        c = None
-        if name in self.connections:
-            c = self.connections[name]
+        with self.connections_lock:
+            c = self.connections.get(name)
                 
         if ports is not None:
             for p in ports:
@@ -183,7 +216,8 @@ class DockerEnvClient(Printer):
 
     def list(self):
 
-        response = self.api.list_instances(user=self.user)
+        # only name and status are shown, skip the port scan
+        response = self.api.list_instances(user=self.user, summary=True)
         status_code = response.status_code
         if status_code == 200:
             instances = response.parsed
@@ -195,11 +229,13 @@ class DockerEnvClient(Printer):
             self.print(format_str.format("Name", "Status", "SSH Command"))
             self.print(format_str.format("----", "------", "-----------"))
             show_connected = False
+            with self.connections_lock:
+                connected = set(self.connections)
             for instance in instances:
                 ssh="not connected"
                 status = instance.status
                 name = instance.name
-                if name in self.connections:
+                if name in connected:
                     status = f'{status} (*)'
                     show_connected = True
                     ssh = f'ssh {instance.name}'
@@ -212,16 +248,11 @@ class DockerEnvClient(Printer):
         self.print(f'Unexpected status {response.status_code}')
 
     def _is_used(self, port):
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(.1)                                 
-            result = sock.connect_ex(('localhost',port))
-            return result == 0
-        finally:
-            sock.close()
+        return is_port_open(port, timeout=.1)
 
     def is_connected(self, name):
-        return name in self.connections
+        with self.connections_lock:
+            return name in self.connections
 
     def connect(self, name):
         """
@@ -236,11 +267,11 @@ class DockerEnvClient(Printer):
     
         host = info.host or self.host
         
-        connection = self.connections.get(name)
-        
-        if connection is None:
-            connection = self.container.create(Connection, self.container, host, self.user, name, lambda: self.api.get_instance(self.user, name))
-            self.connections[name] = connection
+        with self.connections_lock:
+            connection = self.connections.get(name)
+            if connection is None:
+                connection = self.container.create(Connection, self.container, host, self.user, name, lambda: self.api.get_instance(self.user, name), watcher=self.watcher)
+                self.connections[name] = connection
 
         if not connection.start():
             self.print(f'Instance {name} is not ready for connections (status=TK)')
@@ -250,12 +281,13 @@ class DockerEnvClient(Printer):
         self.print(f'** Access this {name} by running "ssh {name}" at this prompt or on your command line. **')
         return True
 
-    def disconnect(self, name, quiet=False):
-        connection = self.connections.get(name)
+    def disconnect(self, name, quiet=False, release_ports=False):
+        with self.connections_lock:
+            connection = self.connections.pop(name, None)
         
         if connection is not None:
-            connection.stop()
-            del self.connections[name]
+            # stopping waits on ssh, so it happens outside the lock
+            connection.stop(release_ports=release_ports)
             self.print(f'Disconnected from {name}')
             return True
 
@@ -264,12 +296,13 @@ class DockerEnvClient(Printer):
         return False
 
     def forward(self, name, label, remote_port, local_port=None):
-        connection = self.connections.get(name)
-        if connection is None:
+        if not self.is_connected(name):
             self.connect(name)
-            if name not in self.connections:
-                self.print(f'Unable to connect to {name}')
-        connection = self.connections.get(name)
+        with self.connections_lock:
+            connection = self.connections.get(name)
+        if connection is None:
+            self.print(f'Unable to connect to {name}')
+            return
         
         connection.forward_port(label, remote_port=remote_port, local_port=local_port)
 
@@ -306,14 +339,117 @@ class DockerEnvClient(Printer):
 
         if instance is None:
             self.print(f'Can\'t find instance {name}')
-            return
+            return False
 
-        self.print('Restarting instance, this may take a bit...', end="")
-        response = self.api.restart_instance(self.user, name)
+        self.print(f'Restarting {name}, this may take a bit...')
+        response = self.api.restart_instance(self.user, name, respond_async=True)
         status_code = response.status_code
+        if status_code == 202:
+            operation = self._follow(response, f'Restarting {name}')
+            return operation is not None and not operation.error
         if status_code == 200:
-            self.print("done")
-        else:
-            self.print(f'failed: status={status_code}')
+            self.print(f'Restarting {name}...done')
+            return True
+        self.print(f'Restarting {name}...failed: status={status_code}')
+        return False
 
-    
+    def _follow(self, response, label) -> Optional['Operation']:
+        """
+            Prints each stage of the operation in a 202 response as the
+            backend reaches it, returning the finished operation, or None if
+            it could not be followed.
+        """
+        operation = response.parsed
+        etag = response.headers.get("etag")
+        stage = None
+        while True:
+            if operation.stage != stage:
+                stage = operation.stage
+                if operation.error:
+                    self.print(f'{label}...failed: {operation.error}')
+                    if operation.detail:
+                        self.print(operation.detail)
+                elif operation.done:
+                    self.print(f'{label}...done')
+                else:
+                    self.print(f'{label}...{stage}')
+
+            if operation.done:
+                return operation
+
+            response = self.api.get_operation(operation.id, etag=etag, wait=self.config.watch_wait_seconds)
+            if response.status_code == 304:
+                continue
+            if response.status_code != 200:
+                self.print(f'{label}...lost track of it: status={response.status_code}')
+                return None
+            operation = response.parsed
+            etag = response.headers.get("etag")
+
+    def select(self, patterns=None, all=False, status=None) -> List[str]:
+        """
+            Expands instance names, globs (e.g. "test-*"), all and status
+            into the names of the matching instances.
+        """
+        patterns = patterns or []
+        if self._is_plain(patterns, all, status):
+            # plain names, no need to ask the server
+            return list(dict.fromkeys(patterns))
+
+        response = self.api.list_instances(user=self.user, summary=True)
+        if response.status_code != 200:
+            self.print(f'Unexpected status {response.status_code}')
+            return []
+
+        names = []
+        for instance in response.parsed:
+            if status is not None and instance.status != status:
+                continue
+            if not all and patterns and not any(fnmatch.fnmatchcase(instance.name, p) for p in patterns):
+                continue
+            names.append(instance.name)
+        return names
+
+    @staticmethod
+    def _is_plain(patterns, all, status):
+        return not all and status is None and not any(c in p for p in patterns or [] for c in "*?[")
+
+    def each(self, action, patterns=None, all=False, status=None, parallel=None,
+             confirm: Optional[Callable[[List[str]], bool]] = None) -> Dict[str, object]:
+        """
+            Runs action(name) for every instance matching the patterns, all
+            and status (see select), at most `parallel` at a time, returning
+            name => result.  Each action reports its own result as it finishes.
+
+            When the names were expanded from --all, --status or a glob,
+            confirm(names) is asked first and nothing runs unless it agrees.
+        """
+        names = self.select(patterns, all=all, status=status)
+        if len(names) == 0:
+            self.print("No matching instances")
+            return {}
+
+        if confirm is not None and not self._is_plain(patterns, all, status) and not confirm(names):
+            self.print("Cancelled")
+            return {}
+
+        def run(name):
+            try:
+                return action(name)
+            except Exception as ex:
+                self.print(f'{name} failed: {ex}')
+                return False
+
+        parallel = max(1, min(parallel or self.config.bulk_parallelism, len(names)))
+        if parallel == 1:
+            results = {name: run(name) for name in names}
+        else:
+            results = {}
+            with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="docker-env-bulk") as pool:
+                futures = {pool.submit(run, name): name for name in names}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+
+        succeeded = sum(1 for r in results.values() if r)
+        self.print(f'{succeeded} of {len(names)} succeeded')
+        return results
@@ -0,0 +1,38 @@
+"""
+JSON codec for API traffic.  Uses orjson or ujson when one is installed
+and the standard library otherwise; `name` says which one was picked.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+
+    name = "orjson"
+
+    def loads(data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+except ImportError:
+    try:
+        import ujson
+
+        name = "ujson"
+
+        def loads(data: Union[bytes, str]) -> Any:
+            return ujson.loads(data)
+
+        def dumps(obj: Any) -> bytes:
+            return ujson.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    except ImportError:
+        name = "json"
+
+        def loads(data: Union[bytes, str]) -> Any:
+            return json.loads(data)
+
+        def dumps(obj: Any) -> bytes:
+            return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
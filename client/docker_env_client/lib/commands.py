@@ -15,6 +15,20 @@ class CommandResult:
         if hasattr(self.data, field):
             return getattr(self.data, field,default)
         return self.data.get(field, default)
+
+
+def add_targets(parser, verb):
+    """
+        Adds the arguments for commands that can act on many instances at
+        once: names or globs, --all and --status filters, and --parallel.
+    """
+    parser.add_argument("instances", nargs="*", help=f'Instance names or globs (e.g. "test-*") to {verb}')
+    parser.add_argument('--all', dest="all", action="store_true", help=f'{verb} every instance')
+    parser.add_argument('--status', dest="status", help='only instances with this status, e.g. exited')
+    parser.add_argument('--parallel', dest="parallel", type=int, help='how many instances to work on at once')
+    return parser
+
+
 class Command:
     def __init__(self, name, commands = None):
         self.name = name
@@ -168,8 +182,7 @@ class RestartCommand(Command):
 
     def parser(self):
         parser = argparse.ArgumentParser(prog=self.name)
-        parser.add_argument("instance", help='Instance name to restart')
-        return parser
+        return add_targets(parser, "restart")
 
 class StopCommand(Command):
     def __init__(self):
@@ -177,8 +190,7 @@ class StopCommand(Command):
 
     def parser(self):
         parser = argparse.ArgumentParser(prog=self.name)
-        parser.add_argument("instance", help='Instance name to stop')
-        return parser
+        return add_targets(parser, "stop")
 
 class StartCommand(Command):
     def __init__(self):
@@ -186,8 +198,7 @@ class StartCommand(Command):
 
     def parser(self):
         parser = argparse.ArgumentParser(prog=self.name)
-        parser.add_argument("instance", help='Instance name to start')
-        return parser
+        return add_targets(parser, "start")
 
 class ConnectCommand(Command):
     def __init__(self):
@@ -224,6 +235,6 @@ class DestroyCommand(Command):
 
     def parser(self):
         parser = argparse.ArgumentParser(prog=self.name)
-        parser.add_argument("instance", help='Instance to destroy')
-        return parser
+        parser.add_argument('--yes', '-y', dest="yes", action="store_true", help='destroy --all, --status or glob matches without asking')
+        return add_targets(parser, "destroy")
         
\ No newline at end of file
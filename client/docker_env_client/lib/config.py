@@ -3,8 +3,42 @@ from dataclasses import dataclass
 from os import path
 import tempfile
 
+from .backoff import Backoff
+
 @dataclass
 class Config:
     ssh_dir: str = path.expanduser("~/.ssh")
     check_interval_seconds: int = 5
-    temp_dir_root: str = path.join(tempfile.gettempdir(), "_docker_env_client")
\ No newline at end of file
+    # polls back off from min to max while nothing changes
+    check_interval_min_seconds: float = 1
+    check_interval_max_seconds: float = 30
+    check_interval_jitter: float = .2
+    scheduler_workers: int = 4
+    probe_timeout_seconds: float = .25
+    # share one ssh ControlMaster connection per instance for all forwards
+    ssh_multiplex: bool = True
+    # the API client keeps a pool of connections open through the API tunnel
+    api_timeout_seconds: float = 60
+    api_connect_timeout_seconds: float = 10
+    api_max_connections: int = 10
+    api_keepalive_seconds: float = 30
+    # how long instance lookups are reused, mutations invalidate them right away
+    api_cache_ttl_seconds: float = 1
+    # lookups are retried on connection errors with a jittered backoff
+    api_retries: int = 2
+    api_retry_min_seconds: float = .1
+    api_retry_max_seconds: float = 1
+    # after this many failures in a row, calls fail fast for a growing pause
+    api_breaker_threshold: int = 3
+    api_breaker_min_seconds: float = 2
+    api_breaker_max_seconds: float = 30
+    # how long each watch request waits for an instance to change
+    watch_wait_seconds: int = 30
+    # how many instances bulk start/stop/restart/destroy work on at once
+    bulk_parallelism: int = 8
+    # local port leases not renewed for this long are dropped
+    port_lease_ttl_seconds: int = 7 * 24 * 60 * 60
+    temp_dir_root: str = path.join(tempfile.gettempdir(), "_docker_env_client")
+
+    def poll_backoff(self) -> 'Backoff':
+        return Backoff(self.check_interval_min_seconds, self.check_interval_max_seconds, jitter=self.check_interval_jitter)
@@ -1,16 +1,53 @@
+import hashlib
 import os
 import tempfile
+import threading
 from os import path, makedirs
 
+from .breaker import Unavailable
 from .config import Config
-from .repeating_timer import RepeatingTimer
+from .leases import LeaseStore
+from .scheduler import Scheduler
 from .tunnel import Tunnel, TunnelEvents
 from .printer import Printer
+from .ssh import SSH
 from .container import Container
 from .config import Config
+from .util import free_port
+
+# free ports to try before giving up on a lease
+_LEASE_ATTEMPTS = 10
+
+
+class _TunnelStart:
+    """
+    one tunnel start, run by whichever thread gets to it first
+    """
+    def __init__(self, tunnel: 'Tunnel', start):
+        self.tunnel = tunnel
+        self.start = start
+        self.lock = threading.Lock()
+        self.claimed = False
+        self.done = threading.Event()
+        self.result = False
+
+    def run(self):
+        with self.lock:
+            if self.claimed:
+                return
+            self.claimed = True
+        try:
+            self.result = self.start(self.tunnel)
+        finally:
+            self.done.set()
+
+    def wait(self) -> bool:
+        self.done.wait()
+        return self.result
+
 
 class Connection:
-    def __init__(self, container: 'Container', host, user, name, get_instance):
+    def __init__(self, container: 'Container', host, user, name, get_instance, watcher=None):
         self.container = container
         self.printer = container.get(Printer)
         self.user = user
@@ -20,37 +57,72 @@ class Connection:
         self.tunnel = None
         self.tunnels = {}
         self.portmap = {}
+        self.leases = None
+        self.master = None
         self.timer = None
         self.config: Config
         self.config = self.container.get(Config)
+        self.scheduler: Scheduler
+        self.scheduler = self.container.get(Scheduler)
+        self.backoff = self.config.poll_backoff()
+        self.ports = None
+        # with a watcher, changes are pushed to us and polling is only a fallback
+        self.watcher = watcher
+        self.watching = False
+        self.lock = threading.RLock()
+        # set while the API can't be reached
+        self.unavailable = False
+        self.retry_after = 0
      
     def start(self):
 
         if self.is_alive():
             return True
 
-        if self.timer is None:
-            self.timer = RepeatingTimer(self.config.check_interval_seconds, self._poll, f'Connection {self.name}')
-
+        self.backoff.reset()
+        self._load_local_ports()
         result = self._poll()
-        if result:
-            self.timer.start()
+        if result and self.timer is None:
+            self.timer = self.scheduler.schedule(self._next_interval, self._poll, f'Connection {self.name}')
         return result
 
 
-    def stop(self):
-        if self.is_alive():
+    def stop(self, release_ports=False):
+        """
+        stops every tunnel.  release_ports drops the instance's port leases
+        too, for when it is gone for good.
+        """
+        if self.timer is not None:
             self.timer.cancel()
-            self.tunnel.stop()
-            self.tunnel.remove_handler(self._tunnel_status_changed)
-            for t in self.tunnels.values():
-                t.stop()
-            self.tunnels = {}
+            self.timer = None
+
+        if self.watching:
+            self.watcher.unwatch(self.name)
+            self.watching = False
+
+        with self.lock:
+            if self.is_alive():
+                self.tunnel.stop()
+                self.tunnel.remove_handler(self._tunnel_status_changed)
+                for t in self.tunnels.values():
+                    t.stop()
+                self.tunnels = {}
+
+        if self.master is not None:
+            self.master.kill()
+            self.master = None
+
+        if release_ports:
+            self._get_leases().release(self.user, self.name)
+
+        if self.leases is not None:
+            self.leases.close()
+            self.leases = None
 
     def is_alive(self) -> bool:
         return self.tunnel and self.tunnel.is_connected()
 
-    def _get_portfile_path(self, remote_port) -> str:
+    def _get_temp_dir(self) -> str:
 
         tmpdir = self.config.temp_dir_root
         if not tmpdir:
@@ -64,48 +136,156 @@ class Connection:
             # do nothing
             pass
 
-        return path.join(tmpdir, f'{self.user}-{self.name}-{remote_port}.port')
+        return tmpdir
+
+    def _get_leases(self) -> 'LeaseStore':
+        if self.leases is None:
+            self.leases = LeaseStore(path.join(self._get_temp_dir(), "leases.db"), self.config.port_lease_ttl_seconds)
+        return self.leases
+
+    def _get_master(self) -> 'SSH.Master':
+        """
+        with ssh_multiplex on, all port forwards for this instance share one
+        ControlMaster connection over the instance's SSH port.
+        """
+        if not self.config.ssh_multiplex:
+            return None
+
+        ssh_port = self.tunnel.local_port
+        if self.master is None or self.master.ssh.port != ssh_port:
+            if self.master is not None:
+                self.master.kill()
+            ssh = self.container.create(SSH, self.container, "localhost", ssh_port, self.user)
+            self.master = ssh.master(self._control_path())
+        return self.master
+
+    def _control_path(self) -> str:
+        """
+        a socket path short enough for sun_path (104 bytes on macOS, with ssh
+        adding a random suffix while it binds), in the user's own ssh dir.
+        One per process, so another client's master is never mistaken for a
+        stale one.
+        """
+        digest = hashlib.sha1(f'{self.user}@{self.name}:{os.getpid()}'.encode()).hexdigest()[:12]
+        dir = self._ssh_path()
+        os.makedirs(dir, mode=0o700, exist_ok=True)
+        return path.join(dir, f'de-{digest}.ctl')
+
+    def _load_local_ports(self):
+        # pull in every lease for the instance up front rather than one lookup per port
+        self.portmap.update(self._get_leases().load(self.user, self.name))
 
     def _get_local_port(self, remote_port):
-        # portmap is a file like [instance].[user].remote_port_.port, with contents being the local port
         local_port = self.portmap.get(remote_port, 0)
 
         if local_port != 0:
             return local_port
 
-        portfile_path = self._get_portfile_path(remote_port)
-        if not path.exists(portfile_path):
+        local_port = self._get_leases().get(self.user, self.name, remote_port)
+        if local_port is None:
             return 0
 
-        with open(portfile_path, "r") as portfile:
-            try:
-                port = int(portfile.read())
-                self.portmap[remote_port] = port
-                return port
-            except ValueError as ex:
-                self.printer.print(f'Error reading portfile {portfile_path}: {ex}')
-                pass
-
-        return 0
-
-    def _save_local_port(self, remote_port, local_port):
-
         self.portmap[remote_port] = local_port
-        portfile_path = self._get_portfile_path(remote_port)
-        with open(portfile_path, "w") as portfile:
-            portfile.write(str(local_port))
-
+        return local_port
+
+    def _lease_local_port(self, remote_port, local_port=0) -> int:
+        """
+        leases a local port for remote_port before any tunnel binds it, so
+        two clients can't pick the same free port.  Keeps the port asked
+        for, or already leased, when it can; otherwise tries free ports
+        until one can be leased.  Returns 0 if none could be.
+        """
+        leases = self._get_leases()
+
+        if not local_port:
+            local_port = self._get_local_port(remote_port)
+
+        if local_port:
+            if leases.claim(self.user, self.name, remote_port, local_port):
+                self.portmap[remote_port] = local_port
+                return local_port
+            self.printer.print(f'Local port {local_port} is leased to another connection, picking another for port {remote_port}')
+
+        for _ in range(_LEASE_ATTEMPTS):
+            leased = leases.acquire(self.user, self.name, remote_port, free_port())
+            if leased is not None:
+                self.portmap[remote_port] = leased
+                return leased
+        return 0
 
+    def _next_interval(self):
+        if self.watching:
+            return self.config.check_interval_max_seconds
+        delay = max(self.backoff.next(), self.retry_after)
+        self.retry_after = 0
+        return delay
+
+    def _watch(self):
+        if self.watcher is None or self.watching:
+            return
+        self.watching = True
+        self.watcher.watch(self.name, self._instance_changed, self._watch_unavailable)
+
+    def _watch_unavailable(self, supported):
+        self.watching = False
+        if not supported:
+            self.watcher = None
+        # go back to polling right away
+        self.backoff.reset()
+        if self.timer is not None:
+            self.timer.trigger()
+
+    def _instance_changed(self, instance):
+        if self.timer is None:
+            return
+        self._sync(instance)
 
     def _poll(self) -> bool:
             # check the instance
-        response = self.get_instance()
+        try:
+            response = self.get_instance()
+        except Unavailable as ex:
+            # wait out the outage quietly, keep backing off
+            if not self.unavailable:
+                self.printer.print(f'Lost contact with the API, will keep checking {self.name}')
+            self.unavailable = True
+            self.retry_after = ex.retry_after
+            return False
+
+        if self.unavailable:
+            self.printer.print(f'API is back, checking {self.name}')
+            self.unavailable = False
      
         if  response.status_code != 200:
             self.printer.print("Invalid instance name")
             return False
 
-        instance = response.parsed
+        if not self._sync(response.parsed):
+            return False
+
+        self._watch()
+        return True
+
+    def _sync(self, instance) -> bool:
+        # the poll timer and the watcher can both get here
+        with self.lock:
+            started = self._sync_locked(instance)
+        if started is None:
+            return False
+
+        # each start can wait on an ssh handshake, so they run side by side
+        # and without the lock
+        for tunnel, ok in self._start_tunnels(started):
+            if not ok:
+                self.printer.print(f'Failed to start connection to {self.name} port {self.host}:{tunnel.remote_port}')
+        return True
+
+    def _sync_locked(self, instance):
+        """
+        brings the SSH tunnel up and the set of port tunnels in line with
+        instance, returning the new tunnels for the caller to start, or
+        None if SSH can't be reached.
+        """
         ssh_port = instance.ssh_port
 
         if not self.is_alive():
@@ -122,11 +302,19 @@ class Connection:
                 message=f'Connected to SSH for {self.name}')
     
             self.tunnel.add_handler(self._tunnel_status_changed)
+            self.backoff.reset()
             if not self.tunnel.start():
-                return False
+                return None
 
-        # walk the other ports
+        # poll quickly while the set of ports is changing, back off once it settles
+        ports = frozenset(p.remote_port for p in instance.ports)
+        if ports != self.ports:
+            self.ports = ports
+            self.backoff.reset()
+
+        # walk the other ports, creating tunnels for any new ones
         seen = {}
+        started = []
         for port_info in instance.ports:
             remote_port = port_info.remote_port
             seen[remote_port] = True
@@ -134,18 +322,13 @@ class Connection:
             if remote_port in self.tunnels:
                 continue
 
-            local_port = self.forward_port(
-                port_info.label, 
+            tunnel = self._create_tunnel(
+                port_info.label,
                 remote_port,
-                local_port= self._get_local_port(remote_port),
-                message=port_info.message,
-                check_ssh=False)
-
-            if 0 == local_port:
-                self.printer.print(f'Failed to start connection to {self.name} port {self.host}:{remote_port}')
-                continue
-
-            self._save_local_port(remote_port, local_port)
+                local_port=self._lease_local_port(remote_port),
+                message=port_info.message)
+            self.tunnels[remote_port] = tunnel
+            started.append(tunnel)
 
         # check for closed ports
         keys = list(self.tunnels.keys())
@@ -158,7 +341,7 @@ class Connection:
             tunnel.stop()
             del self.tunnels[remote_port]
 
-        return True
+        return started
 
     def _tunnel_status_changed(self, label, event):
         if event == TunnelEvents.CONNECTED:
@@ -167,22 +350,28 @@ class Connection:
             self._remove_ssh_config()
 
     def tunnel_for_port(self, port) -> 'Tunnel':
-        if port in self.tunnels:
-            return self.tunnels[port]
-
-        return None
+        with self.lock:
+            return self.tunnels.get(port)
 
     def forward_port(self, label, remote_port, local_port = 0, message=None, check_ssh=True) -> int:
-        tunnel = self.tunnels.get(remote_port, None)
+        tunnel = self.tunnel_for_port(remote_port)
         if tunnel is not None:
-            return self.tunnels[remote_port].local_port
+            return tunnel.local_port
 
+        # polling starts tunnels off the lock, so it mustn't be held here
         if check_ssh and not self._poll():
             self.printer.print(f'Unable to connect to {self.name} SSH port')
             return 0
 
-        tunnel = self.container.create(Tunnel, self.container, label, "localhost", remote_port=remote_port, local_port=local_port, message=message, ssh_port=self.tunnel.local_port, user=self.user)
-        self.tunnels[remote_port] = tunnel
+        # the watcher and the poll timer change self.tunnels too
+        with self.lock:
+            tunnel = self.tunnels.get(remote_port, None)
+            if tunnel is not None:
+                return tunnel.local_port
+
+            local_port = self._lease_local_port(remote_port, local_port)
+            tunnel = self._create_tunnel(label, remote_port, local_port, message)
+            self.tunnels[remote_port] = tunnel
 
         if tunnel.start():
             return tunnel.local_port
@@ -190,6 +379,29 @@ class Connection:
         self.printer.print(f'Unable to start tunnel to {self.name} {label} port={local_port}')
         return 0
 
+    def _create_tunnel(self, label, remote_port, local_port=0, message=None) -> 'Tunnel':
+        return self.container.create(Tunnel, self.container, label, "localhost", remote_port=remote_port, local_port=local_port, message=message, ssh_port=self.tunnel.local_port, user=self.user, master=self._get_master())
+
+    def _start_tunnels(self, tunnels):
+        """
+        starts tunnels on the scheduler's workers, returning (tunnel, started)
+        pairs.  The caller may be a worker itself, so rather than wait on
+        starts no worker has picked up yet it runs them too.
+        """
+        jobs = [_TunnelStart(t, self._start_tunnel) for t in tunnels]
+        for job in jobs[1:]:
+            self.scheduler.call_soon(job.run, f'Connection {self.name} port {job.tunnel.remote_port}')
+        for job in jobs:
+            job.run()
+        return [(job.tunnel, job.wait()) for job in jobs]
+
+    def _start_tunnel(self, tunnel: 'Tunnel') -> bool:
+        # not under the lock, a caller holding it may be waiting on us
+        if self.tunnels.get(tunnel.remote_port) is not tunnel:
+            # closed or replaced before it got going
+            return True
+        return tunnel.start()
+
     def _create_ssh_config(self, name, port) -> str:
         ssh_config = f'''Host {name}
             HostName localhost
@@ -0,0 +1,150 @@
+import sqlite3
+import threading
+import time
+from os import path, makedirs
+from typing import Dict, Optional
+
+
+class LeaseStore:
+    """
+        LeaseStore remembers which local port each forwarded remote port
+        was given, keyed by (user, instance, remote_port), so tunnels come
+        back on the same local port across runs.
+
+        Leases live in one SQLite database shared by every client process on
+        the machine.  A local port can only be leased to one key at a time,
+        and leases that have not been renewed within `ttl` seconds expire.
+    """
+    def __init__(self, db_path, ttl=7 * 24 * 60 * 60, timeout=5.0):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.db = None
+
+    def _connect(self) -> 'sqlite3.Connection':
+        # must be called with the lock held
+        if self.db is not None:
+            return self.db
+
+        makedirs(path.dirname(self.db_path), exist_ok=True)
+        # autocommit, transactions are opened explicitly with BEGIN IMMEDIATE
+        db = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                user TEXT NOT NULL,
+                instance TEXT NOT NULL,
+                remote_port INTEGER NOT NULL,
+                local_port INTEGER NOT NULL UNIQUE,
+                updated REAL NOT NULL,
+                PRIMARY KEY (user, instance, remote_port)
+            )""")
+        self.db = db
+        self._expire(db)
+        return db
+
+    def _expire(self, db):
+        db.execute("DELETE FROM leases WHERE updated < ?", (time.time() - self.ttl,))
+
+    def load(self, user, instance) -> Dict[int, int]:
+        """
+            Returns remote_port => local_port for every lease the instance
+            holds, renewing them.
+        """
+        with self.lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire(db)
+                db.execute("UPDATE leases SET updated = ? WHERE user = ? AND instance = ?", (time.time(), user, instance))
+                rows = db.execute(
+                    "SELECT remote_port, local_port FROM leases WHERE user = ? AND instance = ?",
+                    (user, instance)).fetchall()
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return dict(rows)
+
+    def get(self, user, instance, remote_port) -> Optional[int]:
+        with self.lock:
+            row = self._connect().execute(
+                "SELECT local_port FROM leases WHERE user = ? AND instance = ? AND remote_port = ? AND updated >= ?",
+                (user, instance, remote_port, time.time() - self.ttl)).fetchone()
+        return row[0] if row else None
+
+    def claim(self, user, instance, remote_port, local_port) -> bool:
+        """
+            Leases local_port to (user, instance, remote_port), replacing any
+            lease the key had before.  Returns False if another key already
+            holds local_port.
+        """
+        with self.lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire(db)
+                row = db.execute(
+                    "SELECT user, instance, remote_port FROM leases WHERE local_port = ?",
+                    (local_port,)).fetchone()
+                if row is not None and row != (user, instance, remote_port):
+                    db.execute("ROLLBACK")
+                    return False
+                db.execute(
+                    "INSERT OR REPLACE INTO leases (user, instance, remote_port, local_port, updated) VALUES (?, ?, ?, ?, ?)",
+                    (user, instance, remote_port, local_port, time.time()))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return True
+
+    def acquire(self, user, instance, remote_port, local_port) -> Optional[int]:
+        """
+            Returns the local port leased to (user, instance, remote_port),
+            first leasing it local_port if it has none.  Returns None if
+            local_port is leased to another key, so the caller can try
+            another.  Check and claim happen in one transaction, so two
+            processes can't both take the same port.
+        """
+        with self.lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire(db)
+                row = db.execute(
+                    "SELECT local_port FROM leases WHERE user = ? AND instance = ? AND remote_port = ?",
+                    (user, instance, remote_port)).fetchone()
+                if row is not None:
+                    # another client already got one for this key, share it
+                    local_port = row[0]
+                elif db.execute("SELECT 1 FROM leases WHERE local_port = ?", (local_port,)).fetchone() is not None:
+                    db.execute("ROLLBACK")
+                    return None
+                db.execute(
+                    "INSERT OR REPLACE INTO leases (user, instance, remote_port, local_port, updated) VALUES (?, ?, ?, ?, ?)",
+                    (user, instance, remote_port, local_port, time.time()))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return local_port
+
+    def release(self, user, instance, remote_port=None):
+        """
+            Drops the lease for remote_port, or every lease the instance holds.
+        """
+        with self.lock:
+            db = self._connect()
+            if remote_port is None:
+                db.execute("DELETE FROM leases WHERE user = ? AND instance = ?", (user, instance))
+            else:
+                db.execute(
+                    "DELETE FROM leases WHERE user = ? AND instance = ? AND remote_port = ?",
+                    (user, instance, remote_port))
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,53 @@
+import threading
+from typing import Dict, Iterable
+
+from .config import Config
+from .scheduler import Scheduler
+from .util import probe_ports
+
+
+class PortProber:
+    """
+        PortProber watches every local port that tunnels care about.
+
+        Each tick checks all subscribed ports in a single batch of
+        non-blocking connects, then hands each subscriber its result as
+        handler(port, is_open).
+    """
+    def __init__(self, scheduler: 'Scheduler', config: 'Config'):
+        self.scheduler = scheduler
+        self.config = config
+        self.subscribers = {}  # port => [handler]
+        self.task = None
+        self.lock = threading.Lock()
+
+    def subscribe(self, port, handler):
+        with self.lock:
+            self.subscribers.setdefault(port, []).append(handler)
+            if self.task is None:
+                self.task = self.scheduler.schedule(self.config.check_interval_seconds, self.tick, "Port prober")
+
+    def unsubscribe(self, port, handler):
+        with self.lock:
+            handlers = self.subscribers.get(port, [])
+            if handler in handlers:
+                handlers.remove(handler)
+            if not handlers:
+                self.subscribers.pop(port, None)
+            if not self.subscribers and self.task is not None:
+                self.task.cancel()
+                self.task = None
+
+    def probe(self, ports: Iterable[int]) -> Dict[int, bool]:
+        return probe_ports(ports, self.config.probe_timeout_seconds)
+
+    def tick(self):
+        with self.lock:
+            subscribers = {port: list(handlers) for port, handlers in self.subscribers.items()}
+
+        results = self.probe(subscribers.keys())
+
+        for port, handlers in subscribers.items():
+            is_open = results.get(port, False)
+            for handler in handlers:
+                handler(port, is_open)
@@ -0,0 +1,112 @@
+import os
+import shlex
+import subprocess
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ssh flags that take a value, e.g. -p 22 or -p22
+_SSH_VALUE_FLAGS = set("BbcDEeFIiJLlmOoPpQRSWw")
+_LOCAL_HOSTS = ("localhost", "127.0.0.1")
+
+
+def parse_ssh_forward(argv: List[str]) -> Optional[Tuple[Optional[int], List[Tuple[int, int]]]]:
+    """
+    parse_ssh_forward pulls (ssh_port, [(local_port, remote_port)]) out of an
+    ssh command line, or returns None if it is not an ssh port forward.
+    """
+    if not argv or os.path.basename(argv[0]) != "ssh":
+        return None
+
+    ssh_port = None
+    forwards = []
+    args = iter(argv[1:])
+    for arg in args:
+        if not arg.startswith("-") or len(arg) < 2:
+            continue
+        for i, flag in enumerate(arg[1:], 1):
+            if flag not in _SSH_VALUE_FLAGS:
+                continue
+            value = arg[i + 1:] or next(args, "")
+            if flag == "p" and value.isdigit():
+                ssh_port = int(value)
+            elif flag == "L":
+                parts = value.split(":")
+                if len(parts) == 4:
+                    parts = parts[1:]
+                if len(parts) == 3 and parts[1] in _LOCAL_HOSTS and parts[0].isdigit() and parts[2].isdigit():
+                    forwards.append((int(parts[0]), int(parts[2])))
+            break
+
+    if not forwards:
+        return None
+    return ssh_port, forwards
+
+
+class ProcessIndex:
+    """
+        ProcessIndex maps (ssh_port, remote_port) => local_port for every
+        running `ssh -L` forward, so tunnels can reattach to forwards left
+        by another client instance.
+
+        It is built from one scan of /proc (or one `ps` where there is no
+        /proc) and reused until it is `max_age` seconds old, so bringing up
+        many tunnels at once costs a single scan.
+
+        Only plain `ssh -L` processes show up here.  Forwards added to a
+        ControlMaster with `ssh -O forward` (ssh_multiplex) don't appear on
+        any command line, and ssh has no way to list them, so multiplexed
+        tunnels find their local ports through the port leases instead.
+    """
+    def __init__(self, max_age=2.0):
+        self.max_age = max_age
+        self.forwards = {}  # (ssh_port, remote_port) => local_port
+        self.updated = None
+        self.lock = threading.Lock()
+
+    def find(self, ssh_port, remote_port) -> Optional[int]:
+        with self.lock:
+            if self.updated is None or time.monotonic() - self.updated > self.max_age:
+                self._refresh()
+            return self.forwards.get((ssh_port, remote_port))
+
+    def _refresh(self):
+        forwards = {}
+        for argv in self._command_lines():
+            parsed = parse_ssh_forward(argv)
+            if parsed is None:
+                continue
+            ssh_port, ports = parsed
+            for local_port, remote_port in ports:
+                forwards.setdefault((ssh_port, remote_port), local_port)
+        self.forwards = forwards
+        self.updated = time.monotonic()
+
+    def _command_lines(self) -> Iterable[List[str]]:
+        if os.path.isdir("/proc/self"):
+            return self._proc_command_lines()
+        return self._ps_command_lines()
+
+    def _proc_command_lines(self) -> Iterable[List[str]]:
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f'/proc/{pid}/cmdline', "rb") as f:
+                    raw = f.read()
+            except OSError:
+                # gone, or not ours to read
+                continue
+            if b"ssh" not in raw:
+                continue
+            yield raw.decode(errors="replace").rstrip("\0").split("\0")
+
+    def _ps_command_lines(self) -> Iterable[List[str]]:
+        proc = subprocess.run(["ps", "-axww", "-o", "command="], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        for line in proc.stdout.decode(errors="replace").splitlines():
+            if "ssh" not in line:
+                continue
+            try:
+                yield shlex.split(line)
+            except ValueError:
+                continue
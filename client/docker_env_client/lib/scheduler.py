@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from queue import Queue
+
+
+class ScheduledTask:
+    """
+        A unit of work registered with the Scheduler.
+
+        `interval` is the number of seconds between runs, or a callable
+        returning it, or None for a task that only runs once.
+    """
+    def __init__(self, scheduler: 'Scheduler', interval, function, name=None):
+        self.scheduler = scheduler
+        self.interval = interval
+        self.function = function
+        self.name = name
+        self.cancelled = False
+        self.running = False
+        self.triggered = False
+        self.generation = 0
+
+    def next_interval(self):
+        if callable(self.interval):
+            return self.interval()
+        return self.interval
+
+    def cancel(self):
+        self.scheduler._cancel(self)
+
+    def trigger(self):
+        """
+            Runs the task as soon as possible, rather than waiting
+            for its next scheduled run.
+        """
+        self.scheduler._trigger(self)
+
+
+class Scheduler:
+    """
+        Scheduler owns all of the periodic work in the client (connection
+        polls, tunnel checks, ...), so the number of threads stays fixed
+        no matter how many tunnels are open.
+
+        A single dispatcher thread keeps a heap of due times and hands due
+        tasks to a small pool of workers. A task never runs concurrently
+        with itself; repeating tasks are rescheduled when their run finishes.
+    """
+    def __init__(self, workers=4):
+        self.workers = workers
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._ready = Queue()
+        self._threads = []
+        self._running = False
+
+    def schedule(self, interval, function, name=None, delay=None) -> 'ScheduledTask':
+        """
+            Runs `function` every `interval` seconds, first after `delay`
+            seconds (defaults to one interval).
+        """
+        task = ScheduledTask(self, interval, function, name)
+        if delay is None:
+            delay = task.next_interval()
+        with self._cond:
+            self._push(task, delay)
+        return task
+
+    def call_later(self, delay, function, name=None) -> 'ScheduledTask':
+        """
+            Runs `function` once, after `delay` seconds.
+        """
+        task = ScheduledTask(self, None, function, name)
+        with self._cond:
+            self._push(task, delay)
+        return task
+
+    def call_soon(self, function, name=None) -> 'ScheduledTask':
+        return self.call_later(0, function, name)
+
+    def thread_count(self) -> int:
+        return len(self._threads)
+
+    def stop(self):
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._heap = []
+            self._cond.notify_all()
+        for _ in range(self.workers):
+            self._ready.put(None)
+        self._threads = []
+
+    def _ensure_started(self):
+        if self._running:
+            return
+        self._running = True
+        self._threads = [threading.Thread(target=self._dispatch, name="Scheduler", daemon=True)]
+        for i in range(self.workers):
+            self._threads.append(threading.Thread(target=self._work, name=f'Scheduler worker {i}', daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def _push(self, task: 'ScheduledTask', delay):
+        # must be called with the lock held
+        self._ensure_started()
+        task.generation += 1
+        heapq.heappush(self._heap, (time.monotonic() + max(delay or 0, 0), next(self._seq), task.generation, task))
+        self._cond.notify()
+
+    def _cancel(self, task: 'ScheduledTask'):
+        with self._cond:
+            task.cancelled = True
+            # stale heap entries are skipped by the dispatcher
+            task.generation += 1
+
+    def _trigger(self, task: 'ScheduledTask'):
+        with self._cond:
+            if task.cancelled:
+                return
+            if task.running:
+                task.triggered = True
+                return
+            self._push(task, 0)
+
+    def _dispatch(self):
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, generation, task = heapq.heappop(self._heap)
+                    if task.cancelled or generation != task.generation or task.running:
+                        continue
+                    task.running = True
+                    self._ready.put(task)
+
+                timeout = None
+                if self._heap:
+                    timeout = self._heap[0][0] - now
+                self._cond.wait(timeout)
+
+    def _work(self):
+        while True:
+            task = self._ready.get()
+            if task is None:
+                return
+
+            try:
+                task.function()
+            except Exception:
+                traceback.print_exc()
+
+            delay = None
+            if not task.cancelled and task.interval is not None and not task.triggered:
+                try:
+                    delay = task.next_interval()
+                except Exception:
+                    traceback.print_exc()
+                    delay = 0
+
+            with self._cond:
+                task.running = False
+                if task.triggered:
+                    task.triggered = False
+                    delay = 0
+                if task.cancelled or not self._running:
+                    continue
+                if delay is not None:
+                    self._push(task, delay)
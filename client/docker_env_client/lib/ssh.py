@@ -1,14 +1,16 @@
 
 from asyncio import InvalidStateError
+import os
 import subprocess
 import shlex
 import sys
-import re
-from threading import local
+import tempfile
+import threading
 import time
 from .printer import Printer
 from .container import Container
 from .util import is_port_open
+from .process_index import ProcessIndex
 
 class SSH:
     """
@@ -24,68 +26,107 @@ class SSH:
         self.port = port
         self.user = user
 
+    # shared by every tunnel, so startup scans the process table once
+    process_index = ProcessIndex()
+
     @staticmethod
     def find_existing(ssh_port, remote_port):
         """
         find_existing looks for an existing ssh process that tunnels from local machine to the remote port.  
         this exists for clients that are started when tunnel is already running from another client instance.
         """
-        proc = subprocess.run(["sh", "-c", f'pgrep -f -l ssh | grep {ssh_port} | grep ":{remote_port}"'],stdout=subprocess.PIPE)
-        if proc.returncode != 0:
-            return None
-        
-        m = re.search(r'(\d+):localhost:'+ str(remote_port), str(proc.stdout))
-        if not m:
-            return None
+        return SSH.process_index.find(ssh_port, remote_port)
 
-        return int(m.group(1))        
     class SSHInstance:
         """
             Abstracts an open SSH connection
         """
-        def __init__(self, command: str, local_port=None):
+        def __init__(self, command: str, local_port=None, capture=None):
             self.command = command
             self.proc = None
             self.stderr = ""
             self.stdout = ""
             self.local_port = local_port
+            self.error = None
+            # forwards run in the background, so keep what ssh says for error reports
+            self.capture = local_port is not None if capture is None else capture
+            self._stderr_file = None
 
         def is_alive(self):
             return self.proc is not None and self.proc.poll() is None
 
-        def run(self, wait:float = .5, tries=10):
+        def run(self, timeout: float = 10, ready=None) -> bool:
+            """
+                Starts ssh, then waits until `ready()` (by default, until the
+                forwarded local port is open), ssh exits, or `timeout` passes.
+            """
             if self.proc is not None:
                 raise InvalidStateError()
 
             args = shlex.split(self.command)
-            self.proc = subprocess.Popen(args, stdin=sys.stdin, stdout=sys.stdout, stderr=sys.stderr)
+            if self.capture:
+                self._stderr_file = tempfile.TemporaryFile()
+                self.proc = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=self._stderr_file)
+            else:
+                self.proc = subprocess.Popen(args, stdin=sys.stdin, stdout=sys.stdout, stderr=sys.stderr)
 
-            
-            for i in range(tries):
-                time.sleep(wait)
-                
-                if not self.local_port:
-                    return self.is_alive()
+            if ready is None and self.local_port:
+                ready = lambda: is_port_open(self.local_port)
+
+            if ready is None:
+                return self.is_alive()
+
+            return self.wait_ready(ready, timeout)
+
+        def wait_ready(self, ready, timeout: float) -> bool:
+            """
+                Polls `ready()` starting every few milliseconds and backing
+                off, so callers wait about as long as the ssh handshake takes.
+            """
+            delay = .01
+            deadline = time.monotonic() + timeout
+            while True:
+                if ready():
+                    return True
 
                 if not self.is_alive():
+                    self.error = self._read_stderr() or f'ssh exited with code {self.proc.returncode}'
+                    self._close_stderr()
+                    return False
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.error = f'timed out after {timeout}s'
+                    self.kill()
                     return False
-                
-                if is_port_open(self.local_port):
-                    return True
 
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, .25)
+
+        def _read_stderr(self) -> str:
+            if self._stderr_file is None:
+                return ""
+            self._stderr_file.seek(0)
+            self.stderr = self._stderr_file.read().decode(errors="replace").strip()
+            return self.stderr
+
+        def _close_stderr(self):
+            if self._stderr_file is not None:
+                self._stderr_file.close()
+                self._stderr_file = None
 
         def ensure(self):
             if self.proc is None:
-                self.run()
+                return self.run()
    
             return self.is_alive()
 
         def kill(self):
-            if self.is_alive():
+            alive = self.is_alive()
+            if alive:
                 self.proc.kill()
-                return True
-
-            return False
+            self._close_stderr()
+            return alive
 
         def wait(self):
             if not self.ensure():
@@ -93,7 +134,119 @@ class SSH:
 
             self.proc.wait()
 
-    def command(self, host=None, remote_port=None, local_port=None, forward_agent=False):
+    class Master:
+        """
+            A ControlMaster connection to a host that any number of port
+            forwards share, so the host sees one SSH connection however
+            many ports are forwarded.  Forwards are added and removed on
+            the running master with `ssh -O forward` / `ssh -O cancel`.
+        """
+        def __init__(self, ssh: 'SSH', control_path: str):
+            self.ssh = ssh
+            self.control_path = control_path
+            self.instance = None
+            self.error_message = None
+            self.generation = 0
+            self.lock = threading.Lock()
+
+        @property
+        def proc(self):
+            return self.instance and self.instance.proc
+
+        def is_alive(self):
+            return self.instance is not None and self.instance.is_alive()
+
+        @property
+        def error(self):
+            return self.error_message or (self.instance and self.instance.error)
+
+        def ensure(self) -> bool:
+            with self.lock:
+                if self.is_alive():
+                    return True
+
+                if os.path.exists(self.control_path):
+                    if self.check():
+                        # a live master we didn't start, leave it be
+                        self.instance = None
+                        self.error_message = f'control socket {self.control_path} is in use'
+                        return False
+                    # left over from a master that has gone away
+                    os.remove(self.control_path)
+
+                self.error_message = None
+                self.instance = SSH.SSHInstance(self.ssh.command(master=self.control_path), capture=True)
+                self.generation += 1
+                return self.instance.run(ready=lambda: os.path.exists(self.control_path))
+
+        def check(self) -> bool:
+            """
+                Asks whatever master is listening on the control socket
+                whether it is up.
+            """
+            cmd = self.ssh.command(control=self.control_path, operation="check")
+            proc = subprocess.run(shlex.split(cmd), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return proc.returncode == 0
+
+        def control(self, operation, spec=None) -> bool:
+            cmd = self.ssh.command(control=self.control_path, operation=operation, forward=spec)
+            proc = subprocess.run(shlex.split(cmd), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if proc.returncode != 0:
+                self.error_message = proc.stderr.decode(errors="replace").strip()
+            return proc.returncode == 0
+
+        def forward(self, remote_port, local_port=None) -> 'SSH.MultiplexedForward':
+            return SSH.MultiplexedForward(self, remote_port, local_port or remote_port)
+
+        def kill(self):
+            if not self.is_alive():
+                return False
+            self.control("exit")
+            self.instance.kill()
+            return True
+
+    class MultiplexedForward:
+        """
+            A port forward on a shared Master.  Looks like an SSHInstance to
+            Tunnel; `proc` is the master's process.
+        """
+        def __init__(self, master: 'SSH.Master', remote_port, local_port):
+            self.master = master
+            self.remote_port = remote_port
+            self.local_port = local_port
+            self.spec = f'{local_port}:localhost:{remote_port}'
+            self.generation = None
+
+        @property
+        def proc(self):
+            return self.master.proc
+
+        @property
+        def error(self):
+            return self.master.error
+
+        def is_alive(self):
+            return self.master.is_alive() and self.generation == self.master.generation
+
+        def ensure(self):
+            if not self.master.ensure():
+                return False
+
+            if self.generation != self.master.generation:
+                if not self.master.control("forward", self.spec):
+                    return False
+                self.generation = self.master.generation
+
+            return self.is_alive()
+
+        def kill(self):
+            if not self.is_alive():
+                return False
+            self.master.control("cancel", self.spec)
+            self.generation = None
+            return True
+
+    def command(self, host=None, remote_port=None, local_port=None, forward_agent=False, master=None, control=None, operation=None, forward=None):
         args = ""
         if forward_agent:
             args = '-A'
@@ -105,6 +258,14 @@ class SSH:
       
         if self.port is not None:
             args = f'-p {self.port} {args}'
+
+        if master is not None:
+            return f'ssh {args} -M -S {shlex.quote(master)} -o ControlPersist=no -N {host}'
+
+        if control is not None:
+            if forward is not None:
+                return f'ssh {args} -S {shlex.quote(control)} -O {operation} -L {forward} {host}'
+            return f'ssh {args} -S {shlex.quote(control)} -O {operation} {host}'
         
         if local_port is None:
 
@@ -113,13 +274,20 @@ class SSH:
             
             local_port = remote_port
 
-        return  f'ssh {args} -NL {local_port}:localhost:{remote_port} {host}'
+        # fail fast if the forward can't be set up, rather than hanging around
+        return  f'ssh {args} -o ExitOnForwardFailure=yes -NL {local_port}:localhost:{remote_port} {host}'
 
 
     def session(self):
         cmd = self.command(forward_agent=True)
         return SSH.SSHInstance(cmd)
 
+    def master(self, control_path) -> 'SSH.Master':
+        """
+            creates a ControlMaster connection that forwards can share
+        """
+        return SSH.Master(self, control_path)
+
     def forward(self, remote_port, local_port=None):
         """
             creates a port forward via SSH
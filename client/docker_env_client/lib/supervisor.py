@@ -0,0 +1,149 @@
+import os
+import selectors
+import signal
+import threading
+import traceback
+
+from .config import Config
+
+
+class ProcessSupervisor:
+    """
+        ProcessSupervisor tells a handler as soon as a watched child process
+        (e.g. an `ssh -NL` forward) exits, so a dropped tunnel is noticed
+        right away rather than on the next port check.
+
+        On Linux a single thread waits on a pidfd for every child.  Where
+        pidfds are not available it wakes on SIGCHLD instead (see
+        install_signal_handler), and otherwise checks its children every
+        check_interval_seconds.
+    """
+    def __init__(self, config: 'Config'):
+        self.config = config
+        self.use_pidfd = hasattr(os, "pidfd_open")
+        self.signalled = False
+        self.watched = {}  # proc => ([handler], pidfd)
+        self.lock = threading.Lock()
+        self.selector = None
+        self.thread = None
+        self._wake_r = None
+        self._wake_w = None
+
+    def install_signal_handler(self):
+        """
+            Wakes the supervisor on SIGCHLD.  Only needed where pidfds are
+            not available, and must be called from the main thread.
+        """
+        if self.use_pidfd or threading.current_thread() is not threading.main_thread():
+            return False
+
+        previous = signal.getsignal(signal.SIGCHLD)
+
+        def handler(signum, frame):
+            self._wake()
+            if callable(previous):
+                previous(signum, frame)
+
+        signal.signal(signal.SIGCHLD, handler)
+        self.signalled = True
+        return True
+
+    def watch(self, proc, handler):
+        """
+            Calls handler(proc) once proc exits.
+        """
+        with self.lock:
+            self._ensure_started()
+            entry = self.watched.get(proc)
+            if entry is not None:
+                entry[0].append(handler)
+                return
+
+            pidfd = None
+            if self.use_pidfd:
+                try:
+                    pidfd = os.pidfd_open(proc.pid)
+                except OSError:
+                    pidfd = None
+
+            self.watched[proc] = ([handler], pidfd)
+            if pidfd is not None:
+                self.selector.register(pidfd, selectors.EVENT_READ, proc)
+        self._wake()
+
+    def unwatch(self, proc, handler=None):
+        """
+            Stops watching proc for handler, or for everyone if no handler is given.
+        """
+        with self.lock:
+            entry = self.watched.get(proc)
+            if entry is None:
+                return
+            handlers, pidfd = entry
+            if handler in handlers:
+                handlers.remove(handler)
+            if handler is None or not handlers:
+                del self.watched[proc]
+                self._close(pidfd)
+
+    def _close(self, pidfd):
+        # must be called with the lock held
+        if pidfd is None:
+            return
+        self.selector.unregister(pidfd)
+        os.close(pidfd)
+
+    def _ensure_started(self):
+        # must be called with the lock held
+        if self.thread is not None:
+            return
+        self.selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self.thread = threading.Thread(target=self._run, name="Process supervisor", daemon=True)
+        self.thread.start()
+
+    def _wake(self):
+        if self._wake_w is None:
+            return
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            # already has a pending wakeup
+            pass
+
+    def _timeout(self):
+        with self.lock:
+            if self.signalled or all(pidfd is not None for _, pidfd in self.watched.values()):
+                return None
+        return self.config.check_interval_seconds
+
+    def _run(self):
+        while True:
+            for key, _ in self.selector.select(self._timeout()):
+                if key.data is None:
+                    try:
+                        while os.read(self._wake_r, 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+            self._check()
+
+    def _check(self):
+        exited = []
+        with self.lock:
+            for proc, (handlers, pidfd) in list(self.watched.items()):
+                if proc.poll() is None:
+                    continue
+                del self.watched[proc]
+                self._close(pidfd)
+                exited.append((proc, handlers))
+
+        for proc, handlers in exited:
+            for handler in handlers:
+                try:
+                    handler(proc)
+                except Exception:
+                    traceback.print_exc()
@@ -1,15 +1,17 @@
 
 from argparse import ArgumentError
-from contextlib import closing
-import socket
+import threading
+import time
 from enum import Enum
 
 from .config import Config
-from .util import is_port_open
-from .repeating_timer import RepeatingTimer
+from .prober import PortProber
+from .scheduler import Scheduler
+from .supervisor import ProcessSupervisor
 from .ssh import SSH
 from .printer import Printer
 from .container import Container
+from .util import free_port
 
 
 class TunnelEvents(Enum):
@@ -28,7 +30,7 @@ class Tunnel:
         3. If the tunnel fails, it will retry.
     """
 
-    def __init__(self, container: 'Container', label, host, remote_port, local_port=None, message=None, ssh_port=None, user=None, expect_open=False):
+    def __init__(self, container: 'Container', label, host, remote_port, local_port=None, message=None, ssh_port=None, user=None, expect_open=False, master=None):
         self.printer = container.get(Printer)
         self.container = container
 
@@ -41,6 +43,7 @@ class Tunnel:
         self.ssh_port = ssh_port
         self.message = message
         self.user = user
+        self.master = master
 
         self.timer = None
         self.connection = None
@@ -53,6 +56,16 @@ class Tunnel:
 
         self.config: Config
         self.config = container.get(Config)
+        self.scheduler: Scheduler
+        self.scheduler = container.get(Scheduler)
+        self.backoff = self.config.poll_backoff()
+        self.prober: PortProber
+        self.prober = container.get(PortProber)
+        self.probed_port = None
+        self.supervisor: ProcessSupervisor
+        self.supervisor = container.get(ProcessSupervisor)
+        self.connected_at = None
+        self.lock = threading.Lock()
 
 
     def add_handler(self, handler):
@@ -93,24 +106,28 @@ class Tunnel:
         self.done = False
 
         result = self._poll()
+        self._subscribe()
 
-        if self.timer is None:
-            self.timer = RepeatingTimer(self.config.check_interval_seconds, self._poll, f'Tunnel {self.label}')
-            self.timer.start()
+        if not result:
+            self._schedule_reconnect()
 
         return result
 
     def stop(self):
         self.done = True
-        if self.connection:
-            self.connection.kill()
-            self.connection = None
-        self._check_connection() # to fire handlers
+        self._unsubscribe()
 
         if self.timer is not None:
             self.timer.cancel()
             self.timer = None
 
+        if self.connection:
+            if self.connection.proc is not None:
+                self.supervisor.unwatch(self.connection.proc, self._connection_exited)
+            self.connection.kill()
+            self.connection = None
+        self._check_connection() # to fire handlers
+
     def status_message(self):
         message = "(Not connected)"
         if self.port_status:
@@ -132,17 +149,63 @@ class Tunnel:
         self.printer.print(f'Failed to connect to {self.label}')
         return False
 
-    def get_open_port(self):
+    def _reconnect(self):
+        if self.done or self._poll():
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+    def _schedule_reconnect(self, delay=None):
+        """
+            Retries the connection, backing off, until it comes back.
+            While connected the PortProber watches the port instead.
+        """
+        if self.done or self.expect_open or self.timer is not None:
+            return
+        self.timer = self.scheduler.schedule(self.backoff.next, self._reconnect, f'Tunnel {self.label}', delay=delay)
+
+    def _connection_lost(self):
+        self._update_status(False)
+
+        delay = None
+        if self.connected_at is not None and time.monotonic() - self.connected_at > self.backoff.maximum:
+            # it had been up for a while, so try again straight away
+            self.backoff.reset()
+            delay = 0
+        self._schedule_reconnect(delay)
 
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.bind(("", 0))
-        s.listen(1)
-        port = s.getsockname()[1]
-        s.close()
-        return port
+    def _connection_exited(self, proc):
+        if self.done or self.connection is None or self.connection.proc is not proc:
+            return
+        self._connection_lost()
+
+    def _subscribe(self):
+        if self.probed_port == self.local_port or not self.local_port:
+            return
+        self._unsubscribe()
+        self.probed_port = self.local_port
+        self.prober.subscribe(self.probed_port, self._port_probed)
+
+    def _unsubscribe(self):
+        if self.probed_port is not None:
+            self.prober.unsubscribe(self.probed_port, self._port_probed)
+            self.probed_port = None
+
+    def _port_probed(self, port, is_open):
+        if self.done or port != self.local_port:
+            return
+
+        if is_open:
+            self._update_status(True)
+        else:
+            self._connection_lost()
+
+    def get_open_port(self):
+        return free_port()
 
     def _ensure_local_port(self):
-        if not self.local_port:
+        if not self.local_port and self.master is None:
+            # multiplexed forwards aren't visible to the process scan
             self.local_port = SSH.find_existing(
                 self.ssh_port, self.remote_port)
 
@@ -154,28 +217,68 @@ class Tunnel:
     def _create_connection(self):
         if not self.connection or not self.connection.is_alive():
             # if port is not open, try to start a tunnel
-            ssh = self.container.create(SSH, self.container, self.host, self.ssh_port, self.user)
-            self.connection = ssh.forward(self.remote_port, self.local_port)
-            if not self.connection.ensure():
-                self.printer.print(
-                    f'Failed to set up connection to {self.label} on port {self.local_port}')
+            if self.connection is not None:
+                # done with the one that died
+                self.connection.kill()
+            self.connection = self._connect()
+            if self.connection is None:
                 return False
+            self.supervisor.watch(self.connection.proc, self._connection_exited)
 
         return self._check_connection()
 
+    def _connect(self):
+        """
+            Forwards the port over the shared master if there is one, or
+            else over an ssh connection of its own.  Returns None if neither
+            comes up.
+        """
+        if self.master is not None:
+            connection = self.master.forward(self.remote_port, self.local_port)
+            if connection.ensure():
+                return connection
+            connection.kill()
+            self.printer.print(
+                f'Failed to share the SSH connection for {self.label}{self._reason(connection)}, using one of its own')
+            # e.g. a control socket the platform can't bind, so don't keep trying
+            self.master = None
+
+        ssh = self.container.create(SSH, self.container, self.host, self.ssh_port, self.user)
+        connection = ssh.forward(self.remote_port, self.local_port)
+        if connection.ensure():
+            return connection
+        connection.kill()
+        self.printer.print(
+            f'Failed to set up connection to {self.label} on port {self.local_port}{self._reason(connection)}')
+        return None
+
+    @staticmethod
+    def _reason(connection) -> str:
+        if connection.error:
+            return f': {connection.error}'
+        return ""
+
     def _check_connection(self):
 
         if not self._ensure_local_port():
             return False
 
-        port_status = self.port_status
-        result = is_port_open(self.local_port)
+        result = self.prober.probe([self.local_port]).get(self.local_port, False)
+        self._update_status(result)
+        return result
 
-        if result != port_status:
+    def _update_status(self, result):
+        with self.lock:
+            port_status = self.port_status
+            if result == port_status:
+                return
             self.port_status = result
+            # something changed, so look again soon
+            self.backoff.reset()
             if result:
-                self._raise(TunnelEvents.CONNECTED)
-            elif port_status:
-                self._raise(TunnelEvents.DISCONNECTED)
+                self.connected_at = time.monotonic()
 
-        return result
+        if result:
+            self._raise(TunnelEvents.CONNECTED)
+        elif port_status:
+            self._raise(TunnelEvents.DISCONNECTED)
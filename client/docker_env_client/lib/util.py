@@ -1,8 +1,64 @@
+import errno
+import selectors
+import socket
+import time
+from typing import Dict, Iterable
 
+_IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN)
+
+
+def probe_ports(ports: Iterable[int], timeout=.25, host="127.0.0.1") -> Dict[int, bool]:
+    """
+    probe_ports checks which of `ports` are accepting connections, starting
+    a non-blocking connect to each and waiting on all of them together.
+    """
+    results = {}
+    pending = {}
+    with selectors.DefaultSelector() as selector:
+        try:
+            for port in set(ports):
+                if not port:
+                    continue
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                err = sock.connect_ex((host, port))
+                if err in _IN_PROGRESS:
+                    selector.register(sock, selectors.EVENT_WRITE, port)
+                    pending[sock] = port
+                    continue
+                results[port] = err == 0
+                sock.close()
+
+            deadline = time.monotonic() + timeout
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, _ in selector.select(remaining):
+                    sock = key.fileobj
+                    results[key.data] = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+                    selector.unregister(sock)
+                    del pending[sock]
+                    sock.close()
+        finally:
+            for sock, port in pending.items():
+                results[port] = False
+                sock.close()
+
+    return results
+
+
+def is_port_open(port, timeout=.25) -> bool:
+    return probe_ports([port], timeout).get(port, False)
 
-from contextlib import closing
-import socket
 
-def is_port_open(port) -> bool:
-    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
-        return sock.connect_ex(("0.0.0.0", port)) == 0
\ No newline at end of file
+def free_port() -> int:
+    """
+    free_port asks the OS for a port nothing is listening on right now.
+    """
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        s.bind(("", 0))
+        return s.getsockname()[1]
+    finally:
+        s.close()
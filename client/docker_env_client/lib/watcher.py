@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+from .api import AsyncAPI
+from .config import Config
+from .container import Container
+from .scheduler import Scheduler
+
+
+def _unknown_route(response) -> bool:
+    """
+        An old backend's router answers the unknown watch route with a plain
+        text 404.  The watch endpoint answers a missing instance (e.g. one
+        being recreated) with a JSON error instead.
+    """
+    return response.status_code == 404 and "json" not in response.headers.get("content-type", "")
+
+
+class InstanceWatcher:
+    """
+        InstanceWatcher long-polls the backend's watch endpoint for each
+        connected instance, so status and port changes arrive as they
+        happen instead of on the next poll.
+
+        All watches share one asyncio event loop thread and one AsyncAPI
+        connection pool.  Callbacks are handed to the Scheduler, never run
+        on the loop.
+    """
+    def __init__(self, container: 'Container', host, port, user):
+        self.container = container
+        self.user = user
+        self.host = host
+        self.port = port
+        self.config = container.get(Config)
+        self.scheduler: Scheduler
+        self.scheduler = container.get(Scheduler)
+        self.api = AsyncAPI(container, host, port, user)
+        self.watches = {}  # name => future
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+
+    def watch(self, name, changed, unavailable):
+        """
+            Calls changed(instance) each time the instance changes, until
+            unwatch.  If the watch fails it stops and calls unavailable(supported),
+            where supported is False if the backend has no watch endpoint.
+        """
+        with self.lock:
+            self._ensure_started()
+            previous = self.watches.get(name)
+            if previous is not None:
+                previous.cancel()
+            self.watches[name] = asyncio.run_coroutine_threadsafe(self._watch(name, changed, unavailable), self.loop)
+
+    def unwatch(self, name):
+        with self.lock:
+            future = self.watches.pop(name, None)
+        if future is not None:
+            future.cancel()
+
+    def stop(self):
+        with self.lock:
+            watches = list(self.watches.values())
+            self.watches = {}
+            loop = self.loop
+            self.loop = None
+        for future in watches:
+            future.cancel()
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.api.close(), loop).result(timeout=1)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _ensure_started(self):
+        # must be called with the lock held
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="Instance watcher", daemon=True)
+        self.thread.start()
+
+    async def _watch(self, name, changed, unavailable):
+        etag = None
+        while True:
+            try:
+                response = await self.api.watch_instance(self.user, name, etag=etag, wait=self.config.watch_wait_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                response = None
+
+            if response is None or response.status_code not in (200, 304):
+                # back to polling for now, and for good if the backend has
+                # no watch endpoint
+                supported = response is None or not _unknown_route(response)
+                self.scheduler.call_soon(lambda: unavailable(supported), f'Watch {name} unavailable')
+                return
+
+            etag = response.headers.get("etag") or etag
+            if response.status_code == 200 and response.parsed is not None:
+                self.scheduler.call_soon(lambda instance=response.parsed: changed(instance), f'Watch {name}')
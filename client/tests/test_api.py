@@ -0,0 +1,245 @@
+import asyncio
+import unittest
+
+import httpx
+
+from docker_env_client import lib
+from docker_env_client.lib.api_client import Client
+
+
+class TestAPI(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.container = lib.Container({
+          lib.Printer: lib.NullPrinter(),
+          lib.Config: lib.Config(),
+        })
+        self.requests = []
+
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            if request.url.path == "/spaces/the-user":
+                return httpx.Response(200, json=[])
+            return httpx.Response(200, json={"name": "the-name", "user": "the-user", "status": "running", "ssh_port": 1022, "ports": []})
+
+        self.api = lib.API(self.container, "localhost", 3001, "the-user")
+        self.api.api_client.httpx_client = httpx.Client(transport=httpx.MockTransport(handler))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.api.close()
+        return super().tearDown()
+
+    def test_shared_client(self):
+        self.assertIsInstance(self.api.http, httpx.Client)
+
+        shared = self.api.api_client.get_httpx_client()
+        self.assertIs(shared, self.api.api_client.with_headers({"X-Test": "1"}).get_httpx_client())
+        self.assertIs(shared, self.api.api_client.with_timeout(1).get_httpx_client())
+
+        response = self.api.get_instance("the-user", "the-name")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("the-name", response.parsed.name)
+
+        response = self.api.list_instances("the-user")
+        self.assertEqual([], response.parsed)
+
+        self.assertEqual(["/spaces/the-user/the-name", "/spaces/the-user"], [r.url.path for r in self.requests])
+
+    def test_cache(self):
+        self.api.get_instance("the-user", "the-name")
+        self.api.get_instance("the-user", "the-name")
+        self.api.list_instances("the-user")
+        self.api.list_instances("the-user")
+        self.assertEqual(2, len(self.requests))
+
+        # touching the instance drops both cached lookups
+        self.api.stop_instance("the-user", "the-name")
+        self.api.get_instance("the-user", "the-name")
+        self.api.list_instances("the-user")
+        self.assertEqual(5, len(self.requests))
+
+    def test_summary(self):
+        self.api.list_instances("the-user", summary=True)
+        self.api.list_instances("the-user")
+        self.assertEqual("true", self.requests[0].url.params["summary"])
+        self.assertNotIn("summary", self.requests[1].url.params)
+
+        # both are dropped when the instance changes
+        self.api.start_instance("the-user", "the-name")
+        self.api.list_instances("the-user", summary=True)
+        self.api.list_instances("the-user")
+        self.assertEqual(5, len(self.requests))
+
+    def test_not_modified(self):
+        self.api.cache.ttl = 0
+        etag = '"abc"'
+
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            if request.headers.get("if-none-match") == etag:
+                return httpx.Response(304, headers={"ETag": etag})
+            return httpx.Response(200, headers={"ETag": etag}, json={"name": "the-name", "user": "the-user", "status": "running", "ssh_port": 1022, "ports": []})
+
+        self.api.api_client.httpx_client = httpx.Client(transport=httpx.MockTransport(handler))
+
+        first = self.api.get_instance("the-user", "the-name")
+        second = self.api.get_instance("the-user", "the-name")
+
+        self.assertEqual(2, len(self.requests))
+        self.assertIsNone(self.requests[0].headers.get("if-none-match"))
+        self.assertEqual(etag, self.requests[1].headers.get("if-none-match"))
+        self.assertEqual(200, second.status_code)
+        self.assertIs(first.parsed, second.parsed)
+
+        # deleting the instance forgets its ETag
+        self.api.delete_instance("the-user", "the-name")
+        self.assertNotIn(("instance", "the-user", "the-name"), self.api.validated)
+
+    def test_validated_bounded(self):
+        self.api.cache.ttl = 0
+        for i in range(lib.api.VALIDATED_MAX + 10):
+            self.api.get_instance("the-user", f'name-{i}')
+        self.assertEqual(lib.api.VALIDATED_MAX, len(self.api.validated))
+        self.assertNotIn(("instance", "the-user", "name-0"), self.api.validated)
+
+    def _fail_with(self, *outcomes):
+        outcomes = list(outcomes)
+
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            outcome = outcomes.pop(0) if outcomes else 200
+            if isinstance(outcome, Exception):
+                raise outcome
+            if request.url.path == "/spaces/the-user":
+                return httpx.Response(outcome, json=[])
+            return httpx.Response(outcome, json={"name": "the-name", "user": "the-user", "status": "running", "ssh_port": 1022, "ports": []})
+
+        self.api.api_client.httpx_client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    def test_retry(self):
+        self.api.config.api_retry_min_seconds = .01
+        self._fail_with(httpx.ConnectError("down"), 503)
+
+        response = self.api.get_instance("the-user", "the-name")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, len(self.requests))
+        self.assertEqual(lib.CircuitBreaker.CLOSED, self.api.breaker.state)
+
+    def test_no_retry_for_mutations(self):
+        self.api.config.api_retry_min_seconds = .01
+
+        # may have reached the backend, don't send it again
+        self._fail_with(httpx.ReadTimeout("slow"))
+        with self.assertRaises(lib.OutcomeUnknown):
+            self.api.stop_instance("the-user", "the-name")
+        self.assertEqual(1, len(self.requests))
+
+        # never sent, safe to retry
+        self._fail_with(httpx.ConnectError("down"))
+        self.assertEqual(200, self.api.stop_instance("the-user", "the-name").status_code)
+        self.assertEqual(3, len(self.requests))
+
+    def test_breaker(self):
+        self.api.config.api_retry_min_seconds = .01
+        self.api.config.api_retries = 0
+        self._fail_with(*[httpx.ConnectError("down")] * 10)
+
+        for _ in range(self.api.config.api_breaker_threshold):
+            with self.assertRaises(lib.Unavailable):
+                self.api.list_instances("the-user")
+        sent = len(self.requests)
+
+        # fails fast without touching the backend
+        with self.assertRaises(lib.Unavailable) as ctx:
+            self.api.list_instances("the-user")
+        self.assertEqual(sent, len(self.requests))
+        self.assertGreater(ctx.exception.retry_after, 0)
+
+    def test_breaker_trial_released(self):
+        self.api.config.api_retries = 0
+        self.api.breaker.state = lib.CircuitBreaker.OPEN
+
+        # the trial's response can't be parsed
+        self.api.api_client.httpx_client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b"not json")))
+        with self.assertRaises(ValueError):
+            self.api.get_instance("the-user", "the-name")
+
+        # the breaker isn't stuck half open
+        self.assertNotEqual(lib.CircuitBreaker.HALF_OPEN, self.api.breaker.state)
+        self.api.api_client.httpx_client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[])))
+        self.assertEqual(200, self.api.list_instances("the-user").status_code)
+        self.assertEqual(lib.CircuitBreaker.CLOSED, self.api.breaker.state)
+
+    def test_operations(self):
+        stages = ["creating", "done"]
+
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            if request.method == "POST":
+                if request.headers.get("prefer") != "respond-async":
+                    return httpx.Response(201, json={"name": "the-name", "user": "the-user"})
+                return httpx.Response(202, headers={"ETag": '"1"'}, json={"id": "op-1", "stage": "pending", "version": 1})
+            stage = stages.pop(0)
+            return httpx.Response(200, headers={"ETag": '"2"'}, json={
+                "id": "op-1", "user": "the-user", "name": "the-name", "stage": stage, "done": stage == "done",
+                "instance": {"name": "the-name", "user": "the-user", "status": "running", "ssh_port": 1022}})
+
+        self.api.api_client.httpx_client = httpx.Client(transport=httpx.MockTransport(handler))
+
+        # an older backend just answers
+        response = self.api.create_instance("the-user", "the-name")
+        self.assertEqual(201, response.status_code)
+
+        response = self.api.create_instance("the-user", "the-name", respond_async=True)
+        self.assertEqual(202, response.status_code)
+        self.assertIsInstance(response.parsed, lib.api_client.models.Operation)
+        self.assertEqual("op-1", response.parsed.id)
+
+        response = self.api.get_operation("op-1", etag='"1"', wait=5)
+        self.assertEqual("creating", response.parsed.stage)
+        self.assertEqual("/operations/op-1", self.requests[-1].url.path)
+        self.assertEqual('"1"', self.requests[-1].headers["if-none-match"])
+        self.assertEqual("5", self.requests[-1].url.params["wait"])
+
+        response = self.api.get_operation("op-1", etag='"2"')
+        self.assertTrue(response.parsed.done)
+        self.assertEqual(1022, response.parsed.instance.ssh_port)
+
+    def test_default_client(self):
+        client = Client(base_url="http://localhost:3001")
+        self.assertIsNone(client.httpx_client)
+        self.assertIs(client.get_httpx_client(), client.get_httpx_client())
+        client.close()
+
+
+class TestAsyncAPI(unittest.TestCase):
+
+    def test_fan_out(self):
+        requests = []
+
+        def handler(request: httpx.Request):
+            requests.append(request.url.path)
+            name = request.url.path.split("/")[-1]
+            return httpx.Response(200, json={"name": name, "user": "the-user", "status": "running", "ssh_port": 1022, "ports": []})
+
+        container = lib.Container({
+          lib.Printer: lib.NullPrinter(),
+          lib.Config: lib.Config(),
+        })
+
+        async def run():
+            api = lib.AsyncAPI(container, "localhost", 3001, "the-user")
+            api.api_client.async_httpx_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                return await api.get_instances("the-user", ["one", "two", "three"])
+            finally:
+                await api.close()
+
+        responses = asyncio.run(run())
+
+        self.assertEqual(["one", "two", "three"], list(responses.keys()))
+        for name, response in responses.items():
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(name, response.parsed.name)
+        self.assertEqual(3, len(requests))
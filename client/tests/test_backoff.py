@@ -0,0 +1,28 @@
+from docker_env_client import lib
+import unittest
+
+
+class TestBackoff(unittest.TestCase):
+
+    def test_grows_to_maximum(self):
+        backoff = lib.Backoff(1, 5)
+        delays = [backoff.next() for _ in range(5)]
+        self.assertEqual([1, 2, 4, 5, 5], delays)
+
+    def test_reset(self):
+        backoff = lib.Backoff(1, 10)
+        backoff.next()
+        backoff.next()
+        backoff.reset()
+        self.assertEqual(1, backoff.next())
+
+    def test_jitter(self):
+        backoff = lib.Backoff(10, 10, jitter=.2)
+        for _ in range(100):
+            delay = backoff.next()
+            self.assertGreaterEqual(delay, 8)
+            self.assertLessEqual(delay, 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import time
+
+from docker_env_client.lib.backoff import Backoff
+from docker_env_client.lib.breaker import CircuitBreaker, Unavailable
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_open_and_recover(self):
+        breaker = CircuitBreaker(2, Backoff(.05, 1))
+
+        breaker.before()
+        breaker.failure()
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        breaker.before()
+        breaker.failure()
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+
+        # fails fast while open
+        with self.assertRaises(Unavailable) as ctx:
+            breaker.before()
+        self.assertGreater(ctx.exception.retry_after, 0)
+
+        # one trial once the pause is over
+        time.sleep(.06)
+        breaker.before()
+        self.assertEqual(CircuitBreaker.HALF_OPEN, breaker.state)
+        with self.assertRaises(Unavailable):
+            breaker.before()
+
+        breaker.success()
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        self.assertEqual(0, breaker.retry_after())
+        breaker.before()
+
+    def test_failed_trial_pauses_longer(self):
+        breaker = CircuitBreaker(1, Backoff(.05, 1))
+        breaker.failure()
+        first = breaker.retry_after()
+
+        time.sleep(.06)
+        breaker.before()
+        breaker.failure()
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+        self.assertGreater(breaker.retry_after(), first)
+
+    def test_released_trial(self):
+        breaker = CircuitBreaker(1, Backoff(.05, 1))
+        breaker.failure()
+
+        time.sleep(.06)
+        breaker.before()
+        self.assertEqual(CircuitBreaker.HALF_OPEN, breaker.state)
+
+        # the trial ended without an answer either way, the next call gets one
+        breaker.release()
+        breaker.before()
+        self.assertEqual(CircuitBreaker.HALF_OPEN, breaker.state)
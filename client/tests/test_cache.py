@@ -0,0 +1,104 @@
+import unittest
+import threading
+import time
+
+from docker_env_client.lib.cache import ResponseCache, SingleFlight
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_ttl(self):
+        cache = ResponseCache(.05)
+        self.assertIsNone(cache.get("key"))
+
+        cache.put("key", "value")
+        self.assertEqual("value", cache.get("key"))
+
+        time.sleep(.1)
+        self.assertIsNone(cache.get("key"))
+
+    def test_invalidate(self):
+        cache = ResponseCache(10)
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        cache.invalidate("a", "missing")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(2, cache.get("b"))
+
+    def test_stale_put(self):
+        cache = ResponseCache(10)
+        generation = cache.generation
+
+        # a mutation lands while the read was in flight
+        cache.invalidate("a")
+        cache.put("a", "stale", generation)
+        self.assertIsNone(cache.get("a"))
+
+        cache.put("a", "fresh", cache.generation)
+        self.assertEqual("fresh", cache.get("a"))
+
+    def test_disabled(self):
+        cache = ResponseCache(0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_shared_result(self):
+        flights = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flights.do("key", fetch))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        time.sleep(.1)
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(["result"] * 5, results)
+
+        # once done, the next call runs again
+        self.assertEqual("result", flights.do("key", fetch))
+        self.assertEqual(2, len(calls))
+
+    def test_shared_error(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise ValueError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                flights.do("key", fail)
+            except ValueError as ex:
+                errors.append(ex)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call)
+        follower.start()
+        time.sleep(.1)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(2, len(errors))
+        self.assertIs(errors[0], errors[1])
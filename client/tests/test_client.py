@@ -3,13 +3,17 @@
 from typing import List
 from docker_env_client import lib
 from docker_env_client.lib.client import DockerEnvClient
-from docker_env_client.lib.api_client.types import Response
-from docker_env_client.lib.api_client.models import Instance, InstancePortsItem
+from docker_env_client.lib.api_client.types import UNSET, Response
+from docker_env_client.lib.api_client.models import Instance, InstancePortsItem, Operation
 import unittest
 import tempfile
 from os import path
 import mock
 import os
+import threading
+import time
+
+from docker_env_client.lib.commands import RootCommand
 
 class TestClient(unittest.TestCase):
 
@@ -23,6 +27,8 @@ class TestClient(unittest.TestCase):
         container = lib.Container({
           lib.Printer: p,
           lib.API: m,
+          lib.InstanceWatcher: mock.Mock(),
+          lib.Scheduler: lib.Scheduler(),
           lib.Config: lib.Config()
         }, test_mode=True)
 
@@ -130,6 +136,43 @@ class TestClient(unittest.TestCase):
         finally:
             os.remove(tf)
 
+    def _operation(self, status, stage, done=False, error=None):
+        instance = Instance(name="baz", user="test-user", status="running", ssh_port=1022) if done and not error else UNSET
+        return Response['Operation'](
+            status, None, {"etag": stage},
+            Operation(id="op-1", user="test-usr", name="baz", stage=stage, done=done, error=error or UNSET, instance=instance))
+
+    def test_create_async(self):
+        self.api_mock.create_instance.return_value = self._operation(202, "pending")
+        self.api_mock.get_operation.side_effect = [
+            self._operation(200, "creating"),
+            self._operation(304, "creating"),
+            self._operation(200, "ssh-ready"),
+            self._operation(200, "done", done=True),
+        ]
+
+        instance = self.client.create(name="baz", password="password", pubkey_path="/does/not/exist")
+        self.assertEqual(1022, instance.ssh_port)
+        self.assertTrue(self.api_mock.create_instance.call_args.kwargs["respond_async"])
+
+        output = self.printer.value
+        stages = [output.find(f'Creating baz...{stage}') for stage in ("pending", "creating", "ssh-ready", "done")]
+        self.assertNotIn(-1, stages)
+        self.assertEqual(sorted(stages), stages)
+        self.assertEqual(1, output.count("Creating baz...creating"))
+
+        # each wait picks up from the last version seen
+        self.assertEqual("pending", self.api_mock.get_operation.call_args_list[0].kwargs["etag"])
+        self.assertEqual("creating", self.api_mock.get_operation.call_args_list[1].kwargs["etag"])
+
+    def test_restart_async_failed(self):
+        self._mock_get_instance("baz")
+        self.api_mock.restart_instance.return_value = self._operation(202, "pending")
+        self.api_mock.get_operation.return_value = self._operation(200, "failed", done=True, error="no luck")
+
+        self.assertFalse(self.client.restart("baz"))
+        self.assertIn("Restarting baz...failed: no luck", self.printer.value)
+
     def test_connect(self):
         connection_mock = mock.Mock()
 
@@ -181,8 +224,112 @@ class TestClient(unittest.TestCase):
         result = self.client.disconnect("foo")
         self.assertTrue(result)
 
-        
-       
+
+    def _mock_list(self, *instances):
+        self.api_mock.list_instances.return_value = Response[List['Instance']](
+            200, None, {},
+            [Instance(name=name, user="test-user", status=status, ssh_port=1022) for name, status in instances])
+
+    def test_select(self):
+        self._mock_list(("test-a", "running"), ("test-b", "exited"), ("other", "exited"))
+
+        # plain names don't need a list call
+        self.assertEqual(["foo", "bar"], self.client.select(["foo", "bar", "foo"]))
+        self.api_mock.list_instances.assert_not_called()
+
+        self.assertEqual(["test-a", "test-b"], self.client.select(["test-*"]))
+        self.assertEqual(["test-b", "other"], self.client.select(status="exited"))
+        self.assertEqual(["test-b"], self.client.select(["test-*"], status="exited"))
+        self.assertEqual(["test-a", "test-b", "other"], self.client.select(all=True))
+        self.assertEqual([], self.client.select())
+
+    def test_each_concurrent(self):
+        self._mock_list(*[(f'test-{i}', "running") for i in range(6)])
+
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def stop(user, name):
+            with lock:
+                running.append(name)
+                peak.append(len(running))
+            time.sleep(.1)
+            with lock:
+                running.remove(name)
+            return Response(404 if name == "test-5" else 200, None, {}, None)
+
+        self.api_mock.stop_instance.side_effect = stop
+
+        start = time.monotonic()
+        results = self.client.each(self.client.stop_instance, ["test-*"], parallel=3)
+
+        self.assertLess(time.monotonic() - start, .5)
+        self.assertEqual(3, max(peak))
+        self.assertEqual(6, len(results))
+        self.assertFalse(results["test-5"])
+        self.assertTrue(results["test-0"])
+
+    def test_each_serial(self):
+        self._mock_list(("test-a", "running"), ("test-b", "running"))
+
+        def action(name):
+            if name == "test-b":
+                raise Exception("no luck")
+            return True
+
+        results = self.client.each(action, ["test-*"], parallel=1)
+
+        # same failure handling and summary as the concurrent path
+        self.assertEqual({"test-a": True, "test-b": False}, results)
+        self.assertIn("test-b failed: no luck", self.printer.value)
+        self.assertIn("1 of 2 succeeded", self.printer.value)
+
+    def test_each_confirm(self):
+        self._mock_list(("test-a", "running"), ("test-b", "running"))
+        action = mock.Mock(return_value=True)
+
+        asked = []
+        def decline(names):
+            asked.append(names)
+            return False
+
+        self.assertEqual({}, self.client.each(action, ["test-*"], confirm=decline))
+        self.assertEqual([["test-a", "test-b"]], asked)
+        action.assert_not_called()
+        self.assertIn("Cancelled", self.printer.value)
+
+        # plain names are taken at their word
+        self.assertEqual({"test-a": True}, self.client.each(action, ["test-a"], confirm=decline))
+        self.assertEqual(1, len(asked))
+
+        results = self.client.each(action, all=True, confirm=lambda names: True)
+        self.assertEqual({"test-a": True, "test-b": True}, results)
+
+    def test_each_disconnect(self):
+        self._mock_list(*[(f'test-{i}', "running") for i in range(20)])
+        for i in range(20):
+            self.client.connections[f'test-{i}'] = mock.Mock()
+        self.api_mock.delete_instance.side_effect = lambda user, name: Response(200, None, {}, None)
+
+        results = self.client.each(self.client.destroy, all=True, parallel=8)
+
+        self.assertTrue(all(results.values()))
+        self.assertEqual({}, self.client.connections)
+
+    def test_bulk_command(self):
+        command = RootCommand().find("stop")
+        result = command.exec(["--all", "--status", "exited", "--parallel", "4"])
+        self.assertEqual([], result.get("instances"))
+        self.assertTrue(result.get("all"))
+        self.assertEqual("exited", result.get("status"))
+        self.assertEqual(4, result.get("parallel"))
+
+        result = RootCommand().find("destroy").exec(["a", "b*"])
+        self.assertEqual(["a", "b*"], result.get("instances"))
+        self.assertFalse(result.get("yes"))
+        self.assertTrue(RootCommand().find("destroy").exec(["--all", "--yes"]).get("yes"))
+
 
 if __name__ == '__main__':
     unittest.main()
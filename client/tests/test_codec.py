@@ -0,0 +1,34 @@
+import unittest
+
+import httpx
+
+from docker_env_client.lib import codec
+from docker_env_client.lib.api_client import Client
+from docker_env_client.lib.api_client.api.default import get_spaces_user, post_spaces_user
+from docker_env_client.lib.api_client.models import PostSpacesUserJsonBody
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_roundtrip(self):
+        value = {"name": "the-näme", "ports": [1, 2], "ok": True, "none": None}
+        self.assertEqual(value, codec.loads(codec.dumps(value)))
+        self.assertIn(codec.name, ("orjson", "ujson", "json"))
+
+    def test_client_hooks(self):
+        loaded = []
+
+        def loads(data):
+            loaded.append(data)
+            return codec.loads(data)
+
+        client = Client(base_url="http://localhost", json_loads=loads, json_dumps=codec.dumps)
+
+        response = httpx.Response(200, content=b'[{"name": "a"}, {"name": "b"}]')
+        parsed = get_spaces_user._parse_response(client=client, response=response)
+        self.assertEqual(["a", "b"], [i.name for i in parsed])
+        self.assertEqual(1, len(loaded))
+
+        kwargs = post_spaces_user._get_kwargs("the-user", client=client, json_body=PostSpacesUserJsonBody(name="a"))
+        self.assertEqual({"name": "a"}, codec.loads(kwargs["content"]))
+        self.assertEqual("application/json", kwargs["headers"]["Content-Type"])
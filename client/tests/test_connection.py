@@ -3,6 +3,7 @@ from dis import get_instructions
 import unittest
 import mock
 from os import path
+import tempfile
 import time
 
 from docker_env_client import lib
@@ -21,26 +22,35 @@ class TestUser(unittest.TestCase):
         self.config = lib.Config()
         self.container = lib.Container({
           lib.Printer: lib.NullPrinter(),
+          lib.Scheduler: lib.Scheduler(),
           lib.Config: self.config
         })
 
     def setUp(self) -> None:
         self.conn = lib.Connection(self.container, "the-host", "the-user", "the-name", None)
-        self.config.temp_dir_root = path.join("/tmp/fake/my-temp-dir", str(time.time_ns))
+        self.config.temp_dir_root = tempfile.mkdtemp(prefix="docker-env-test-")
         return super().setUp()
 
-    def test_portfile_path(self):
-        val = self.conn._get_portfile_path(1234)
-        self.assertEqual(path.join(self.config.temp_dir_root, "docker-env","the-user-the-name-1234.port"), val)
+    def test_lease_path(self):
+        val = self.conn._get_leases().db_path
+        self.assertEqual(path.join(self.config.temp_dir_root, "docker-env", "leases.db"), val)
 
-    def test_portfile_roundtrip(self):
+    def test_control_path(self):
+        self.config.ssh_dir = path.join(self.config.temp_dir_root, "ssh")
+        self.conn.name = "a-rather-long-instance-name-" * 4
+        val = self.conn._control_path()
+        self.assertEqual(self.config.ssh_dir, path.dirname(val))
+        # leaves room under sun_path for the ssh dir and ssh's bind suffix
+        self.assertLessEqual(len(path.basename(val)), 20)
+
+    def test_lease_roundtrip(self):
         remote_port = time.time_ns() % 100000
         null_local_port = self.conn._get_local_port(remote_port)
         self.assertEqual(0, null_local_port)
 
-        local_port = time.time_ns() % 1000
+        local_port = 1000 + time.time_ns() % 1000
 
-        self.conn._save_local_port(remote_port, local_port)
+        self.assertEqual(local_port, self.conn._lease_local_port(remote_port, local_port))
 
         cached_local_port = self.conn._get_local_port(remote_port)
         self.assertEqual(local_port, cached_local_port)
@@ -50,6 +60,22 @@ class TestUser(unittest.TestCase):
         read_local_port = self.conn._get_local_port(remote_port)
         self.assertEqual(local_port, read_local_port)
 
+        # a new connection loads it up front
+        conn = lib.Connection(self.container, "the-host", "the-user", "the-name", None)
+        conn._load_local_ports()
+        self.assertEqual({remote_port: local_port}, conn.portmap)
+
+        # the port is leased before a tunnel binds it, so another instance
+        # can't take it and gets a different one
+        other = lib.Connection(self.container, "the-host", "the-user", "other-name", None)
+        other_port = other._lease_local_port(remote_port, local_port)
+        self.assertNotEqual(0, other_port)
+        self.assertNotEqual(local_port, other_port)
+
+        # deleting the instance gives its leases up
+        conn.stop(release_ports=True)
+        self.assertIsNone(other._get_leases().get("the-user", "the-name", remote_port))
+
 
     def test_poll(self):
 
@@ -78,9 +104,14 @@ class TestUser(unittest.TestCase):
 
         port_mock = mock.Mock(name="port_mock")
         port_mock.start.return_value = True
+        port_mock.remote_port = 1111
         port_mock.local_port = 51111
 
-        def creator(t, c, label, host, **kwargs):
+        ssh_mock = mock.Mock(name="ssh_mock")
+
+        def creator(t, c, label, host, *args, **kwargs):
+            if t is lib.SSH:
+                return ssh_mock
             if label == "SSH":
                 return ssh_tunnel_mock
             return port_mock
@@ -93,9 +124,141 @@ class TestUser(unittest.TestCase):
         ssh_tunnel_mock.add_handler.assert_called_once()
         port_mock.start.assert_called_once()
         dead_tunnel.stop.assert_called_once()
+        ssh_mock.master.assert_called_once()
 
+    def test_poll_starts_tunnels_concurrently(self):
+        self.conn.is_alive = lambda: True
+        self.conn.tunnel = mock.Mock(name="ssh_tunnel_mock")
+
+        ports = [1111, 2222, 3333, 4444]
+        self.conn.get_instance = mock.Mock(return_value=Response['Instance'](
+            200, None, {},
+            Instance(
+                name="footest",
+                user="test-user",
+                status="happy",
+                ssh_port="1022",
+                ports=[InstancePortsItem(label=f'Port {p}', remote_port=p) for p in ports],
+            )))
+
+        def creator(t, c, label, host, *args, remote_port=None, local_port=None, **kwargs):
+            if t is lib.SSH:
+                return mock.Mock(name="ssh_mock")
+            tunnel = mock.Mock(name=label)
+            tunnel.remote_port = remote_port
+            tunnel.local_port = local_port
+            tunnel.start.side_effect = slow_start
+            return tunnel
+
+        # starts run off the lock, so other callers aren't held up
+        unlocked = []
+        def slow_start():
+            acquired = self.conn.lock.acquire(blocking=False)
+            if acquired:
+                self.conn.lock.release()
+            unlocked.append(acquired)
+            time.sleep(.2)
+            return True
+
+        self.container.create = creator
+
+        start = time.monotonic()
+        self.assertTrue(self.conn._poll())
+        self.assertLess(time.monotonic() - start, .2 * len(ports))
+
+        self.assertEqual(set(ports), set(self.conn.tunnels.keys()))
+        # each tunnel was handed a port leased up front
+        local_ports = set()
+        for p in ports:
+            self.conn.tunnels[p].start.assert_called_once()
+            local_port = self.conn.tunnels[p].local_port
+            self.assertNotEqual(0, local_port)
+            self.assertEqual(local_port, self.conn._get_local_port(p))
+            local_ports.add(local_port)
+        self.assertEqual(len(ports), len(local_ports))
+        self.assertEqual([True] * len(ports), unlocked)
+
+    def test_poll_backoff_resets_on_port_change(self):
+        get_instance_mock = mock.Mock(name="get_instance_mock")
+
+        def instance(*ports):
+            return Response['Instance'](
+                200, None, {},
+                Instance(
+                    name="footest",
+                    user="test-user",
+                    status="happy",
+                    ssh_port="1022",
+                    ports=[InstancePortsItem(label=f'Port {p}', remote_port=p) for p in ports],
+                ))
+
+        self.conn.get_instance = get_instance_mock
+        self.conn.is_alive = lambda: True
+        self.conn.tunnel = mock.Mock(name="ssh_tunnel_mock")
+
+        port_mock = mock.Mock(name="port_mock")
+        port_mock.start.return_value = True
+        port_mock.remote_port = 1111
+        port_mock.local_port = 51111
+        self.container.create = lambda *args, **kwargs: port_mock
+
+        get_instance_mock.return_value = instance(1111)
+        self.conn._poll()
+        self.conn.backoff.next()
+        self.conn.backoff.next()
+
+        # unchanged, keep backing off
+        self.conn._poll()
+        self.assertGreater(self.conn.backoff.current, self.config.check_interval_min_seconds)
+
+        # new port, poll quickly again
+        get_instance_mock.return_value = instance(1111, 2222)
+        self.conn._poll()
+        self.assertEqual(self.config.check_interval_min_seconds, self.conn.backoff.current)
+
+    def test_watch(self):
+        watcher = mock.Mock(name="watcher")
+        self.conn.watcher = watcher
+        self.conn.is_alive = lambda: True
+        self.conn.tunnel = mock.Mock(name="ssh_tunnel_mock")
+        self.conn.timer = mock.Mock(name="timer")
+
+        instance = Instance(name="footest", user="test-user", status="happy", ssh_port="1022", ports=[])
+        self.conn.get_instance = mock.Mock(return_value=Response['Instance'](200, None, {}, instance))
+
+        self.assertTrue(self.conn._poll())
+        watcher.watch.assert_called_once()
+        self.assertEqual(self.config.check_interval_max_seconds, self.conn._next_interval())
+
+        # changes are pushed rather than polled
+        port_mock = mock.Mock(name="port_mock")
+        port_mock.start.return_value = True
+        port_mock.remote_port = 1111
+        port_mock.local_port = 51111
+        self.container.create = lambda *args, **kwargs: port_mock
+
+        _, changed, unavailable = watcher.watch.call_args[0]
+        changed(Instance(name="footest", user="test-user", status="happy", ssh_port="1022",
+            ports=[InstancePortsItem(label="Port A", remote_port=1111)]))
+        self.assertEqual([1111], list(self.conn.tunnels.keys()))
+
+        # an older backend without the watch endpoint, poll from now on
+        unavailable(False)
+        self.assertFalse(self.conn.watching)
+        self.assertIsNone(self.conn.watcher)
+        self.conn.timer.trigger.assert_called_once()
+        self.assertEqual(self.config.check_interval_min_seconds, self.conn.backoff.current)
+
+    def test_poll_unavailable(self):
+        self.conn.get_instance = mock.Mock(side_effect=lib.Unavailable("API unavailable", 7))
+
+        self.assertFalse(self.conn._poll())
+        self.assertTrue(self.conn.unavailable)
+        self.assertEqual(7, self.conn._next_interval())
+
+        # the next interval goes back to the backoff
+        self.assertLess(self.conn._next_interval(), 7)
 
-        
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import tempfile
+import time
+from os import path
+
+from docker_env_client.lib.leases import LeaseStore
+
+
+class TestLeases(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.db_path = path.join(tempfile.mkdtemp(prefix="docker-env-test-"), "leases.db")
+        self.store = LeaseStore(self.db_path)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.store.close()
+        return super().tearDown()
+
+    def test_claim_and_load(self):
+        self.assertIsNone(self.store.get("user", "one", 8080))
+
+        self.assertTrue(self.store.claim("user", "one", 8080, 50080))
+        self.assertTrue(self.store.claim("user", "one", 9090, 50090))
+        self.assertTrue(self.store.claim("user", "two", 8080, 51080))
+
+        self.assertEqual(50080, self.store.get("user", "one", 8080))
+        self.assertEqual({8080: 50080, 9090: 50090}, self.store.load("user", "one"))
+
+        # moving a lease to a new local port frees the old one
+        self.assertTrue(self.store.claim("user", "one", 8080, 50081))
+        self.assertEqual(50081, self.store.get("user", "one", 8080))
+        self.assertTrue(self.store.claim("user", "two", 7070, 50080))
+
+    def test_conflict(self):
+        self.assertTrue(self.store.claim("user", "one", 8080, 50080))
+        self.assertTrue(self.store.claim("user", "one", 8080, 50080))
+
+        # another process sees the same lease
+        other = LeaseStore(self.db_path)
+        self.assertFalse(other.claim("user", "two", 8080, 50080))
+        self.assertEqual(50080, other.get("user", "one", 8080))
+        other.close()
+
+    def test_acquire(self):
+        other = LeaseStore(self.db_path)
+        try:
+            self.assertEqual(50080, self.store.acquire("user", "one", 8080, 50080))
+
+            # the same key shares the lease, whatever port it offers
+            self.assertEqual(50080, other.acquire("user", "one", 8080, 50081))
+
+            # another key has to pick again
+            self.assertIsNone(other.acquire("user", "two", 8080, 50080))
+            self.assertEqual(50082, other.acquire("user", "two", 8080, 50082))
+        finally:
+            other.close()
+
+    def test_release(self):
+        self.store.claim("user", "one", 8080, 50080)
+        self.store.claim("user", "one", 9090, 50090)
+
+        self.store.release("user", "one", 8080)
+        self.assertEqual({9090: 50090}, self.store.load("user", "one"))
+
+        self.store.release("user", "one")
+        self.assertEqual({}, self.store.load("user", "one"))
+
+    def test_expire(self):
+        self.store.ttl = .05
+        self.store.claim("user", "one", 8080, 50080)
+        time.sleep(.1)
+
+        self.assertIsNone(self.store.get("user", "one", 8080))
+        self.assertTrue(self.store.claim("user", "two", 8080, 50080))
+        self.assertEqual({}, self.store.load("user", "one"))
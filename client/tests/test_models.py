@@ -0,0 +1,47 @@
+import unittest
+
+from docker_env_client.lib.api_client.models import Instance, InstancePortsItem
+from docker_env_client.lib.api_client.types import UNSET
+
+
+class TestModels(unittest.TestCase):
+
+    def test_from_dict(self):
+        src = {
+            "name": "the-name",
+            "user": "the-user",
+            "status": "running",
+            "ssh_port": 1022,
+            "ports": [{"label": "web", "port": 8080, "remote_port": 8080}],
+        }
+        instance = Instance.from_dict(src)
+
+        self.assertEqual("the-name", instance.name)
+        self.assertEqual(1022, instance.ssh_port)
+        self.assertIs(UNSET, instance.host)
+        self.assertEqual([InstancePortsItem(label="web", port=8080, remote_port=8080)], instance.ports)
+        self.assertIs(UNSET, instance.ports[0].message)
+        self.assertEqual([], instance.additional_keys)
+        self.assertEqual(src, instance.to_dict())
+
+        self.assertFalse(hasattr(instance, "__dict__"))
+        self.assertFalse(hasattr(instance.ports[0], "__dict__"))
+
+    def test_additional_properties(self):
+        src = {"name": "the-name", "container_stats": {"cpu": 1}, "ports": [{"remote_port": 22, "extra": True}]}
+        instance = Instance.from_dict(src)
+
+        self.assertEqual(["container_stats"], instance.additional_keys)
+        self.assertTrue("container_stats" in instance)
+        self.assertEqual({"cpu": 1}, instance["container_stats"])
+        self.assertTrue(instance.ports[0]["extra"])
+        self.assertEqual(src, instance.to_dict())
+
+        instance["more"] = 1
+        self.assertEqual(1, instance.to_dict()["more"])
+        del instance["more"]
+        self.assertFalse("more" in instance)
+
+    def test_missing_ports(self):
+        instance = Instance.from_dict({"name": "the-name"})
+        self.assertEqual([], instance.ports)
@@ -0,0 +1,57 @@
+from docker_env_client import lib
+from docker_env_client.lib.util import probe_ports
+import socket
+import threading
+import unittest
+
+
+class TestPortProber(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(8)
+        self.open_port = self.listener.getsockname()[1]
+
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("127.0.0.1", 0))
+        self.closed_port = s.getsockname()[1]
+        s.close()
+
+        self.config = lib.Config()
+        self.config.check_interval_seconds = .01
+        self.scheduler = lib.Scheduler()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.listener.close()
+        self.scheduler.stop()
+        return super().tearDown()
+
+    def test_probe_ports(self):
+        results = probe_ports([self.open_port, self.closed_port])
+        self.assertEqual({self.open_port: True, self.closed_port: False}, results)
+
+    def test_subscribe(self):
+        prober = lib.PortProber(self.scheduler, self.config)
+        seen = {}
+        done = threading.Event()
+
+        def handler(port, is_open):
+            seen[port] = is_open
+            if len(seen) == 2:
+                done.set()
+
+        prober.subscribe(self.open_port, handler)
+        prober.subscribe(self.closed_port, handler)
+        self.assertTrue(done.wait(2))
+        self.assertTrue(seen[self.open_port])
+        self.assertFalse(seen[self.closed_port])
+
+        prober.unsubscribe(self.open_port, handler)
+        prober.unsubscribe(self.closed_port, handler)
+        self.assertIsNone(prober.task)
+
+
+if __name__ == '__main__':
+    unittest.main()
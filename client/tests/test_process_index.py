@@ -0,0 +1,52 @@
+from docker_env_client.lib.process_index import ProcessIndex, parse_ssh_forward
+import shlex
+import unittest
+
+
+class TestProcessIndex(unittest.TestCase):
+
+    def test_parse(self):
+        argv = shlex.split("ssh -p 55022  -NL 55001:localhost:55000 test-user@localhost")
+        self.assertEqual((55022, [(55001, 55000)]), parse_ssh_forward(argv))
+
+    def test_parse_variants(self):
+        argv = shlex.split("/usr/bin/ssh -p55022 -N -L 127.0.0.1:55001:127.0.0.1:55000 -L 55003:localhost:55002 test-user@localhost")
+        self.assertEqual((55022, [(55001, 55000), (55003, 55002)]), parse_ssh_forward(argv))
+
+    def test_parse_not_forward(self):
+        self.assertIsNone(parse_ssh_forward(shlex.split("ssh -p 55022 -A test-user@localhost")))
+        self.assertIsNone(parse_ssh_forward(shlex.split("sshd: test-user [priv]")))
+        self.assertIsNone(parse_ssh_forward([]))
+
+    def test_find(self):
+        index = ProcessIndex()
+        scans = 0
+
+        def command_lines():
+            nonlocal scans
+            scans += 1
+            return [
+                shlex.split("ssh -p 55022  -NL 55001:localhost:55000 test-user@localhost"),
+                shlex.split("ssh -p 55023  -NL 55011:localhost:55000 test-user@localhost"),
+                shlex.split("vim ssh.py"),
+            ]
+
+        index._command_lines = command_lines
+
+        self.assertEqual(55001, index.find(55022, 55000))
+        self.assertEqual(55011, index.find(55023, 55000))
+        self.assertIsNone(index.find(55022, 12345))
+        self.assertEqual(1, scans)
+
+        # rescanned once the index is max_age old
+        index.updated -= index.max_age + 1
+        index.find(55022, 55000)
+        self.assertEqual(2, scans)
+
+    def test_scan(self):
+        # just make sure scanning the real process table works
+        ProcessIndex().find(1, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
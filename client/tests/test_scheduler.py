@@ -0,0 +1,74 @@
+from docker_env_client import lib
+import unittest
+import threading
+import time
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.scheduler = lib.Scheduler(workers=2)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.scheduler.stop()
+        return super().tearDown()
+
+    def test_repeats(self):
+        count = 0
+        done = threading.Event()
+
+        def tick():
+            nonlocal count
+            count += 1
+            if count == 3:
+                done.set()
+
+        self.scheduler.schedule(.01, tick, "tick")
+        self.assertTrue(done.wait(2))
+
+    def test_cancel(self):
+        count = 0
+
+        def tick():
+            nonlocal count
+            count += 1
+
+        task = self.scheduler.schedule(.01, tick, "tick")
+        time.sleep(.1)
+        task.cancel()
+        time.sleep(.05)
+        seen = count
+        time.sleep(.1)
+        self.assertEqual(seen, count)
+
+    def test_trigger(self):
+        done = threading.Event()
+        task = self.scheduler.schedule(60, done.set, "slow")
+        task.trigger()
+        self.assertTrue(done.wait(2))
+
+    def test_call_later(self):
+        count = 0
+        done = threading.Event()
+
+        def once():
+            nonlocal count
+            count += 1
+            done.set()
+
+        self.scheduler.call_later(.01, once)
+        self.assertTrue(done.wait(2))
+        time.sleep(.05)
+        self.assertEqual(1, count)
+
+    def test_thread_count_is_fixed(self):
+        tasks = [self.scheduler.schedule(.01, lambda: None, f'task {i}') for i in range(50)]
+        time.sleep(.05)
+        self.assertEqual(3, self.scheduler.thread_count())
+        for t in tasks:
+            t.cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()
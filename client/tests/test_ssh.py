@@ -1,5 +1,8 @@
 from docker_env_client import lib
+import os
+import tempfile
 import unittest
+import time
 
 
 class TestSSH(unittest.TestCase):
@@ -14,7 +17,7 @@ class TestSSH(unittest.TestCase):
 
         ssh = lib.SSH(self.container, "localhost", 55022, "test-user")
         instance = ssh.forward(55000, 55001)
-        self.assertEqual(instance.command, "ssh -p 55022  -NL 55001:localhost:55000 test-user@localhost")
+        self.assertEqual(instance.command, "ssh -p 55022  -o ExitOnForwardFailure=yes -NL 55001:localhost:55000 test-user@localhost")
 
 
     def test_session(self):
@@ -24,5 +27,61 @@ class TestSSH(unittest.TestCase):
         self.assertEqual(instance.command, "ssh -p 55022 -A test-user@127.0.0.1")
 
 
+    def test_run_reports_failure(self):
+
+        instance = lib.SSH.SSHInstance("sh -c 'echo forward failed >&2; exit 3'", local_port=1)
+        start = time.monotonic()
+        self.assertFalse(instance.run())
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual("forward failed", instance.error)
+        self.assertIsNone(instance._stderr_file)
+
+    def test_run_ready(self):
+
+        instance = lib.SSH.SSHInstance("sleep 5", capture=True)
+        try:
+            start = time.monotonic()
+            self.assertTrue(instance.run(ready=lambda: time.monotonic() - start > .05))
+            self.assertLess(time.monotonic() - start, .5)
+        finally:
+            instance.kill()
+        self.assertIsNone(instance._stderr_file)
+
+    def test_master(self):
+
+        ssh = lib.SSH(self.container, "localhost", 55022, "test-user")
+        master = ssh.master("/tmp/test-user-foo.ctl")
+        self.assertEqual(ssh.command(master=master.control_path), "ssh -p 55022  -M -S /tmp/test-user-foo.ctl -o ControlPersist=no -N test-user@localhost")
+        self.assertEqual(ssh.command(control=master.control_path, operation="forward", forward="55001:localhost:55000"), "ssh -p 55022  -S /tmp/test-user-foo.ctl -O forward -L 55001:localhost:55000 test-user@localhost")
+
+    def test_master_socket_in_use(self):
+
+        ssh = lib.SSH(self.container, "localhost", 55022, "test-user")
+        with tempfile.TemporaryDirectory() as d:
+            master = ssh.master(os.path.join(d, "test-user-foo.ctl"))
+            open(master.control_path, "w").close()
+
+            # another process's master answers on the socket, so it stays
+            master.check = lambda: True
+            self.assertFalse(master.ensure())
+            self.assertTrue(os.path.exists(master.control_path))
+            self.assertIn("in use", master.error)
+
+    def test_multiplexed_forward(self):
+
+        ssh = lib.SSH(self.container, "localhost", 55022, "test-user")
+        master = ssh.master("/tmp/test-user-foo.ctl")
+        calls = []
+        master.ensure = lambda: True
+        master.is_alive = lambda: True
+        master.control = lambda op, spec=None: calls.append((op, spec)) or True
+
+        forward = master.forward(55000, 55001)
+        self.assertTrue(forward.ensure())
+        self.assertTrue(forward.ensure())
+        self.assertTrue(forward.kill())
+        self.assertEqual([("forward", "55001:localhost:55000"), ("cancel", "55001:localhost:55000")], calls)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,44 @@
+from docker_env_client import lib
+import subprocess
+import sys
+import threading
+import unittest
+
+
+class TestProcessSupervisor(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.config = lib.Config()
+        self.config.check_interval_seconds = .05
+        return super().setUp()
+
+    def _spawn(self):
+        return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(.1)"])
+
+    def _assert_exit_reported(self, supervisor):
+        proc = self._spawn()
+        exited = threading.Event()
+        supervisor.watch(proc, lambda p: p is proc and exited.set())
+        self.assertTrue(exited.wait(5))
+        self.assertEqual({}, supervisor.watched)
+
+    def test_watch(self):
+        self._assert_exit_reported(lib.ProcessSupervisor(self.config))
+
+    def test_watch_without_pidfd(self):
+        supervisor = lib.ProcessSupervisor(self.config)
+        supervisor.use_pidfd = False
+        self._assert_exit_reported(supervisor)
+
+    def test_unwatch(self):
+        supervisor = lib.ProcessSupervisor(self.config)
+        proc = self._spawn()
+        called = threading.Event()
+        supervisor.watch(proc, lambda p: called.set())
+        supervisor.unwatch(proc)
+        proc.wait()
+        self.assertFalse(called.wait(.3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 from docker_env_client import lib
 from http.server import HTTPServer
 import unittest
+import mock
 import time
 from threading import Thread
 
@@ -8,9 +9,14 @@ class TestTunnel(unittest.TestCase):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        config = lib.Config()
+        scheduler = lib.Scheduler()
         self.container = lib.Container({
           lib.Printer: lib.NullPrinter(),
-          lib.Config: lib.Config()
+          lib.Scheduler: scheduler,
+          lib.PortProber: lib.PortProber(scheduler, config),
+          lib.ProcessSupervisor: lib.ProcessSupervisor(config),
+          lib.Config: config
         })
 
     def test_events(self):
@@ -53,5 +59,48 @@ class TestTunnel(unittest.TestCase):
         self.assertEqual(port, tunnel.local_port)
         self.assertFalse(lib.util.is_port_open(port))
 
+    def test_connection_exit(self):
+        tunnel = lib.Tunnel(self.container,"Test", "localhost", 54321, 55998)
+        tunnel.connection = mock.Mock()
+        tunnel.port_status = True
+        tunnel.backoff.current = tunnel.backoff.maximum
+
+        events = []
+        tunnel.add_handler(lambda label, event: events.append(event))
+
+        try:
+            tunnel._connection_exited(tunnel.connection.proc)
+            self.assertEqual([lib.TunnelEvents.DISCONNECTED], events)
+            self.assertIsNotNone(tunnel.timer)
+            # a state change starts the retries over from the minimum,
+            # and the first retry has taken that delay
+            self.assertLess(tunnel.backoff.current, tunnel.backoff.maximum)
+        finally:
+            tunnel.connection = None
+            tunnel.stop()
+
+    def test_master_fallback(self):
+        master = mock.Mock()
+        master.forward.return_value.ensure.return_value = False
+        master.forward.return_value.error = "ControlPath too long"
+        tunnel = lib.Tunnel(self.container, "Test", "localhost", 54321, 55997, ssh_port=55022, user="test-user", master=master)
+
+        ssh = mock.Mock()
+        tunnel.supervisor = mock.Mock()
+        tunnel.prober = mock.Mock()
+        tunnel.prober.probe.return_value = {55997: True}
+
+        try:
+            # the shared master can't come up, so the port gets its own ssh
+            with mock.patch.object(self.container, "create", return_value=ssh):
+                self.assertTrue(tunnel._create_connection())
+            self.assertIs(ssh.forward.return_value, tunnel.connection)
+            ssh.forward.assert_called_once_with(54321, 55997)
+            master.forward.return_value.kill.assert_called_once()
+            self.assertIsNone(tunnel.master)
+        finally:
+            tunnel.connection = None
+            tunnel.stop()
+
 if __name__ == '__main__':
     unittest.main()
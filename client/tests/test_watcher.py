@@ -0,0 +1,77 @@
+import threading
+import unittest
+
+import httpx
+
+from docker_env_client import lib
+
+
+class TestInstanceWatcher(unittest.TestCase):
+
+    def test_watch(self):
+        requests = []
+
+        def handler(request: httpx.Request):
+            requests.append(request)
+            if len(requests) == 1:
+                return httpx.Response(200, headers={"ETag": '"a"'}, json={"name": "the-name", "user": "the-user", "status": "running", "ssh_port": 1022, "ports": []})
+            if len(requests) == 2:
+                return httpx.Response(304, headers={"ETag": '"a"'})
+            if len(requests) == 3:
+                return httpx.Response(200, headers={"ETag": '"b"'}, json={"name": "the-name", "user": "the-user", "status": "running", "ssh_port": 1022, "ports": [{"label": "web", "remote_port": 8080}]})
+            # an older server without the endpoint
+            return httpx.Response(404, text="404 page not found")
+
+        container = lib.Container({
+          lib.Printer: lib.NullPrinter(),
+          lib.Scheduler: lib.Scheduler(),
+          lib.Config: lib.Config(),
+        })
+        watcher = lib.InstanceWatcher(container, "localhost", 3001, "the-user")
+        watcher.api.api_client.async_httpx_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        changes = []
+        done = threading.Event()
+        result = []
+
+        def unavailable(supported):
+            result.append(supported)
+            done.set()
+
+        watcher.watch("the-name", changes.append, unavailable)
+        self.assertTrue(done.wait(5))
+        watcher.stop()
+
+        self.assertEqual([False], result)
+        self.assertEqual(2, len(changes))
+        self.assertEqual(1, len(changes[1].ports))
+        self.assertEqual("/spaces/the-user/the-name/watch", requests[0].url.path)
+        self.assertEqual(str(container.get(lib.Config).watch_wait_seconds), requests[0].url.params["wait"])
+        self.assertEqual([None, '"a"', '"a"', '"b"'], [r.headers.get("if-none-match") for r in requests])
+
+    def test_missing_instance(self):
+        def handler(request: httpx.Request):
+            # the instance is gone for a moment, e.g. while it is recreated
+            return httpx.Response(404, json={"error": "instance not found"})
+
+        container = lib.Container({
+          lib.Printer: lib.NullPrinter(),
+          lib.Scheduler: lib.Scheduler(),
+          lib.Config: lib.Config(),
+        })
+        watcher = lib.InstanceWatcher(container, "localhost", 3001, "the-user")
+        watcher.api.api_client.async_httpx_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        done = threading.Event()
+        result = []
+
+        def unavailable(supported):
+            result.append(supported)
+            done.set()
+
+        watcher.watch("the-name", lambda instance: None, unavailable)
+        self.assertTrue(done.wait(5))
+        watcher.stop()
+
+        # still supported, so the connection watches again once it is back
+        self.assertEqual([True], result)